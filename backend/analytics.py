@@ -0,0 +1,156 @@
+import time
+import threading
+from array import array
+from bisect import bisect_right
+from operator import add
+from typing import Any, Dict, Iterable, List, Optional
+
+# File analytics of full scans with analytics=True: per directory, the files of its subtree
+# counted (and their bytes summed) by extension, size bucket and age bucket.
+#
+# Every directory gets one fixed-size row of SLOTS counters, whatever the number of files or
+# of distinct extensions: EXTENSION_SLOTS named extensions, then "other", then the size and
+# age buckets. Extensions get a slot in the order they are first seen (pinned ones first);
+# once the slots are taken, new extensions are counted as "other". Workers add each file to
+# its directory's row, rollup() then adds every row into its parent's, bottom-up, like the
+# du totals. The rows are stored in the snapshot ("hist_count" / "hist_bytes" sections), so
+# any node can be queried afterwards without rescanning. Cost: SLOTS * 12 bytes per directory.
+EXTENSION_SLOTS = 16
+MAX_EXTENSION = 10 # Longer "extensions" (hashes, dates after a dot...) count as other
+COMPOUND_EXTENSIONS = ("tar.gz", "tar.bz2", "tar.xz", "tar.zst")
+NO_EXTENSION = ""
+OTHER = "(other)"
+
+SIZE_EDGES = (1, 4 << 10, 64 << 10, 1 << 20, 16 << 20, 256 << 20, 1 << 30)
+SIZE_BUCKETS = ("0", "1B-4K", "4K-64K", "64K-1M", "1M-16M", "16M-256M", "256M-1G", "1G+")
+AGE_EDGES = tuple(days * 86400 * 10**9 for days in (1, 7, 30, 90, 365)) # By mtime, relative to the scan start
+AGE_BUCKETS = ("<1d", "1-7d", "7-30d", "30-90d", "90d-1y", "1y+")
+
+_SIZE_BASE = EXTENSION_SLOTS + 1
+_AGE_BASE = _SIZE_BASE + len(SIZE_BUCKETS)
+SLOTS = _AGE_BASE + len(AGE_BUCKETS)
+
+def extension(name: str) -> Optional[str]:
+    """Lower-case extension of a file name, NO_EXTENSION if it has none, None if it is not a usable one."""
+    lower = name.lower()
+    for compound in COMPOUND_EXTENSIONS:
+        if lower.endswith("." + compound) and len(lower) > len(compound) + 1:
+            return compound
+    dot = lower.rfind(".")
+    if dot <= 0: # No dot, or a dotfile such as .bashrc
+        return NO_EXTENSION
+    ext = lower[dot + 1:]
+    if not ext:
+        return NO_EXTENSION
+    return ext if len(ext) <= MAX_EXTENSION and ext.isalnum() else None
+
+def normalize_extensions(extensions: Optional[Iterable[str]]) -> List[str]:
+    """Pinned extensions as given in a request (".log", "LOG", "tar.gz"), de-duplicated; ValueError if too many."""
+    pinned: List[str] = []
+    for ext in extensions or ():
+        ext = ext.strip().lower().lstrip(".")
+        if ext and ext not in pinned:
+            pinned.append(ext)
+    if len(pinned) > EXTENSION_SLOTS:
+        raise ValueError(f"At most {EXTENSION_SLOTS} extensions can be pinned")
+    return pinned
+
+class Histograms:
+    """Per-directory counter rows of one tree, indexed like its nodes (see TreeStore.histograms)."""
+
+    def __init__(self, extensions: Optional[Iterable[str]] = None, now_ns: Optional[int] = None, count=None, nbytes=None):
+        self.extensions: List[str] = normalize_extensions(extensions)
+        self._slots = {ext: i for i, ext in enumerate(self.extensions)}
+        self.now_ns = now_ns or time.time_ns()
+        self.count = count if count is not None else array("I")
+        self.bytes = nbytes if nbytes is not None else array("Q")
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_layout(cls, layout: Dict[str, Any], count, nbytes) -> Optional["Histograms"]:
+        """Rows read back from a snapshot; None if they were written with another slot layout."""
+        if layout.get("slots") != SLOTS or len(layout.get("extensions", ())) > EXTENSION_SLOTS:
+            return None
+        hist = cls(now_ns=layout.get("now_ns"), count=count, nbytes=nbytes)
+        hist.extensions = list(layout["extensions"])
+        hist._slots = {ext: i for i, ext in enumerate(hist.extensions)}
+        return hist
+
+    def layout(self) -> Dict[str, Any]:
+        return {"slots": SLOTS, "extensions": list(self.extensions), "size_buckets": list(SIZE_BUCKETS),
+                "age_buckets": list(AGE_BUCKETS), "now_ns": self.now_ns}
+
+    def grow(self):
+        """Appends a zeroed row (TreeStore calls this for every node it appends)."""
+        self.count.frombytes(bytes(SLOTS * self.count.itemsize))
+        self.bytes.frombytes(bytes(SLOTS * self.bytes.itemsize))
+
+    def _extension_slot(self, name: str) -> int:
+        ext = extension(name)
+        if ext is None:
+            return EXTENSION_SLOTS
+        slot = self._slots.get(ext)
+        if slot is None:
+            with self._lock:
+                slot = self._slots.get(ext)
+                if slot is None:
+                    if len(self.extensions) >= EXTENSION_SLOTS:
+                        return EXTENSION_SLOTS
+                    slot = self._slots[ext] = len(self.extensions)
+                    self.extensions.append(ext)
+        return slot
+
+    def add(self, node: int, name: str, size: int, mtime_ns: int):
+        """Counts one file into the row of the directory holding it."""
+        base = node * SLOTS
+        age = max(0, self.now_ns - mtime_ns)
+        count, nbytes = self.count, self.bytes
+        for slot in (self._extension_slot(name), _SIZE_BASE + bisect_right(SIZE_EDGES, size), _AGE_BASE + bisect_right(AGE_EDGES, age)):
+            count[base + slot] += 1
+            nbytes[base + slot] += size
+
+    def rollup(self, store):
+        """Adds every row into its parent's, children first; afterwards a row covers the whole subtree."""
+        count, nbytes = self.count, self.bytes
+        parent = store.parent
+        for idx in store.postorder():
+            if not idx:
+                continue
+            own = idx * SLOTS
+            if not any(count[own + _SIZE_BASE:own + _AGE_BASE]): # No files below: nothing to add
+                continue
+            up = parent[idx] * SLOTS
+            count[up:up + SLOTS] = array(count.typecode, map(add, count[up:up + SLOTS], count[own:own + SLOTS]))
+            nbytes[up:up + SLOTS] = array(nbytes.typecode, map(add, nbytes[up:up + SLOTS], nbytes[own:own + SLOTS]))
+
+    def sections(self, perm) -> Dict[str, array]:
+        """Rows reordered to the snapshot's node order (perm: new index -> store index)."""
+        count = array(self.count.typecode, bytes(len(perm) * SLOTS * self.count.itemsize))
+        nbytes = array(self.bytes.typecode, bytes(len(perm) * SLOTS * self.bytes.itemsize))
+        for new, old in enumerate(perm):
+            count[new * SLOTS:(new + 1) * SLOTS] = self.count[old * SLOTS:(old + 1) * SLOTS]
+            nbytes[new * SLOTS:(new + 1) * SLOTS] = self.bytes[old * SLOTS:(old + 1) * SLOTS]
+        return {"hist_count": count, "hist_bytes": nbytes}
+
+    def files(self, idx: int) -> int:
+        base = idx * SLOTS
+        return sum(self.count[base + _SIZE_BASE:base + _AGE_BASE])
+
+    def describe(self, idx: int) -> Dict[str, Any]:
+        """The files below a node: totals, extensions by bytes (largest first), size and age buckets."""
+        base = idx * SLOTS
+        count = list(self.count[base:base + SLOTS])
+        nbytes = list(self.bytes[base:base + SLOTS])
+        names = self.extensions + [None] * (EXTENSION_SLOTS - len(self.extensions)) + [OTHER]
+        extensions = [{"extension": names[slot], "files": count[slot], "bytes": nbytes[slot]}
+                      for slot in range(_SIZE_BASE) if count[slot]]
+        extensions.sort(key=lambda e: (-e["bytes"], -e["files"]))
+        return {
+            "files": sum(count[_SIZE_BASE:_AGE_BASE]),
+            "bytes": sum(nbytes[_SIZE_BASE:_AGE_BASE]),
+            "extensions": extensions,
+            "sizes": [{"bucket": label, "files": count[_SIZE_BASE + i], "bytes": nbytes[_SIZE_BASE + i]}
+                      for i, label in enumerate(SIZE_BUCKETS)],
+            "ages": [{"bucket": label, "files": count[_AGE_BASE + i], "bytes": nbytes[_AGE_BASE + i]}
+                     for i, label in enumerate(AGE_BUCKETS)],
+        }
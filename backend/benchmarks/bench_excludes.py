@@ -0,0 +1,66 @@
+"""Directories read and wall time with heavy excludes: per-entry filtering vs. pruning.
+
+find: the old `-not -path '*rule*'` pairs still descend into excluded trees; `-prune` does not.
+The "directories read" column counts every directory find opens (one getdents loop each) via
+a side-effect-free -printf in front of the expression. The matcher part compares the old
+substring check with ExcludeMatcher.excluded() per path.
+
+Usage: python benchmarks/bench_excludes.py <root> [--dirs 200000] [--fanout 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import DEFAULT_EXCLUDES, exclude_matcher
+from synthetic import make_tree
+
+# Every "d3" subtree (about a tenth of each level) plus a few rules that match nothing
+EXCLUDES = ["d3", "node_modules", ".git", "__pycache__", ".cache", "/nonexistent/a", "/nonexistent/b"]
+
+def count_dirs(command):
+    start = time.perf_counter()
+    out = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout
+    elapsed = time.perf_counter() - start
+    lines = out.split(b"\n")
+    return elapsed, lines.count(b"v"), sum(1 for line in lines if line.startswith(b"/"))
+
+def visit(root):
+    # Prints "v" for each directory find evaluates, then fails so the real expression still runs
+    return ["find", root, "(", "-type", "d", "-printf", "v\\n", "-false", ")", "-o"]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("root")
+    parser.add_argument("--dirs", type=int, default=200_000)
+    parser.add_argument("--fanout", type=int, default=10)
+    args = parser.parse_args()
+    root = os.path.abspath(args.root)
+    make_tree(root, args.dirs, args.fanout)
+
+    old = []
+    for ex in DEFAULT_EXCLUDES:
+        old += ["-not", "-path", f"{ex.rstrip('/')}*"]
+    for ex in EXCLUDES:
+        old += ["-not", "-path", f"*{ex}*"]
+    new = exclude_matcher(EXCLUDES).find_prune_args()
+    for label, expr in (("find -not -path", old + ["-type", "d", "-print"]), ("find -prune", new + ["-type", "d", "-print"])):
+        elapsed, read, kept = count_dirs(visit(root) + expr)
+        print(f"{label:<20} {elapsed:8.2f}s  directories read {read:>9}  kept {kept:>9}")
+
+    paths = [p.decode() for p in subprocess.run(["find", root, "-type", "d"], stdout=subprocess.PIPE).stdout.split(b"\n") if p]
+    rules = DEFAULT_EXCLUDES + EXCLUDES
+    matcher = exclude_matcher(EXCLUDES)
+    start = time.perf_counter()
+    substring = sum(1 for p in paths if any(ex in p for ex in rules))
+    mid = time.perf_counter()
+    compiled = sum(1 for p in paths if matcher.excluded(p))
+    end = time.perf_counter()
+    print(f"{'substring any()':<20} {(mid - start) / len(paths) * 1e9:8.0f} ns/path  excluded {substring}")
+    print(f"{'ExcludeMatcher':<20} {(end - mid) / len(paths) * 1e9:8.0f} ns/path  excluded {compiled}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Peak memory and wall time: streaming find builder vs. collect-sort-paths_to_tree.
+
+Usage: python benchmarks/bench_find_stream.py [--dirs 1000000] [--fanout 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import paths_to_tree, scan_with_find
+from synthetic import make_tree
+
+def collect_then_build(root):
+    out = subprocess.run(["find", root, "-type", "d"], stdout=subprocess.PIPE, text=True).stdout
+    return paths_to_tree([p for p in out.split("\n") if p], root)
+
+def measure(label, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    tree = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<24} {elapsed:8.2f}s  peak {peak / 2**20:8.1f} MiB")
+    return tree
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dirs", type=int, default=1_000_000)
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument("--root", default=os.path.expanduser("~/.cache/nuxview-bench"))
+    args = parser.parse_args()
+
+    root = os.path.join(args.root, f"tree-{args.dirs}-{args.fanout}")
+    make_tree(root, args.dirs, args.fanout)
+    measure("list + paths_to_tree", lambda: collect_then_build(root))
+    measure("streaming builder", lambda: scan_with_find(root, 50))
+
+if __name__ == "__main__":
+    main()
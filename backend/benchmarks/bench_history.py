@@ -0,0 +1,72 @@
+"""History cost: recording scans into the content-addressed store and diffing them (no filesystem).
+
+A second scan adds a handful of directories deep in the tree; only the changed branches should
+need new objects, and the diff should only visit those branches.
+
+Usage: python benchmarks/bench_history.py [--nodes 500000] [--fanout 10] [--changes 10]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history import HistoryStore
+from treestore import TreeStore
+
+def build_store(nodes: int, fanout: int) -> TreeStore:
+    """Like bench_treestore.build_store, with per-directory file sizes so subtrees differ."""
+    rng = random.Random(42)
+    store = TreeStore("/bench", sizes=True)
+    frontier = [0]
+    created = 1
+    while created < nodes:
+        next_frontier = []
+        for parent in frontier:
+            for i in range(fanout):
+                if created >= nodes: break
+                next_frontier.append(store.add(parent, f"d{i}"))
+                created += 1
+        frontier = next_frontier
+    for idx in range(len(store)):
+        store.set_own_sizes(idx, 1, rng.randrange(1 << 20), 0, 0, -1)
+    store.rollup_sizes()
+    return store
+
+def objects(history: HistoryStore) -> int:
+    return history._conn().execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=500_000)
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument("--changes", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history = HistoryStore(os.path.join(tmp, "history.db"))
+        store = build_store(args.nodes, args.fanout)
+        start = time.perf_counter()
+        first = history.record(store, {"created": 1})
+        print(f"record first scan   {time.perf_counter() - start:8.2f}s  objects {objects(history):>9}")
+
+        for i in range(args.changes):
+            store.add(len(store) - 1 - i * 997, f"new{i}")
+        for col in ("total_files", "total_bytes", "total_alloc"):
+            store.columns[col] = type(store.columns[col])(store.columns[col].typecode, bytes(8 * len(store)))
+        store.rollup_sizes()
+        start = time.perf_counter()
+        second = history.record(store, {"created": 2})
+        print(f"record second scan  {time.perf_counter() - start:8.2f}s  objects {objects(history):>9}")
+
+        start = time.perf_counter()
+        diff = history.diff(history.get(first), history.get(second))
+        print(f"diff                {(time.perf_counter() - start) * 1000:8.1f} ms  compared {diff['counts']['compared']} objects, "
+              f"added {diff['counts']['added']}")
+        history.close()
+
+if __name__ == "__main__":
+    main()
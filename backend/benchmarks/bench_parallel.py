@@ -0,0 +1,53 @@
+"""Compares the find-based scan with the parallel scandir walker on a synthetic tree.
+
+Usage: python benchmarks/bench_parallel.py [--dirs 1000000] [--fanout 10] [--workers 8,16,32]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Ensure we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import scan_with_find, scan_with_parallel, DEFAULT_WORKERS
+from synthetic import make_tree
+
+def count_nodes(node) -> int:
+    total = 0
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        total += 1
+        stack.extend(n.children or [])
+    return total
+
+def timed(label, fn):
+    start = time.perf_counter()
+    tree = fn()
+    elapsed = time.perf_counter() - start
+    n = count_nodes(tree) if tree else 0
+    print(f"{label:<28} {elapsed:8.2f}s  {n:>9} dirs  {n / elapsed:>10.0f} dirs/s")
+    return n
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dirs", type=int, default=1_000_000)
+    parser.add_argument("--fanout", type=int, default=10)
+    # Not under /tmp: that is one of the scanner's DEFAULT_EXCLUDES
+    parser.add_argument("--root", default=os.path.expanduser("~/.cache/nuxview-bench"))
+    parser.add_argument("--workers", default=f"1,{DEFAULT_WORKERS}")
+    args = parser.parse_args()
+
+    root = os.path.join(args.root, f"tree-{args.dirs}-{args.fanout}")
+    print(f"Generating {args.dirs} dirs (fanout {args.fanout}) under {root}...")
+    make_tree(root, args.dirs, args.fanout)
+
+    expected = timed("find", lambda: scan_with_find(root, 50))
+    for w in [int(x) for x in args.workers.split(",")]:
+        n = timed(f"parallel ({w} workers)", lambda: scan_with_parallel(root, 50, workers=w))
+        if n != expected:
+            print(f"  MISMATCH: parallel found {n}, find found {expected}")
+
+if __name__ == "__main__":
+    main()
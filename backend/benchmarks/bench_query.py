@@ -0,0 +1,69 @@
+"""Top-n query latency on a synthetic snapshot with random sizes.
+
+Usage: python benchmarks/bench_query.py [--nodes 5000000] [--fanout 10] [--n 50]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from query import TOP_KEYS, top_n
+from snapshot import Snapshot, write_snapshot
+from treestore import TreeStore
+
+def build(nodes: int, fanout: int, seed: int = 7) -> TreeStore:
+    rng = random.Random(seed)
+    store = TreeStore("/bench", sizes=True)
+    cols = store.columns
+    frontier = [0]
+    created = 1
+    while created < nodes:
+        next_frontier = []
+        for parent in frontier:
+            for i in range(fanout):
+                if created >= nodes: break
+                next_frontier.append(store.add(parent, f"d{i}"))
+                created += 1
+        frontier = next_frontier
+    now = time.time_ns()
+    for idx in range(nodes):
+        files = rng.randint(0, 50)
+        store.set_own_sizes(idx, files, files * rng.randint(1, 1 << 20), 0, 0, -1)
+        cols["mtime"][idx] = now - rng.randint(0, 10 ** 17)
+    store.rollup_sizes()
+    return store
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=5_000_000)
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument("--n", type=int, default=50)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = build(args.nodes, args.fanout)
+    path = os.path.join(tempfile.gettempdir(), "nuxview-bench-query.nxv")
+    write_snapshot(store, path)
+    del store
+    print(f"built + wrote {args.nodes} nodes in {time.perf_counter() - start:.1f}s")
+
+    snap = Snapshot(path)
+    scopes = ["/bench", "/bench/d1", "/bench/d1/d2", "/bench/d1/d2/d3/d4"]
+    for by in TOP_KEYS:
+        for scope in scopes:
+            idx = snap.find(scope)
+            if idx < 0: continue
+            timings = []
+            for _ in range(5):
+                t = time.perf_counter()
+                top_n(snap, idx, by, args.n)
+                timings.append((time.perf_counter() - t) * 1000)
+            size = snap.end[idx] - idx
+            print(f"{by:<10} {scope:<22} {size:>9} nodes  best {min(timings):7.2f} ms  worst {max(timings):7.2f} ms")
+
+if __name__ == "__main__":
+    main()
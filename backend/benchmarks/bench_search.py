@@ -0,0 +1,75 @@
+"""Name/path search latency on a synthetic snapshot with varied directory names.
+
+Usage: python benchmarks/bench_search.py [--nodes 2000000] [--fanout 10]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search import search
+from snapshot import Snapshot, write_snapshot
+from treestore import TreeStore
+
+WORDS = ["src", "lib", "build", "cache", "backup", "logs", "node_modules", "site-packages", "tmp", "data",
+         "assets", "config", "docs", "test", "release", "share", "include", "var", "home", "python3"]
+
+QUERIES = [
+    ("backup", "substring"),
+    ("back", "prefix"),
+    ("Backup-1", "prefix"),
+    ("ache-4", "substring"),
+    ("*.log*", "glob"),
+    ("logs-1?", "glob"),
+    ("backup*/cache*", "glob"),
+    ("x", "substring"),
+]
+
+def build(nodes: int, fanout: int, seed: int = 7) -> TreeStore:
+    rng = random.Random(seed)
+    store = TreeStore("/bench")
+    frontier = [0]
+    created = 1
+    while created < nodes:
+        next_frontier = []
+        for parent in frontier:
+            for _ in range(fanout):
+                if created >= nodes: break
+                word = rng.choice(WORDS)
+                name = f"{word.capitalize() if rng.random() < 0.1 else word}-{rng.randint(0, 99999)}"
+                if rng.random() < 0.02:
+                    name += ".log"
+                next_frontier.append(store.add(parent, name))
+                created += 1
+        frontier = next_frontier
+    return store
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=2_000_000)
+    parser.add_argument("--fanout", type=int, default=10)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = build(args.nodes, args.fanout)
+    path = os.path.join(tempfile.gettempdir(), "nuxview-bench-search.nxv")
+    write_snapshot(store, path)
+    names = len(store.names)
+    del store
+    print(f"built + wrote {args.nodes} nodes ({names} distinct names) in {time.perf_counter() - start:.1f}s")
+
+    snap = Snapshot(path)
+    for query, mode in QUERIES:
+        timings = []
+        for _ in range(3):
+            t = time.perf_counter()
+            _, total = search(snap, query, mode, limit=100)
+            timings.append((time.perf_counter() - t) * 1000)
+        print(f"{mode:<10} {query:<18} {total:>9} hits  best {min(timings):8.2f} ms  worst {max(timings):8.2f} ms")
+
+if __name__ == "__main__":
+    main()
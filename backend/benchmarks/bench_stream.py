@@ -0,0 +1,57 @@
+"""Peak memory and time to first byte: one JSON document vs. NDJSON chunks (no filesystem involved).
+
+Usage: python benchmarks/bench_stream.py [--nodes 500000] [--fanout 10]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stream import _line, _next_chunk, node_record
+from bench_treestore import build_store
+
+def measure(label, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first, total = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} first chunk {first * 1000:9.1f} ms  total {elapsed:7.2f}s  peak {peak / 2**20:8.1f} MiB  ({total / 2**20:.1f} MiB sent)")
+
+def whole_document(store):
+    start = time.perf_counter()
+    body = json.dumps({"status": "success", "tree": store.to_dict()}).encode()
+    return time.perf_counter() - start, len(body)
+
+def ndjson(store, order):
+    start = time.perf_counter()
+    lines = (_line(node_record(store, idx, path, level)) for idx, path, level in store.walk(0, None, order))
+    first = None
+    total = 0
+    while True:
+        chunk = _next_chunk(lines)
+        if not chunk:
+            break
+        if first is None:
+            first = time.perf_counter() - start
+        total += len(chunk) # The chunk is dropped here, as it would be once written to the socket
+    return first, total
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=500_000)
+    parser.add_argument("--fanout", type=int, default=10)
+    args = parser.parse_args()
+
+    store = build_store(args.nodes, args.fanout)
+    measure("to_dict + json.dumps", lambda: whole_document(store))
+    measure("NDJSON dfs", lambda: ndjson(store, "dfs"))
+    measure("NDJSON bfs", lambda: ndjson(store, "bfs"))
+
+if __name__ == "__main__":
+    main()
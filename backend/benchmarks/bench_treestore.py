@@ -0,0 +1,75 @@
+"""Memory and time: recursive FileNode tree vs. columnar TreeStore (no filesystem involved).
+
+Usage: python benchmarks/bench_treestore.py [--nodes 1000000] [--fanout 10]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import FileNode
+from treestore import TreeStore
+
+ROOT = "/bench"
+
+def build_filenodes(nodes: int, fanout: int) -> FileNode:
+    root = FileNode(name="bench", path=ROOT, children=[], has_children=False)
+    frontier = [root]
+    created = 1
+    while created < nodes:
+        next_frontier = []
+        for parent in frontier:
+            for i in range(fanout):
+                if created >= nodes: break
+                child = FileNode(name=f"d{i}", path=f"{parent.path}/d{i}", children=[], has_children=False)
+                parent.children.append(child)
+                parent.has_children = True
+                next_frontier.append(child)
+                created += 1
+        frontier = next_frontier
+    return root
+
+def build_store(nodes: int, fanout: int) -> TreeStore:
+    store = TreeStore(ROOT)
+    frontier = [0]
+    created = 1
+    while created < nodes:
+        next_frontier = []
+        for parent in frontier:
+            for i in range(fanout):
+                if created >= nodes: break
+                next_frontier.append(store.add(parent, f"d{i}"))
+                created += 1
+        frontier = next_frontier
+    return store
+
+def measure(label, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<32} {elapsed:8.2f}s  retained {current / 2**20:8.1f} MiB  peak {peak / 2**20:8.1f} MiB")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=1_000_000)
+    parser.add_argument("--fanout", type=int, default=10)
+    args = parser.parse_args()
+
+    tree = measure("FileNode build", lambda: build_filenodes(args.nodes, args.fanout))
+    measure("FileNode model_dump + json", lambda: len(json.dumps(tree.model_dump())))
+    del tree
+
+    store = measure("TreeStore build", lambda: build_store(args.nodes, args.fanout))
+    measure("TreeStore to_dict + json", lambda: len(json.dumps(store.to_dict())))
+    measure("TreeStore root + 1 level", lambda: store.to_filenode(0, 1))
+
+if __name__ == "__main__":
+    main()
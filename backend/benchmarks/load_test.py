@@ -0,0 +1,114 @@
+"""Latency of light endpoints while heavy scans hammer the API.
+
+Starts the server with uvicorn (or uses --url), keeps --heavy clients looping deep /api/scan
+requests over a synthetic tree, and measures /api/health and /api/scan/status from a light
+client for --duration seconds. Prints p50/p99/max of the light requests and how many heavy
+requests completed or were turned away with 429.
+
+Usage: python benchmarks/load_test.py [--dirs 50000] [--heavy 16] [--duration 20] [--url http://127.0.0.1:8765]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_tree
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def request(url: str, body=None, timeout: float = 300):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+def start_server(port: int):
+    # Separate HOME so the benchmark never touches the real ~/.nuxview
+    env = dict(os.environ, HOME=tempfile.mkdtemp(prefix="nuxview-load-"))
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                            cwd=BACKEND, env=env)
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            if request(url + "/api/health", timeout=1) == 200:
+                return proc, url
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise SystemExit("server did not start")
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dirs", type=int, default=50_000)
+    parser.add_argument("--fanout", type=int, default=10)
+    # Not under /tmp: that is one of the scanner's DEFAULT_EXCLUDES
+    parser.add_argument("--root", default=os.path.expanduser("~/.cache/nuxview-bench"))
+    parser.add_argument("--heavy", type=int, default=16, help="concurrent clients looping deep /api/scan")
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--url", help="test a running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    root = os.path.join(args.root, f"tree-{args.dirs}-{args.fanout}")
+    make_tree(root, args.dirs, args.fanout)
+    proc, url = (None, args.url) if args.url else start_server(args.port)
+
+    stop = threading.Event()
+    heavy = {"ok": 0, "busy": 0, "other": 0}
+    lock = threading.Lock()
+
+    def heavy_client():
+        while not stop.is_set():
+            code = request(url + "/api/scan", {"path": root, "max_depth": 50})
+            key = "ok" if code == 200 else "busy" if code == 429 else "other"
+            with lock:
+                heavy[key] += 1
+            if code == 429:
+                time.sleep(0.2)
+
+    light = {"/api/health": [], "/api/scan/status": []}
+
+    def light_client():
+        while not stop.is_set():
+            for path, timings in light.items():
+                start = time.perf_counter()
+                request(url + path, timeout=30)
+                timings.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.02)
+
+    try:
+        threads = [threading.Thread(target=heavy_client, daemon=True) for _ in range(args.heavy)]
+        threads.append(threading.Thread(target=light_client, daemon=True))
+        for t in threads: t.start()
+        time.sleep(args.duration)
+        stop.set()
+        for t in threads: t.join(timeout=60)
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+    print(f"heavy /api/scan over {args.dirs} dirs x{args.heavy}: {heavy['ok']} ok, {heavy['busy']} rejected (429), {heavy['other']} other")
+    for path, timings in light.items():
+        if timings:
+            print(f"{path:<18} {len(timings):>6} reqs  p50 {percentile(timings, 50):8.2f} ms  "
+                  f"p99 {percentile(timings, 99):8.2f} ms  max {max(timings):8.2f} ms")
+
+if __name__ == "__main__":
+    main()
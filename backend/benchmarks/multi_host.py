@@ -0,0 +1,116 @@
+"""Multi-host round trip on one machine: one collector and several agent processes.
+
+Each agent gets its own HOME, host name and synthetic tree, scans it at startup and pushes the
+snapshot; the script waits until the collector lists every host, then creates a directory in
+one agent's tree and times how long the watcher delta takes to show up in the combined tree.
+Prints time-to-ingest per host, the delta latency and a cross-host top-N.
+
+Usage: python benchmarks/multi_host.py [--agents 3] [--dirs 20000] [--port 8770]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_tree
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def get(url: str):
+    with urllib.request.urlopen(url, timeout=30) as resp:
+        return json.loads(resp.read())
+
+def start_server(port: int, **env_vars):
+    # Separate HOME per process so agents and collector never share ~/.nuxview
+    env = dict(os.environ, HOME=tempfile.mkdtemp(prefix="nuxview-cluster-"), **env_vars)
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                            cwd=BACKEND, env=env)
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            get(url + "/api/health")
+            return proc, url, env["HOME"]
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise SystemExit("server did not start")
+
+def wait_for(check, timeout: float, what: str) -> float:
+    started = time.monotonic()
+    while time.monotonic() - started < timeout:
+        if check():
+            return time.monotonic() - started
+        time.sleep(0.1)
+    raise SystemExit(f"timed out waiting for {what}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", type=int, default=3)
+    parser.add_argument("--dirs", type=int, default=20_000)
+    parser.add_argument("--fanout", type=int, default=10)
+    # Not under /tmp: that is one of the scanner's DEFAULT_EXCLUDES
+    parser.add_argument("--root", default=os.path.expanduser("~/.cache/nuxview-bench/cluster"))
+    parser.add_argument("--port", type=int, default=8770)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    token = "bench-token"
+    procs, homes = [], []
+    try:
+        collector, url, home = start_server(args.port, NUXVIEW_MODE="collector", NUXVIEW_CLUSTER_TOKEN=token)
+        procs.append(collector)
+        homes.append(home)
+        roots = {}
+        started = time.monotonic()
+        for i in range(args.agents):
+            host = f"host{i}"
+            root = os.path.join(args.root, host)
+            make_tree(root, args.dirs, args.fanout)
+            roots[host] = root
+            proc, _, home = start_server(args.port + 1 + i, NUXVIEW_MODE="agent", NUXVIEW_COLLECTOR_URL=url,
+                                         NUXVIEW_HOST_NAME=host, NUXVIEW_CLUSTER_TOKEN=token, NUXVIEW_AGENT_PATH=root)
+            procs.append(proc)
+            homes.append(home)
+
+        seen = {}
+        def all_hosts():
+            for h in get(url + "/api/collector/hosts")["hosts"]:
+                seen.setdefault(h["host"], (time.monotonic() - started, h["nodes"]))
+            return len(seen) >= args.agents
+        wait_for(all_hosts, args.timeout, "every agent's first snapshot")
+        for host, (elapsed, nodes) in sorted(seen.items()):
+            print(f"{host}: {nodes} dirs ingested {elapsed:.2f}s after start")
+
+        # One change on the first host should arrive as a delta, not a new snapshot
+        host = sorted(roots)[0]
+        new_dir = os.path.join(roots[host], f"new-{int(time.time())}")
+        os.mkdir(new_dir)
+        query = urllib.parse.urlencode({"path": f"{host}:{roots[host]}", "max_depth": 1})
+        def arrived():
+            children = get(f"{url}/api/collector/tree?{query}")["tree"].get("children") or []
+            return any(c["path"] == f"{host}:{new_dir}" for c in children)
+        print(f"delta {host}:{new_dir} visible after {wait_for(arrived, args.timeout, 'the delta'):.2f}s")
+        os.rmdir(new_dir)
+
+        tree = get(url + "/api/collector/tree?max_depth=1")["tree"]
+        print(f"combined root: {[c['name'] for c in tree['children']]}")
+        for row in get(url + "/api/collector/top?by=files&n=5")["results"]:
+            print(f"  {row['path']}: {row.get('file_count')} files")
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait()
+        for home in homes:
+            shutil.rmtree(home, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
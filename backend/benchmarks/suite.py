@@ -0,0 +1,301 @@
+"""Scanner benchmark suite: every scan path over every synthetic tree shape, saved as JSON.
+
+Stages run in a forked child each, so peak RSS (ru_maxrss) belongs to that stage alone:
+  find             scan_with_find (find | streaming builder -> FileNode)
+  python           scan_with_python (recursive os.scandir)
+  parallel         walk_parallel (work-stealing scandir threads -> TreeStore)
+  paths_to_tree    paths_to_tree over a path list collected beforehand (only the build is timed)
+  serialize_json   TreeStore.to_dict + json.dumps of the whole tree
+  serialize_nxv    write_snapshot of the whole tree
+With --api a server is started (temp HOME, like load_test.py) and the endpoints are timed too:
+/api/scan (deep live scan), /api/scan/node, /api/scan/full (until the job is done) and
+/api/tree/node from the saved scan; the server's peak RSS is read from /proc.
+With --startup every run is a fresh interpreter (temp HOME):
+  import_main      `import main` (FastAPI app, routes, middleware)
+  import_cli       `import cli`, the standalone scanner CLI; also records whether it pulled in
+                   pydantic or fastapi (it must not)
+  cli_scan         `python -m cli` over the first shape, process start to exit
+  cold_start       uvicorn spawned until /api/health answers
+
+Each stage runs --repeat times; the results file holds p50/p90/p99/min/max seconds, dirs/sec
+(directories found / p50) and peak RSS per shape and stage, plus the git commit. Compare two
+runs with --compare old.json new.json.
+
+Usage: python benchmarks/suite.py [--dirs 20000] [--shapes wide,deep,small,symlinks,denied] [--repeat 5]
+                                  [--api] [--startup] [--out results.json]
+       python benchmarks/suite.py --compare old.json new.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_test import BACKEND, percentile, request, start_server
+from scanner import paths_to_tree, scan_with_find, scan_with_python, walk_parallel
+from snapshot import write_snapshot
+from synthetic import SHAPES, make_shape
+
+STAGES = ("find", "python", "parallel", "paths_to_tree", "serialize_json", "serialize_nxv")
+MAX_DEPTH = 50
+
+def count_nodes(node) -> int:
+    count = 0
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        count += 1
+        stack.extend(current.children or [])
+    return count
+
+def collect_paths(root: str):
+    paths = [root]
+    for dirpath, dirnames, _ in os.walk(root):
+        paths += [os.path.join(dirpath, d) for d in dirnames]
+    return paths
+
+def prepare(stage: str, root: str):
+    """Untimed setup of a stage; returns the callable to time. Its result is the directory count."""
+    if stage == "find":
+        return lambda: count_nodes(scan_with_find(root, MAX_DEPTH))
+    if stage == "python":
+        return lambda: count_nodes(scan_with_python(root, MAX_DEPTH))
+    if stage == "parallel":
+        return lambda: len(walk_parallel(root, MAX_DEPTH))
+    if stage == "paths_to_tree":
+        paths = collect_paths(root)
+        return lambda: count_nodes(paths_to_tree(paths, root))
+    store = walk_parallel(root, MAX_DEPTH, sizes=True)
+    if stage == "serialize_json":
+        return lambda: (len(json.dumps(store.to_dict(0, None))), len(store))[1]
+    out = os.path.join(tempfile.gettempdir(), f"nuxview-suite-{os.getpid()}.nxv")
+    def serialize():
+        write_snapshot(store, out)
+        os.unlink(out)
+        return len(store)
+    return serialize
+
+def _child(stage: str, root: str, repeat: int, results):
+    try:
+        fn = prepare(stage, root)
+        base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        times = []
+        dirs = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            dirs = fn()
+            times.append(time.perf_counter() - started)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        results.put({"times": times, "dirs": dirs, "peak_rss_kb": peak, "base_rss_kb": base})
+    except Exception as e:
+        results.put({"error": f"{type(e).__name__}: {e}"})
+
+def run_stage(stage: str, root: str, repeat: int):
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(stage, root, repeat, results))
+    proc.start()
+    result = results.get()
+    proc.join()
+    return result
+
+def summarize(times, dirs: int) -> dict:
+    p50 = percentile(times, 50)
+    return {
+        "runs": len(times),
+        "seconds": {"p50": p50, "p90": percentile(times, 90), "p99": percentile(times, 99), "min": min(times), "max": max(times)},
+        "dirs": dirs,
+        "dirs_per_sec": round(dirs / p50) if p50 > 0 else None,
+    }
+
+def post(url: str, body: dict):
+    req = urllib.request.Request(url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=600) as resp:
+        return json.loads(resp.read())
+
+def get(url: str):
+    with urllib.request.urlopen(url, timeout=600) as resp:
+        return json.loads(resp.read())
+
+def peak_rss_kb(pid: int):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def api_stages(url: str, root: str, repeat: int, dirs: int):
+    def full_scan():
+        job = post(url + "/api/scan/full", {"path": root, "max_depth": MAX_DEPTH, "sizes": True})["job_id"]
+        while get(f"{url}/api/scan/status?job_id={job}")["is_scanning"]:
+            time.sleep(0.01)
+
+    calls = {
+        "api_scan": lambda: post(url + "/api/scan", {"path": root, "max_depth": MAX_DEPTH}),
+        "api_scan_node": lambda: post(url + "/api/scan/node", {"path": root}),
+        "api_scan_full": full_scan,
+        "api_tree_node": lambda: post(url + "/api/tree/node", {"path": root, "max_depth": 2}),
+    }
+    results = {}
+    for name, call in calls.items():
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            call()
+            times.append(time.perf_counter() - started)
+        # Only the deep scans visit the whole tree; the node lookups are reported as latency only
+        results[name] = summarize(times, dirs if name in ("api_scan", "api_scan_full") else 0)
+        if name not in ("api_scan", "api_scan_full"):
+            results[name]["dirs_per_sec"] = None
+    return results
+
+def _timed_import(module: str, env: dict) -> dict:
+    code = (f"import sys, time; t = time.perf_counter(); import {module}; "
+            f"print(time.perf_counter() - t, 'pydantic' in sys.modules or 'fastapi' in sys.modules)")
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, env=env, capture_output=True, text=True, check=True).stdout.split()
+    return {"seconds": float(out[0]), "heavy": out[1] == "True"}
+
+def _cold_start(env: dict, port: int) -> float:
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                            cwd=BACKEND, env=env)
+    try:
+        while True:
+            try:
+                if request(f"http://127.0.0.1:{port}/api/health", timeout=1) == 200:
+                    return time.perf_counter() - started
+            except OSError:
+                pass
+            if proc.poll() is not None or time.perf_counter() - started > 30:
+                raise RuntimeError("server did not start")
+            time.sleep(0.005)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+def startup_stages(root: str, repeat: int, port: int) -> dict:
+    env = dict(os.environ, HOME=tempfile.mkdtemp(prefix="nuxview-startup-"))
+    times = {"import_main": [], "import_cli": [], "cli_scan": [], "cold_start": []}
+    heavy = False
+    for _ in range(repeat):
+        times["import_main"].append(_timed_import("main", env)["seconds"])
+        cli = _timed_import("cli", env)
+        times["import_cli"].append(cli["seconds"])
+        heavy = heavy or cli["heavy"]
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "cli", root, "-d", str(MAX_DEPTH), "-q", "-f", "ndjson"], cwd=BACKEND, env=env,
+                       stdout=subprocess.DEVNULL, check=True)
+        times["cli_scan"].append(time.perf_counter() - started)
+        times["cold_start"].append(_cold_start(env, port))
+    results = {name: {**summarize(values, 0), "dirs_per_sec": None} for name, values in times.items()}
+    results["import_cli"]["imports_pydantic_or_fastapi"] = heavy
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(old_path: str, new_path: str):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old.get('commit')} -> {new.get('commit')}  (p50 seconds; ratio > 1 is slower)")
+    for shape, stages in new["results"].items():
+        for stage, result in stages.items():
+            before = old["results"].get(shape, {}).get(stage)
+            if not before or "seconds" not in before or "seconds" not in result:
+                continue
+            a, b = before["seconds"]["p50"], result["seconds"]["p50"]
+            ratio = b / a if a else float("inf")
+            flag = "  <-- slower" if ratio > 1.1 else ""
+            print(f"{shape:<9} {stage:<15} {a:9.4f} {b:9.4f}  x{ratio:5.2f}{flag}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dirs", type=int, default=20_000)
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument("--shapes", default=",".join(SHAPES))
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--api", action="store_true", help="also time the HTTP endpoints on a local server")
+    parser.add_argument("--startup", action="store_true", help="also time imports, the CLI and server cold start")
+    parser.add_argument("--port", type=int, default=8766)
+    # Not under /tmp: that is one of the scanner's DEFAULT_EXCLUDES
+    parser.add_argument("--root", default=os.path.expanduser("~/.cache/nuxview-bench/suite"))
+    parser.add_argument("--out", default="benchmark-results.json")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": {"cpus": os.cpu_count(), "platform": platform.platform()},
+        "params": {"dirs": args.dirs, "fanout": args.fanout, "repeat": args.repeat, "max_depth": MAX_DEPTH,
+                   "as_root": hasattr(os, "geteuid") and os.geteuid() == 0},
+        "results": {},
+    }
+    server = None
+    try:
+        if args.api:
+            server, url = start_server(args.port)
+        for shape in args.shapes.split(","):
+            root = os.path.join(args.root, f"{shape}-{args.dirs}-{args.fanout}")
+            dirs = make_shape(root, shape, args.dirs, args.fanout)
+            results = report["results"].setdefault(shape, {})
+            for stage in args.stages.split(","):
+                outcome = run_stage(stage, root, args.repeat)
+                if "error" in outcome:
+                    results[stage] = {"error": outcome["error"]}
+                    print(f"{shape:<9} {stage:<15} failed: {outcome['error']}")
+                    continue
+                results[stage] = {**summarize(outcome["times"], outcome["dirs"]),
+                                  "peak_rss_kb": outcome["peak_rss_kb"], "base_rss_kb": outcome["base_rss_kb"]}
+            if server is not None:
+                results.update(api_stages(url, root, args.repeat, dirs))
+            for stage, result in results.items():
+                if "seconds" in result:
+                    rate = f"{result['dirs_per_sec']:>10} dirs/s" if result["dirs_per_sec"] else " " * 17
+                    rss = f"{result['peak_rss_kb'] / 1024:7.1f} MiB" if result.get("peak_rss_kb") else ""
+                    print(f"{shape:<9} {stage:<15} p50 {result['seconds']['p50']:8.4f}s  p99 {result['seconds']['p99']:8.4f}s  "
+                          f"{rate}  {rss}")
+        if server is not None:
+            report["server_peak_rss_kb"] = peak_rss_kb(server.pid)
+        if args.startup:
+            first = args.shapes.split(",")[0]
+            startup = startup_stages(os.path.join(args.root, f"{first}-{args.dirs}-{args.fanout}"), args.repeat, args.port + 1)
+            report["results"]["startup"] = startup
+            for stage, result in startup.items():
+                print(f"{'startup':<9} {stage:<15} p50 {result['seconds']['p50']:8.4f}s  p99 {result['seconds']['p99']:8.4f}s")
+            if startup["import_cli"]["imports_pydantic_or_fastapi"]:
+                print("warning: importing cli pulled in pydantic or fastapi")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Reproducible synthetic directory trees for scanner benchmarks."""
+import os
+import sys
+
+MARKER = ".nuxview-synthetic"
+
+def make_tree(root: str, dirs: int, fanout: int = 10) -> int:
+    """Creates `dirs` directories under root, breadth-first with `fanout` children each.
+
+    Re-uses an existing tree when it was generated with the same parameters.
+    Returns the number of directories (including root).
+    """
+    marker = os.path.join(root, MARKER)
+    spec = f"{dirs} {fanout}"
+    if os.path.exists(marker):
+        with open(marker) as f:
+            if f.read().strip() == spec:
+                return dirs
+        raise SystemExit(f"{root} holds a different synthetic tree, remove it first")
+
+    os.makedirs(root, exist_ok=True)
+    frontier = [root]
+    created = 1
+    while created < dirs:
+        next_frontier = []
+        for parent in frontier:
+            for i in range(fanout):
+                if created >= dirs:
+                    break
+                path = os.path.join(parent, f"d{i}")
+                os.mkdir(path)
+                next_frontier.append(path)
+                created += 1
+            if created >= dirs:
+                break
+        frontier = next_frontier
+
+    with open(marker, "w") as f:
+        f.write(spec)
+    return created
+
+# Shapes for the benchmark suite (see suite.py); each stresses a different part of the walkers:
+#   wide      every directory directly under root: one huge listing, no parallelism to exploit
+#   deep      chains of DEEP_CHAIN nested directories: long paths, little fan-out
+#   small     balanced tree with SMALL_FILES tiny files per directory: size accounting per entry
+#   symlinks  balanced tree plus, every LINK_EVERY directories, links to ".", ".." and nowhere
+#   denied    balanced tree with every DENIED_EVERY-th directory chmod 000 (a no-op for root)
+SHAPES = ("wide", "deep", "small", "symlinks", "denied")
+DEEP_CHAIN = 40 # Below the scanners' default max_depth of 50
+SMALL_FILES = 4
+LINK_EVERY = 50
+DENIED_EVERY = 200
+
+def _check_marker(root: str, spec: str) -> bool:
+    marker = os.path.join(root, MARKER)
+    if os.path.exists(marker):
+        with open(marker) as f:
+            if f.read().strip() == spec:
+                return True
+        raise SystemExit(f"{root} holds a different synthetic tree, remove it first")
+    return False
+
+def make_shape(root: str, shape: str, dirs: int, fanout: int = 10) -> int:
+    """Creates a tree of roughly `dirs` directories in one of SHAPES; re-used like make_tree.
+
+    Returns the number of directories a scanner should find (including root). For "denied"
+    that count assumes the pockets are readable, i.e. it is exact only when running as root.
+    """
+    if shape not in SHAPES:
+        raise ValueError(f"shape must be one of {', '.join(SHAPES)}")
+    spec = f"{shape} {dirs} {fanout}"
+    if _check_marker(root, spec):
+        return dirs
+    if shape == "wide":
+        os.makedirs(root, exist_ok=True)
+        for i in range(dirs - 1):
+            os.mkdir(os.path.join(root, f"w{i:07d}"))
+    elif shape == "deep":
+        os.makedirs(root, exist_ok=True)
+        created = 1
+        chain = 0
+        while created < dirs:
+            path = os.path.join(root, f"c{chain}")
+            for level in range(min(DEEP_CHAIN, dirs - created)):
+                os.mkdir(path)
+                path = os.path.join(path, f"l{level + 1}")
+                created += 1
+            chain += 1
+    else:
+        os.makedirs(root, exist_ok=True)
+        made = []
+        frontier = [root]
+        created = 1
+        while created < dirs:
+            next_frontier = []
+            for parent in frontier:
+                for i in range(fanout):
+                    if created >= dirs:
+                        break
+                    path = os.path.join(parent, f"d{i}")
+                    os.mkdir(path)
+                    next_frontier.append(path)
+                    made.append(path)
+                    created += 1
+            frontier = next_frontier
+        for n, path in enumerate(made):
+            if shape == "small":
+                for f in range(SMALL_FILES):
+                    with open(os.path.join(path, f"f{f}.txt"), "wb") as out:
+                        out.write(b"x" * (64 * (f + 1)))
+            elif shape == "symlinks" and n % LINK_EVERY == 0:
+                os.symlink(".", os.path.join(path, "self"))
+                os.symlink("..", os.path.join(path, "up"))
+                os.symlink(os.path.join(path, "missing"), os.path.join(path, "dangling"))
+        if shape == "denied":
+            # Deepest first, so chmod never locks us out of a pocket we still have to visit
+            for path in reversed(made[DENIED_EVERY - 1::DENIED_EVERY]):
+                os.chmod(path, 0)
+    with open(os.path.join(root, MARKER), "w") as f:
+        f.write(spec)
+    return dirs
+
+def unlock(root: str):
+    """Restores permissions of a "denied" tree so it can be removed with rm -rf."""
+    for dirpath, dirnames, _ in os.walk(root):
+        for name in dirnames:
+            path = os.path.join(dirpath, name)
+            if not os.path.islink(path):
+                os.chmod(path, 0o755)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python synthetic.py <root> <dirs> [fanout] [shape]")
+        sys.exit(1)
+    fanout = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    if len(sys.argv) > 4:
+        n = make_shape(sys.argv[1], sys.argv[4], int(sys.argv[2]), fanout)
+    else:
+        n = make_tree(sys.argv[1], int(sys.argv[2]), fanout)
+    print(f"{n} directories under {sys.argv[1]}")
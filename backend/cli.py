@@ -0,0 +1,149 @@
+"""Scan a directory tree from the command line, without the server.
+
+Usage: python -m cli PATH [--depth 3] [--exclude PATTERN ...] [--engine parallel|find]
+                          [--format text|ndjson|json] [--sizes] [--one-filesystem]
+
+Uses the scanner module directly: no FastAPI, Pydantic or uvicorn are imported, so a scan
+starts in a fraction of the server's startup time. ndjson writes the records of the tree
+streams (see stream.py) while the parallel walker lists directories; text prints an indented
+tree and json the FileNode-shaped tree of /api/scan.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+
+from scanner import DEFAULT_EXCLUDES, ScanLimits, ScanStatus, walk_parallel, walk_with_find
+from excludes import compile_excludes
+from records import dir_record, encode, node_record
+
+FORMATS = ("text", "ndjson", "json")
+ENGINES = ("parallel", "find")
+
+def human(n: int) -> str:
+    if n < 1024:
+        return f"{n}B"
+    size = float(n)
+    for unit in ("K", "M", "G", "T"):
+        size /= 1024
+        if size < 1024 or unit == "T":
+            return f"{size:.1f}{unit}"
+
+class _Output:
+    """stdout shared by the walker threads; a closed pipe (`| head`) cancels the scan."""
+
+    def __init__(self, status: ScanStatus):
+        self.out = sys.stdout.buffer
+        self.status = status
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def write(self, data: bytes):
+        if self.closed:
+            return
+        try:
+            with self._lock:
+                self.out.write(data)
+        except BrokenPipeError:
+            self.closed = True
+            self.status.cancel("output closed")
+
+    def flush(self):
+        if not self.closed:
+            try:
+                self.out.flush()
+            except BrokenPipeError:
+                self.closed = True
+
+def _text_lines(store, sizes: bool):
+    for idx, path, depth in store.walk(0, None, "dfs"):
+        name = path if idx == 0 else store.name(idx)
+        line = "  " * depth + name.rstrip("/") + "/"
+        if sizes:
+            fields = store.size_fields(idx)
+            line += f"  {human(fields.get('size') or 0)}  {fields.get('file_count') or 0} files"
+        yield line.encode(errors="surrogateescape") + b"\n"
+
+def scan(args) -> int:
+    root = os.path.abspath(args.path)
+    if not os.path.isdir(root):
+        print(f"Not a directory: {args.path}", file=sys.stderr)
+        return 2
+    # A compiled matcher is used as is; plain rules get DEFAULT_EXCLUDES added by the scanner
+    excludes = args.exclude if args.default_excludes else compile_excludes(args.exclude)
+    limits = ScanLimits(nice=args.nice, max_rate=args.max_rate, time_budget=args.time_budget)
+    status = ScanStatus()
+    out = _Output(status)
+    live = args.format == "ndjson" and args.engine == "parallel"
+
+    if args.format == "ndjson":
+        out.write(encode({"kind": "start", "path": root, "order": "discovery" if live else "dfs",
+                          "max_depth": args.depth, "sizes": args.sizes}))
+    started = time.perf_counter()
+    if args.engine == "find":
+        store = walk_with_find(root, args.depth, excludes, args.sizes, status, limits, args.one_filesystem)
+    else:
+        on_dir = (lambda node, path, depth, has_children: out.write(encode(dir_record(node, path, depth, has_children)))) if live else None
+        store = walk_parallel(root, args.depth, excludes, args.workers, sizes=args.sizes, status=status, limits=limits,
+                              on_dir=on_dir, one_filesystem=args.one_filesystem)
+    elapsed = time.perf_counter() - started
+
+    if store is None:
+        if args.format == "ndjson":
+            out.write(encode({"kind": "error", "detail": status.error or f"Could not scan {root}"}))
+            out.flush()
+        print(f"Scan failed: {status.error or root}", file=sys.stderr)
+        return 1
+    if args.format == "ndjson":
+        if live:
+            if args.sizes:
+                for idx, path, _ in store.walk():
+                    out.write(encode({"kind": "sizes", "path": path, **store.size_fields(idx)}))
+        else:
+            for idx, path, depth in store.walk(0, None, "dfs"):
+                out.write(encode(node_record(store, idx, path, depth)))
+        out.write(encode({"kind": "end", "nodes": len(store), "stop_reason": status.stop_reason}))
+    elif args.format == "json":
+        out.write(json.dumps(store.to_dict()).encode() + b"\n")
+    else:
+        for line in _text_lines(store, args.sizes):
+            out.write(line)
+            if out.closed:
+                break
+    out.flush()
+
+    if not args.quiet and not out.closed:
+        stopped = f", stopped: {status.stop_reason}" if status.stop_reason else ""
+        print(f"{len(store)} directories in {elapsed:.2f}s ({args.engine}{stopped})", file=sys.stderr)
+    return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Scan a directory tree without the NuxView server.")
+    parser.add_argument("path")
+    parser.add_argument("-d", "--depth", type=int, default=3, help="levels below PATH (default 3)")
+    parser.add_argument("-e", "--exclude", action="append", default=[], help="path or glob to skip; repeatable")
+    parser.add_argument("--no-default-excludes", dest="default_excludes", action="store_false",
+                        help=f"also walk {', '.join(DEFAULT_EXCLUDES)}")
+    parser.add_argument("--engine", choices=ENGINES, default="parallel")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="text")
+    parser.add_argument("-s", "--sizes", action="store_true", help="gather file counts and bytes per subtree")
+    parser.add_argument("-x", "--one-filesystem", action="store_true", help="do not enter other mounts")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="parallel engine threads")
+    parser.add_argument("--nice", type=int, default=None)
+    parser.add_argument("--max-rate", type=float, default=None, help="directories per second")
+    parser.add_argument("--time-budget", type=float, default=None, help="seconds; the partial tree is kept")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no summary on stderr")
+    parser.add_argument("-v", "--verbose", action="store_true", help="scanner log on stderr")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR, stream=sys.stderr,
+                        format="%(levelname)s %(name)s: %(message)s")
+    try:
+        return scan(args)
+    except KeyboardInterrupt:
+        return 130
+
+if __name__ == "__main__":
+    sys.exit(main())
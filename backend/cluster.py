@@ -0,0 +1,312 @@
+import io
+import os
+import re
+import gzip
+import json
+import time
+import heapq
+import hmac
+import socket
+import struct
+import logging
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from query import TOP_KEYS, top_n
+from snapshot import Snapshot, write_snapshot
+from treestore import TreeStore, TreeView
+
+logger = logging.getLogger("nuxview.cluster")
+
+# Multi-host mode. NUXVIEW_MODE=agent runs headless and pushes every saved full scan (gzipped
+# snapshot file) plus the watcher's delta batches to NUXVIEW_COLLECTOR_URL. NUXVIEW_MODE=collector
+# keeps the latest snapshot of each host, applies their deltas, and serves a combined tree whose
+# paths are prefixed with the host ("web1:/var/log") plus top-N queries across hosts.
+MODE = os.environ.get("NUXVIEW_MODE", "").lower() # "", "agent" or "collector"
+COLLECTOR_URL = os.environ.get("NUXVIEW_COLLECTOR_URL", "").rstrip("/")
+HOST_NAME = os.environ.get("NUXVIEW_HOST_NAME") or socket.gethostname()
+TOKEN = os.environ.get("NUXVIEW_CLUSTER_TOKEN", "") # Shared secret; sent as X-NuxView-Token
+# Agent: scan this root every AGENT_INTERVAL seconds (0: only push scans started through the API)
+AGENT_PATH = os.environ.get("NUXVIEW_AGENT_PATH", "/")
+AGENT_INTERVAL = float(os.environ.get("NUXVIEW_AGENT_INTERVAL", 3600))
+AGENT_SIZES = os.environ.get("NUXVIEW_AGENT_SIZES", "1") != "0"
+AGENT_WATCH = os.environ.get("NUXVIEW_AGENT_WATCH", "1") != "0" # Keep the scan current with inotify and push deltas
+MAX_PUSH_BYTES = int(os.environ.get("NUXVIEW_MAX_PUSH_BYTES", 0)) or 1 << 30 # Compressed snapshot size a collector accepts
+MAX_SNAPSHOT_BYTES = int(os.environ.get("NUXVIEW_MAX_SNAPSHOT_BYTES", 0)) or 8 << 30 # Same, once decompressed
+
+TOKEN_HEADER = "X-NuxView-Token"
+HOST_SEP = ":"
+_HOST_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,127}$")
+LOOPBACK = {"127.0.0.1", "::1"}
+
+def valid_host(name: str) -> bool:
+    return bool(_HOST_NAME.match(name))
+
+def check_token(value: Optional[str], client: Optional[str] = None) -> bool:
+    """Without a TOKEN, pushes are only taken from this machine: anyone else could fill the collector's disk."""
+    if not TOKEN:
+        return client in LOOPBACK
+    return hmac.compare_digest(value or "", TOKEN)
+
+class PushTooLarge(ValueError):
+    """A pushed snapshot inflates past MAX_SNAPSHOT_BYTES."""
+
+class ResyncNeeded(Exception):
+    """The collector lost track of a host's deltas and wants its full live tree."""
+
+class Agent:
+    """Pushes this host's scans and live deltas to a collector (blocking calls; run them off the loop)."""
+
+    def __init__(self, url: str, host: str, token: str = "", retries: int = 3):
+        self.url = url
+        self.host = host
+        self.token = token
+        self.retries = retries
+        self.pushed = 0
+        self.failed = 0
+        self.last_push: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def _post(self, path: str, data: bytes, content_type: str, encoding: Optional[str] = None) -> Dict[str, Any]:
+        import urllib.error, urllib.request # Agents only; kept out of every server's startup
+        headers = {"Content-Type": content_type, TOKEN_HEADER: self.token}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        delay = 1.0
+        for attempt in range(self.retries):
+            req = urllib.request.Request(f"{self.url}/api/collector/hosts/{self.host}/{path}", data=data, headers=headers)
+            try:
+                with urllib.request.urlopen(req, timeout=120) as resp:
+                    self.pushed += 1
+                    self.last_push = time.time()
+                    self.last_error = None
+                    return json.loads(resp.read() or b"{}")
+            except urllib.error.HTTPError as e:
+                if e.code == 409:
+                    raise ResyncNeeded()
+                self.last_error = f"HTTP {e.code} from collector"
+                if e.code < 500 and e.code != 429:
+                    break
+            except OSError as e:
+                self.last_error = str(e)
+            if attempt + 1 < self.retries:
+                time.sleep(delay)
+                delay *= 2
+        self.failed += 1
+        raise ConnectionError(f"Push to {self.url} failed: {self.last_error}")
+
+    def push_snapshot(self, path) -> Dict[str, Any]:
+        """Sends a snapshot file, gzipped (directory names compress well)."""
+        with open(path, "rb") as f:
+            data = gzip.compress(f.read(), compresslevel=6)
+        logger.info(f"Pushing snapshot {path} ({len(data)} bytes gzipped) to {self.url}")
+        return self._post("snapshot", data, "application/octet-stream", "gzip")
+
+    def push_tree(self, store: TreeStore, lock, meta: Dict[str, Any], tmp_path) -> Dict[str, Any]:
+        """Snapshots an in-memory tree (the watcher's) and sends it; meta["version"] anchors later deltas."""
+        with lock:
+            write_snapshot(store, tmp_path, meta)
+        try:
+            return self.push_snapshot(tmp_path)
+        finally:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def push_deltas(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        return self._post("deltas", json.dumps(batch).encode(), "application/json")
+
+    def status(self) -> Dict[str, Any]:
+        return {"collector": self.url, "host": self.host, "pushed": self.pushed, "failed": self.failed,
+                "last_push": self.last_push, "last_error": self.last_error}
+
+class HostState:
+    def __init__(self, name: str, snapshot: Snapshot, received: float):
+        self.name = name
+        self.snapshot = snapshot
+        self.received = received
+        self.live: Optional[TreeStore] = None # Snapshot plus applied deltas, made on the first delta
+        self.version: Optional[int] = snapshot.meta.get("version") # Last applied delta batch
+        self.deltas = 0
+        self.resync = False # Deltas are refused until the host pushes its tree again
+        self.lock = threading.Lock()
+
+    @property
+    def tree(self) -> TreeView:
+        return self.live if self.live is not None else self.snapshot
+
+    def to_dict(self) -> Dict[str, Any]:
+        meta = self.snapshot.meta
+        return {"host": self.name, "root_path": self.snapshot.root_path, "timestamp": meta.get("timestamp"),
+                "received": self.received, "nodes": len(self.tree), "sizes": "total_bytes" in self.snapshot.columns,
+                "version": self.version, "deltas_applied": self.deltas}
+
+class Collector:
+    """Latest snapshot per host under root_dir/<host>.nxv, plus deltas applied in memory."""
+
+    def __init__(self, root_dir):
+        self.root_dir = Path(root_dir)
+        self._hosts: Optional[Dict[str, HostState]] = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def hosts(self) -> Dict[str, HostState]:
+        """Host states, opened from root_dir on first use rather than at server startup."""
+        if self._hosts is None:
+            with self._load_lock:
+                if self._hosts is None:
+                    self._hosts = self._load()
+        return self._hosts
+
+    def _load(self) -> Dict[str, HostState]:
+        hosts: Dict[str, HostState] = {}
+        for path in sorted(self.root_dir.glob("*.nxv")):
+            try:
+                state = HostState(path.stem, Snapshot(path), path.stat().st_mtime)
+            except (OSError, ValueError) as e:
+                logger.error(f"Skipping unreadable host snapshot {path}: {e}")
+                continue
+            state.resync = True # Deltas applied before a restart are gone
+            hosts[state.name] = state
+        return hosts
+
+    def ingest(self, host: str, body: bytes, encoding: Optional[str]) -> HostState:
+        """Stores a pushed snapshot (validated before it replaces the previous one)."""
+        path = self.root_dir / f"{host}.nxv"
+        tmp = self.root_dir / f".{host}.nxv.tmp-{threading.get_ident()}"
+        try:
+            with open(tmp, "wb") as out:
+                if encoding == "gzip":
+                    try:
+                        with gzip.GzipFile(fileobj=io.BytesIO(body)) as src:
+                            written = 0
+                            while True:
+                                # Bounded reads: a small gzip body can inflate to any size
+                                chunk = src.read(1 << 20)
+                                if not chunk:
+                                    break
+                                written += len(chunk)
+                                if written > MAX_SNAPSHOT_BYTES:
+                                    raise PushTooLarge(f"Snapshot inflates past {MAX_SNAPSHOT_BYTES} bytes")
+                                out.write(chunk)
+                    except (gzip.BadGzipFile, EOFError, zlib.error) as e:
+                        raise ValueError(f"Bad gzip body: {e}")
+                else:
+                    out.write(body)
+            try:
+                snap = Snapshot(tmp)
+                try:
+                    snap.check()
+                finally:
+                    snap.close()
+            except (ValueError, KeyError, TypeError, AttributeError, IndexError, struct.error) as e:
+                raise ValueError(f"Not a valid snapshot: {e}")
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        state = HostState(host, Snapshot(path), time.time())
+        with self._lock:
+            self.hosts[host] = state
+        logger.info(f"Collector: snapshot from {host} ({len(state.snapshot)} dirs of {state.snapshot.root_path})")
+        return state
+
+    def apply(self, host: str, batch: Dict[str, Any]) -> HostState:
+        """Applies one watcher delta batch; raises ResyncNeeded on a gap or a resync batch."""
+        state = self.hosts.get(host)
+        if state is None:
+            raise ResyncNeeded()
+        version = batch.get("version")
+        with state.lock:
+            if batch.get("resync") or state.resync or (state.version is not None and version != state.version + 1):
+                state.resync = True
+                raise ResyncNeeded()
+            if state.live is None:
+                state.live = TreeStore.from_view(state.snapshot)
+            live = state.live
+            for delta in batch.get("deltas", []):
+                path = delta.get("path", "")
+                if delta.get("op") == "add":
+                    parent = live.find(os.path.dirname(path))
+                    if parent >= 0 and live.child_by_name(parent, os.path.basename(path)) < 0:
+                        live.add(parent, os.path.basename(path))
+                elif delta.get("op") == "remove":
+                    idx = live.find(path)
+                    if idx > 0:
+                        live.remove(idx)
+                elif delta.get("op") == "move":
+                    idx = live.find(delta.get("from", ""))
+                    parent = live.find(os.path.dirname(path))
+                    if idx > 0 and parent >= 0:
+                        live.move(idx, parent, os.path.basename(path))
+            state.version = version
+            state.deltas += len(batch.get("deltas", []))
+        return state
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [state.to_dict() for _, state in sorted(self.hosts.items())]
+
+    def resolve(self, path: str):
+        """"host:/abs/path" -> (state, node index), or (None, -1)."""
+        host, sep, rest = path.partition(HOST_SEP)
+        state = self.hosts.get(host)
+        if state is None or not sep:
+            return None, -1
+        with state.lock:
+            return state, state.tree.find(rest or state.tree.root_path)
+
+    def tree(self, path: Optional[str], depth: int) -> Dict[str, Any]:
+        """The combined tree: a virtual root with one child per host, or the subtree at "host:/path"."""
+        if path:
+            state, idx = self.resolve(path)
+            if state is None or idx < 0:
+                raise KeyError(path)
+            with state.lock:
+                return _prefixed(state.tree.to_dict(idx, depth), state.name)
+        children = []
+        for name, state in sorted(self.hosts.items()):
+            with state.lock:
+                node = _prefixed(state.tree.to_dict(0, max(0, depth - 1)), name)
+            node["name"] = name
+            node["host"] = name
+            children.append(node)
+        return {"name": "hosts", "path": "", "type": "directory", "children": children, "has_children": bool(children)}
+
+    def top(self, by: str, n: int, hosts: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Top-n directories across hosts; each host is ranked on its own index, then merged."""
+        descending = by != "age"
+        column = TOP_KEYS[by]
+        candidates = []
+        for name, state in sorted(self.hosts.items()):
+            if hosts and name not in hosts:
+                continue
+            with state.lock:
+                tree = state.tree
+                if column not in tree.columns:
+                    continue
+                values = tree.columns[column]
+                for i in top_n(tree, 0, by, n):
+                    value = values[i]
+                    candidates.append((value if descending else -value, name, tree.path(i), tree.name(i), tree.size_fields(i),
+                                       tree.columns["mtime"][i]))
+        ranked = heapq.nlargest(n, candidates, key=lambda c: c[0])
+        return [{"host": host, "path": f"{host}{HOST_SEP}{path}", "name": name,
+                 "modified": mtime / 1e9 if mtime > 0 else None, **fields}
+                for _, host, path, name, fields, mtime in ranked]
+
+def _prefixed(node: Dict[str, Any], host: str) -> Dict[str, Any]:
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        current["path"] = f"{host}{HOST_SEP}{current['path']}"
+        if current.get("largest_file"):
+            current["largest_file"] = f"{host}{HOST_SEP}{current['largest_file']}"
+        stack.extend(current.get("children") or [])
+    return node
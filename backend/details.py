@@ -0,0 +1,93 @@
+import os
+import stat
+import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+try:
+    import pwd
+    import grp
+except ImportError: # Windows or non-posix: owners stay numeric
+    pwd = grp = None
+
+# Owner lookups go through NSS and can hit LDAP/SSSD; a handful of ids covers almost any tree
+NAME_CACHE_SIZE = 4096
+MAX_BATCH = 2000 # Paths per /api/node/details/batch request
+BATCH_PARALLEL = 8 # io_pool calls a batch is split into (lstat releases the GIL)
+MIN_SLICE = 32 # Smaller batches are not worth splitting further
+
+# Column order of the compact batch response: one row per path, times as epoch seconds
+BATCH_FIELDS = ["path", "name", "size", "mode", "permissions", "uid", "gid", "owner", "group",
+                "modified", "accessed", "changed", "is_dir", "is_link"]
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def owner_name(uid: int) -> str:
+    if pwd is not None:
+        try:
+            return pwd.getpwuid(uid).pw_name
+        except KeyError:
+            pass
+    return str(uid)
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def group_name(gid: int) -> str:
+    if grp is not None:
+        try:
+            return grp.getgrgid(gid).gr_name
+        except KeyError:
+            pass
+    return str(gid)
+
+def _format_time(ts: float) -> str:
+    return datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+def node_details(path: str) -> Dict[str, Any]:
+    """Metadata for one path as shown by the details panel (follows symlinks, one stat)."""
+    st = os.stat(path)
+    return {
+        "name": os.path.basename(path),
+        "path": path,
+        "size": st.st_size,
+        "permissions": oct(st.st_mode)[-3:], # Last 3 digits for standard unix perm
+        "owner": owner_name(st.st_uid),
+        "group": group_name(st.st_gid),
+        "modified": _format_time(st.st_mtime),
+        "accessed": _format_time(st.st_atime),
+        "created": _format_time(st.st_ctime),
+        "is_dir": stat.S_ISDIR(st.st_mode),
+    }
+
+def details_row(path: str) -> List[Any]:
+    """One BATCH_FIELDS row from a single lstat; raises OSError (or ValueError for a NUL in path) like os.lstat."""
+    st = os.lstat(path)
+    return [
+        path,
+        os.path.basename(path),
+        st.st_size,
+        st.st_mode,
+        oct(st.st_mode)[-3:],
+        st.st_uid,
+        st.st_gid,
+        owner_name(st.st_uid),
+        group_name(st.st_gid),
+        st.st_mtime,
+        st.st_atime,
+        st.st_ctime,
+        stat.S_ISDIR(st.st_mode),
+        stat.S_ISLNK(st.st_mode),
+    ]
+
+def details_rows(paths: List[str]) -> Dict[str, Any]:
+    """BATCH_FIELDS rows for a slice of a batch; failed rows are None with the reason in errors[position]."""
+    rows: List[Optional[List[Any]]] = []
+    errors: Dict[int, str] = {}
+    for pos, path in enumerate(paths):
+        try:
+            rows.append(details_row(path))
+        except (OSError, ValueError) as e: # ValueError: embedded null byte
+            rows.append(None)
+            errors[pos] = getattr(e, "strerror", None) or str(e)
+    return {"rows": rows, "errors": errors}
+
+def cache_info() -> Dict[str, Any]:
+    return {"owners": owner_name.cache_info()._asdict(), "groups": group_name.cache_info()._asdict()}
@@ -0,0 +1,145 @@
+import os
+import re
+import copy
+import fnmatch
+from typing import Dict, Iterable, List, Optional, Pattern
+from mounts import read_mounts
+
+# Exclusion rules, one string each (the `excludes` lists of the API):
+#   /abs/path     that directory and everything below it
+#   name          any path component equal to name (e.g. node_modules, .git)
+#   *.cache       a glob without "/" is matched against every path component
+#   */build/tmp*  a glob with "/" is matched against the whole path, like find -path
+#   foo/bar       a relative path is shorthand for the glob */foo/bar
+#   re:<regex>    Python regex searched in the whole path
+#   fstype:<glob> mount points of matching filesystem types (fstype:nfs*, fstype:fuse.sshfs)
+#   dev:<maj:min> mount points of that device, as listed in /proc/self/mountinfo
+# Rules match whole components, so "/tmp" no longer excludes "/home/x/tmpfiles".
+# A matcher bound to a scan root (below()) applies prefix, name and name-glob rules to the part
+# of a path below that root only: scanning /tmp/x walks it although "/tmp" is a default exclude,
+# and a scan of ~/node_modules is not empty. Path globs and regexes see the whole path. The
+# walkers and the find expression of find_prune_args() follow the same rule.
+GLOB_CHARS = re.compile(r"[*?\[]")
+_FIND_SPECIAL = re.compile(r"([*?\[\]\\])")
+
+_END = "" # Trie key marking the end of an excluded prefix (never a real path component)
+
+def _find_literal(text: str) -> str:
+    return _FIND_SPECIAL.sub(r"\\\1", text)
+
+class ExcludeMatcher:
+    """Rules compiled once per scan and shared by the walkers and the find command line.
+
+    excluded() costs one split plus a dict step per path component for prefix and name rules;
+    globs and regexes are folded into one compiled pattern each.
+    """
+
+    def __init__(self, rules: Iterable[str], mounts=None):
+        self.rules = [r for r in rules if r]
+        self.root: Optional[str] = None # Scan root once bound with below()
+        self._skip = 1 # Leading path components rules do not apply to ("" before the first "/")
+        self._trie: Dict[str, dict] = {}
+        self.prefixes: List[str] = []
+        self.names = set()
+        name_globs: List[str] = []
+        path_globs: List[str] = []
+        regexes: List[str] = []
+        mount_rules = []
+        for rule in self.rules:
+            if rule.startswith("re:"):
+                regexes.append(rule[3:])
+            elif rule.startswith(("fstype:", "dev:")):
+                mount_rules.append(rule)
+            elif GLOB_CHARS.search(rule):
+                (path_globs if "/" in rule else name_globs).append(rule)
+            elif rule.startswith("/"):
+                self._add_prefix(rule)
+            elif "/" in rule:
+                path_globs.append("*/" + rule.strip("/"))
+            else:
+                self.names.add(rule)
+        if mount_rules:
+            for mount in read_mounts() if mounts is None else mounts:
+                if mount.mount_point == "/":
+                    continue # Excluding the root filesystem would exclude everything
+                for rule in mount_rules:
+                    kind, _, value = rule.partition(":")
+                    if fnmatch.fnmatchcase(mount.fstype if kind == "fstype" else mount.device, value):
+                        self._add_prefix(mount.mount_point)
+                        break
+        self.name_globs = name_globs
+        self.path_globs = path_globs
+        self.regexes = regexes
+        self._name_glob: Optional[Pattern] = re.compile("|".join(fnmatch.translate(g) for g in name_globs)) if name_globs else None
+        self._path_glob: Optional[Pattern] = re.compile("|".join(fnmatch.translate(g) for g in path_globs)) if path_globs else None
+        try:
+            self._regex: Optional[Pattern] = re.compile("|".join(f"(?:{r})" for r in regexes)) if regexes else None
+        except re.error as e:
+            raise ValueError(f"Invalid exclude regex: {e}")
+
+    def _add_prefix(self, path: str):
+        path = os.path.normpath(path)
+        if path in self.prefixes:
+            return
+        self.prefixes.append(path)
+        node = self._trie
+        for part in path.split(os.sep)[1:]:
+            node = node.setdefault(part, {})
+        node[_END] = {}
+
+    def below(self, root: str) -> "ExcludeMatcher":
+        """A copy of this matcher for a scan of root: rules only match the components below it."""
+        rooted = copy.copy(self)
+        rooted.root = os.path.normpath(root)
+        rooted._skip = 1 if rooted.root == os.sep else len(rooted.root.split(os.sep))
+        return rooted
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def excluded(self, path: str) -> bool:
+        """True if path, or a directory above it (and below the root, if bound), matches a rule."""
+        parts = path.split(os.sep)
+        skip = self._skip
+        node = self._trie
+        for i in range(1, len(parts)):
+            node = node.get(parts[i])
+            if node is None:
+                break
+            if _END in node and i >= skip:
+                return True
+        below = parts[skip:] if skip > 1 else parts
+        if self.names and not self.names.isdisjoint(below):
+            return True
+        if self._name_glob is not None and any(self._name_glob.match(part) for part in below if part):
+            return True
+        if self._path_glob is not None and self._path_glob.match(path):
+            return True
+        return self.regex_excluded(path)
+
+    def regex_excluded(self, path: str) -> bool:
+        """The part of excluded() that find cannot evaluate itself (see find_prune_args)."""
+        return self._regex is not None and self._regex.search(path) is not None
+
+    def find_prune_args(self) -> List[str]:
+        """find expression that prunes excluded directories instead of walking and filtering them.
+
+        Goes in front of the selecting expression. Regex rules are not translated (find's regex
+        dialects differ from Python's): callers drop those directories with regex_excluded().
+        A bound root is never pruned itself, as the walkers only test the entries below it.
+        """
+        tests: List[List[str]] = []
+        tests += [["-path", _find_literal(p)] for p in self.prefixes]
+        tests += [["-name", _find_literal(n)] for n in sorted(self.names)]
+        tests += [["-name", g] for g in self.name_globs]
+        tests += [["-path", g] for g in self.path_globs]
+        if not tests:
+            return []
+        expr = tests[0]
+        for test in tests[1:]:
+            expr += ["-o"] + test
+        start = ["-type", "d"] + (["!", "-path", _find_literal(self.root)] if self.root is not None else [])
+        return start + ["("] + expr + [")", "-prune", "-o"]
+
+def compile_excludes(rules: Optional[Iterable[str]]) -> ExcludeMatcher:
+    return rules if isinstance(rules, ExcludeMatcher) else ExcludeMatcher(rules or [])
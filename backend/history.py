@@ -0,0 +1,278 @@
+import os
+import json
+import time
+import heapq
+import struct
+import hashlib
+import logging
+import threading
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+from treestore import TreeStore
+
+logger = logging.getLogger("nuxview.history")
+
+# Scan history as a content-addressed (Merkle) tree, the way git stores trees: every directory
+# is one object keyed by the hash of its own file totals and its (name, child hash) entries.
+# Directory names live in the parent's entries, not in the object, so an unchanged or renamed
+# subtree hashes the same in every scan and its rows are shared by all snapshots that contain it.
+# Two snapshots are diffed by walking both roots and only descending where the hashes differ.
+HISTORY_KEEP = int(os.environ.get("NUXVIEW_HISTORY_KEEP", 10)) # Snapshots kept per root; 0 disables history
+HASH_SIZE = 16
+INSERT_BATCH = 10_000
+
+_TOTALS = struct.Struct("=QQQQQ") # own files, own bytes, total files, total bytes, total dirs (hashed)
+_ENTRY = struct.Struct("=H")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    hash BLOB PRIMARY KEY,
+    files INTEGER, bytes INTEGER,
+    total_files INTEGER, total_bytes INTEGER, total_dirs INTEGER,
+    entries BLOB
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    root_path TEXT NOT NULL,
+    created REAL NOT NULL,
+    timestamp TEXT,
+    root_hash BLOB NOT NULL,
+    objects INTEGER,
+    meta TEXT
+);
+CREATE INDEX IF NOT EXISTS snapshots_root ON snapshots (root_path, created);
+"""
+
+class HistoryObject:
+    __slots__ = ("files", "bytes", "total_files", "total_bytes", "total_dirs", "entries")
+
+    def __init__(self, files: int, nbytes: int, total_files: int, total_bytes: int, total_dirs: int, entries: bytes):
+        self.files = files
+        self.bytes = nbytes
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.total_dirs = total_dirs
+        self.entries = entries
+
+    def children(self) -> Dict[str, bytes]:
+        """name -> child hash, decoded from the packed entries."""
+        result = {}
+        pos = 0
+        raw = self.entries
+        while pos < len(raw):
+            (length,) = _ENTRY.unpack_from(raw, pos)
+            pos += _ENTRY.size
+            name = os.fsdecode(raw[pos:pos + length])
+            pos += length
+            result[name] = raw[pos:pos + HASH_SIZE]
+            pos += HASH_SIZE
+        return result
+
+    def totals(self) -> Dict[str, int]:
+        return {"size": self.total_bytes, "file_count": self.total_files, "dirs": self.total_dirs}
+
+def hash_tree(store: TreeStore):
+    """Merkle hashes of every reachable directory, bottom-up: (hashes, objects by hash).
+
+    Objects are (files, bytes, total_files, total_bytes, total_dirs, entries) rows; file totals
+    are 0 for scans without sizes, which then only track the directory structure.
+    """
+    cols = store.columns
+    sized = "files" in cols
+    hashes = [b""] * len(store)
+    total_dirs = array("Q", bytes(8 * len(store)))
+    objects: Dict[bytes, tuple] = {}
+    for idx in store.postorder():
+        kids = sorted(((store.name(c), c) for c in store.children(idx)), key=lambda kc: kc[0])
+        entries = bytearray()
+        dirs = 1
+        for name, child in kids:
+            raw = os.fsencode(name)
+            entries += _ENTRY.pack(len(raw)) + raw + hashes[child]
+            dirs += total_dirs[child]
+        total_dirs[idx] = dirs
+        row = (cols["files"][idx], cols["bytes"][idx], cols["total_files"][idx], cols["total_bytes"][idx], dirs) if sized \
+            else (0, 0, 0, 0, dirs)
+        entries = bytes(entries)
+        digest = hashlib.blake2b(_TOTALS.pack(*row) + entries, digest_size=HASH_SIZE).digest()
+        hashes[idx] = digest
+        objects.setdefault(digest, row + (entries,))
+    return hashes, objects
+
+class HistoryStore:
+    """Retained scans per root in one SQLite file; safe to share between threads."""
+
+    def __init__(self, path, keep: int = HISTORY_KEEP):
+        self.path = str(path)
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._db: Optional["sqlite3.Connection"] = None
+
+    def _conn(self) -> "sqlite3.Connection":
+        if self._db is None:
+            import sqlite3 # On first use: most requests never touch the history
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def record(self, store: TreeStore, meta: Dict[str, Any]) -> Optional[int]:
+        """Adds a scan to the history and prunes the oldest ones of its root; returns the snapshot id."""
+        if self.keep <= 0:
+            return None
+        started = time.monotonic()
+        hashes, objects = hash_tree(store)
+        with self._lock:
+            db = self._conn()
+            with db:
+                known = 0
+                rows = list(objects.items())
+                for start in range(0, len(rows), INSERT_BATCH):
+                    batch = rows[start:start + INSERT_BATCH]
+                    cur = db.executemany("INSERT OR IGNORE INTO objects VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                         [(h,) + obj for h, obj in batch])
+                    known += len(batch) - cur.rowcount
+                cur = db.execute(
+                    "INSERT INTO snapshots (root_path, created, timestamp, root_hash, objects, meta) VALUES (?, ?, ?, ?, ?, ?)",
+                    (store.root_path, meta.get("created", time.time()), meta.get("timestamp"), hashes[0], len(objects),
+                     json.dumps(meta)),
+                )
+                snapshot_id = cur.lastrowid
+            pruned = self._prune(store.root_path)
+        logger.info(f"History: snapshot {snapshot_id} of {store.root_path}, {len(objects)} objects "
+                    f"({known} shared with earlier scans), pruned {pruned}, {time.monotonic() - started:.2f}s")
+        return snapshot_id
+
+    def _prune(self, root_path: str) -> int:
+        db = self._conn()
+        old = [row[0] for row in db.execute(
+            "SELECT id FROM snapshots WHERE root_path = ? ORDER BY created DESC, id DESC LIMIT -1 OFFSET ?", (root_path, self.keep))]
+        if not old:
+            return 0
+        with db:
+            db.executemany("DELETE FROM snapshots WHERE id = ?", [(i,) for i in old])
+            # Mark: objects reachable from any remaining snapshot (shared subtrees are visited once)
+            live = set()
+            stack = [row[0] for row in db.execute("SELECT root_hash FROM snapshots")]
+            while stack:
+                digest = stack.pop()
+                if digest in live:
+                    continue
+                live.add(digest)
+                obj = self._load(digest)
+                if obj is not None:
+                    stack.extend(obj.children().values())
+            # Sweep
+            db.execute("CREATE TEMP TABLE IF NOT EXISTS live (hash BLOB PRIMARY KEY) WITHOUT ROWID")
+            db.execute("DELETE FROM live")
+            db.executemany("INSERT INTO live VALUES (?)", ((h,) for h in live))
+            db.execute("DELETE FROM objects WHERE hash NOT IN (SELECT hash FROM live)")
+            db.execute("DELETE FROM live")
+        return len(old)
+
+    def _load(self, digest: bytes) -> Optional[HistoryObject]:
+        row = self._conn().execute(
+            "SELECT files, bytes, total_files, total_bytes, total_dirs, entries FROM objects WHERE hash = ?", (digest,)).fetchone()
+        return HistoryObject(*row) if row else None
+
+    def list(self, root_path: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = "SELECT id, root_path, created, timestamp, objects FROM snapshots"
+        args: Tuple = ()
+        if root_path:
+            query += " WHERE root_path = ?"
+            args = (root_path,)
+        with self._lock:
+            rows = self._conn().execute(query + " ORDER BY created DESC, id DESC", args).fetchall()
+        return [{"id": i, "root_path": r, "created": c, "timestamp": t, "objects": n} for i, r, c, t, n in rows]
+
+    def get(self, snapshot_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn().execute(
+                "SELECT id, root_path, created, timestamp, root_hash, meta FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "root_path": row[1], "created": row[2], "timestamp": row[3], "root_hash": row[4],
+                "sizes": bool(json.loads(row[5] or "{}").get("sizes"))}
+
+    def before(self, root_path: str, created: float) -> Optional[Dict[str, Any]]:
+        """The newest snapshot of root_path taken at or before `created` (for "since last week")."""
+        with self._lock:
+            row = self._conn().execute(
+                "SELECT id FROM snapshots WHERE root_path = ? AND created <= ? ORDER BY created DESC, id DESC LIMIT 1",
+                (root_path, created)).fetchone()
+        return self.get(row[0]) if row else None
+
+    def diff(self, old: Dict[str, Any], new: Dict[str, Any], path: Optional[str] = None, limit: int = 100,
+             max_depth: Optional[int] = None) -> Dict[str, Any]:
+        """Added, removed and grown directories between two snapshots of the same root.
+
+        Identical subtrees (equal hashes) are skipped without loading them, so the cost follows
+        the size of the change, not of the tree. grown lists the `limit` directories with the
+        largest growth in bytes (in directories for scans without sizes).
+        """
+        root = old["root_path"]
+        sized = old["sizes"] and new["sizes"]
+        with self._lock:
+            a_hash, b_hash = old["root_hash"], new["root_hash"]
+            if path and os.path.abspath(path) != root:
+                rel = os.path.relpath(os.path.abspath(path), root)
+                if rel.startswith(".."):
+                    raise ValueError(f"{path} is not under {root}")
+                for part in rel.split(os.sep):
+                    a_obj, b_obj = self._load(a_hash), self._load(b_hash)
+                    a_hash = a_obj.children().get(part) if a_obj else None
+                    b_hash = b_obj.children().get(part) if b_obj else None
+                    if a_hash is None or b_hash is None:
+                        raise KeyError(path)
+                root = os.path.abspath(path)
+
+            added: List[Dict[str, Any]] = []
+            removed: List[Dict[str, Any]] = []
+            grown: List[tuple] = [] # Heap of (growth, path, before, after)
+            counts = {"added": 0, "removed": 0, "grown": 0, "compared": 0}
+            stack = [(root, a_hash, b_hash, 0)]
+            while stack:
+                node_path, ha, hb, depth = stack.pop()
+                if ha == hb:
+                    continue
+                a, b = self._load(ha), self._load(hb)
+                counts["compared"] += 1
+                growth = b.total_bytes - a.total_bytes if sized else b.total_dirs - a.total_dirs
+                if growth > 0:
+                    counts["grown"] += 1
+                    entry = (growth, node_path, a.totals(), b.totals())
+                    if len(grown) < limit:
+                        heapq.heappush(grown, entry)
+                    elif entry > grown[0]:
+                        heapq.heapreplace(grown, entry)
+                a_kids, b_kids = a.children(), b.children()
+                for name, child in b_kids.items():
+                    child_path = os.path.join(node_path, name)
+                    if name not in a_kids:
+                        counts["added"] += 1
+                        if len(added) < limit:
+                            added.append({"path": child_path, **self._load(child).totals()})
+                    elif max_depth is None or depth < max_depth:
+                        stack.append((child_path, a_kids[name], child, depth + 1))
+                for name, child in a_kids.items():
+                    if name not in b_kids:
+                        counts["removed"] += 1
+                        if len(removed) < limit:
+                            removed.append({"path": os.path.join(node_path, name), **self._load(child).totals()})
+
+        return {
+            "path": root,
+            "growth_unit": "bytes" if sized else "dirs",
+            "counts": counts,
+            "added": added,
+            "removed": removed,
+            "grown": [{"path": p, "growth": g, "before": before, "after": after}
+                      for g, p, before, after in sorted(grown, key=lambda e: (-e[0], e[1]))],
+        }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
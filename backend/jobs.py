@@ -0,0 +1,157 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from scanner import ScanStatus
+
+logger = logging.getLogger("nuxview.jobs")
+
+# Full scans running at once; further jobs wait in the executor's queue
+MAX_CONCURRENT_SCANS = int(os.environ.get("NUXVIEW_MAX_SCANS", 0)) or 2
+MAX_QUEUED_JOBS = 32 # Queued (not yet running) jobs before submit() refuses new ones
+MAX_FINISHED_JOBS = 100 # Finished jobs kept for /api/jobs
+MAX_PARTIAL_TREES = 4 # Partial trees of stopped jobs kept in memory (newest first)
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+class JobQueueFull(Exception):
+    pass
+
+class ScanJob:
+    """One background scan: its parameters, lifecycle state and private ScanStatus."""
+
+    def __init__(self, key: Tuple, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.params = params
+        self.state = QUEUED
+        self.status = ScanStatus()
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.partial = None # Tree walked before the job was cancelled / ran out of budget
+        self.finished_event = threading.Event()
+
+    @property
+    def active(self) -> bool:
+        return self.state in ACTIVE_STATES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "params": self.params,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "result": self.result,
+            "error": self.error or self.status.error,
+            **self.status.to_dict(),
+            "partial_nodes": len(self.partial) if self.partial is not None else None,
+        }
+
+    def wait(self, timeout: float) -> bool:
+        return self.finished_event.wait(timeout)
+
+class JobManager:
+    """Runs scan jobs on a bounded thread pool.
+
+    submit() de-duplicates on the job key: asking for a scan that is already queued or running
+    returns the existing job instead of walking the same tree twice.
+    """
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_SCANS):
+        self.max_concurrent = max_concurrent
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="nuxview-scan")
+        self._jobs: "OrderedDict[str, ScanJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, key: Tuple, params: Dict[str, Any], fn: Callable[[ScanJob], Any]) -> Tuple[ScanJob, bool]:
+        """Queues fn(job) and returns (job, created); created is False for a de-duplicated request."""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.active and job.key == key:
+                    return job, False
+            if sum(job.state == QUEUED for job in self._jobs.values()) >= MAX_QUEUED_JOBS:
+                raise JobQueueFull(f"{MAX_QUEUED_JOBS} scan jobs already queued")
+            job = ScanJob(key, params)
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, fn)
+        logger.info(f"Queued scan job {job.id}: {params}")
+        return job, True
+
+    def _run(self, job: ScanJob, fn: Callable[[ScanJob], Any]):
+        with self._lock:
+            if job.status.cancelled:
+                return # Cancelled while queued; cancel() already finished it
+            job.state = RUNNING
+            job.started = time.time()
+        try:
+            job.result = fn(job)
+            if job.status.cancelled:
+                job.state = CANCELLED
+            elif job.status.error:
+                job.state = FAILED
+            else:
+                job.state = DONE
+        except Exception as e:
+            logger.error(f"Scan job {job.id} failed: {e}")
+            job.error = str(e)
+            job.state = FAILED
+        finally:
+            job.finished = time.time()
+            job.status.update(is_scanning=False)
+            job.status.metrics.flush() # Phases timed after the walk (save, history)
+            job.finished_event.set()
+            with self._lock:
+                self._prune()
+        logger.info(f"Scan job {job.id} {job.state} after {job.finished - job.started:.2f}s")
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+        partial = [job for job in self._jobs.values() if job.partial is not None]
+        for job in partial[:max(0, len(partial) - MAX_PARTIAL_TREES)]:
+            job.partial = None
+
+    def get(self, job_id: str) -> Optional[ScanJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[ScanJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def latest(self) -> Optional[ScanJob]:
+        """The job /api/scan/status reports on: the newest running one, else the newest of any state."""
+        jobs = self.list()
+        running = [job for job in jobs if job.state == RUNNING]
+        return (running or jobs or [None])[-1]
+
+    def cancel(self, job_id: str) -> Optional[ScanJob]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            if not job.active:
+                return job
+            job.status.cancel()
+            if job.state == QUEUED:
+                job.state = CANCELLED
+                job.finished = time.time()
+                job.finished_event.set()
+        return job
+
+    def shutdown(self):
+        for job in self.list():
+            if job.active:
+                job.status.cancel()
+        self._executor.shutdown(wait=False)
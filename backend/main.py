@@ -1,36 +1,63 @@
 import os
-import json
+import time
 import logging
+import threading
 from pathlib import Path
-from fastapi import FastAPI, HTTPException, Body, BackgroundTasks
-from fastapi.staticfiles import StaticFiles
+import json
+import asyncio
+from fastapi import FastAPI, HTTPException, Body, Header, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Optional
-from scanner import scan_directory_parallel, scan_directory, global_scan_status
+from typing import TYPE_CHECKING, List, Optional
+from scanner import scan_directory_parallel, scan_directory, walk_parallel, walk_with_find, exclude_matcher, ScanLimits, IO_CLASSES
 from models import FileNode
+from snapshot import Snapshot, write_snapshot
+from treestore import TreeStore
+from query import TOP_KEYS, SIZE_KEYS, top_n
+from search import MODES, search as search_index
+from jobs import JobManager, JobQueueFull, ScanJob
+from workpool import PoolBusy, io_pool, scan_pool
+from stream import ORDERS, stream_scan, stream_tree
+import cluster
+import metrics
+from compression import CompressionMiddleware
+from wire import compact, etag, not_modified
+from nodecache import node_cache
+from analytics import normalize_extensions
+from cluster import PushTooLarge, ResyncNeeded, check_token, valid_host
+
+# Only imported by the endpoints using them (watching, details, history, profiling): `import main`
+# and server startup stay limited to the app and its routes
+if TYPE_CHECKING:
+    from cluster import Agent, Collector
+    from history import HistoryStore
+    from watcher import Watcher
 
 # Config
 # Ensure we use the user's home directory for storage
 HOME_DIR = Path(os.path.expanduser("~")) / ".nuxview"
 DATA_DIR = HOME_DIR / "data"
 LOG_DIR = HOME_DIR / "logs"
-TREE_FILE = DATA_DIR / "linux_folder_tree.json"
+TREE_FILE = DATA_DIR / "linux_folder_tree.nxv" # Binary snapshot, see snapshot.py
+PROFILE_DIR = DATA_DIR / "profiles" # Opt-in scan profiles, see profiling.py
 
-# Logging setup
-if not LOG_DIR.exists():
-    try:
-        LOG_DIR.mkdir(parents=True, exist_ok=True)
-    except:
-        pass
-
-logging.basicConfig(
-    filename=LOG_DIR / "nuxview.log" if LOG_DIR.exists() else None,
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger("nuxview")
 
+def configure_logging():
+    """Log file setup, done when the server starts (see startup()) rather than on import."""
+    if not LOG_DIR.exists():
+        try:
+            LOG_DIR.mkdir(parents=True, exist_ok=True)
+        except:
+            pass
+
+    logging.basicConfig(
+        filename=LOG_DIR / "nuxview.log" if LOG_DIR.exists() else None,
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
 app = FastAPI(title="NuxView")
 
 # CORS
@@ -40,137 +67,754 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
+app.add_middleware(CompressionMiddleware) # gzip/zstd by Accept-Encoding (see compression.py)
+app.add_middleware(metrics.LatencyMiddleware) # Per-route latency histograms for /api/metrics (outermost: includes compression)
+
+# Snapshot cache: reopened only when the file on disk is replaced
+_snapshot: Optional[Snapshot] = None
+_snapshot_key = None
+_snapshot_lock = threading.Lock()
+
+def load_snapshot() -> Optional[Snapshot]:
+    """Returns the mmap'ed snapshot of the last full scan, or None if there is none."""
+    global _snapshot, _snapshot_key
+    try:
+        st = TREE_FILE.stat()
+    except OSError:
+        return None
+    key = (st.st_ino, st.st_mtime_ns, st.st_size)
+    with _snapshot_lock:
+        if _snapshot_key != key:
+            # The old mapping is left to the GC: requests may still be reading from it
+            _snapshot = Snapshot(TREE_FILE)
+            _snapshot_key = key
+        return _snapshot
+
+# Live tree kept current by inotify/polling (see watcher.py); None when not watching
+_watcher: Optional["Watcher"] = None
+
+def live_watcher(snap: Optional[Snapshot]) -> Optional["Watcher"]:
+    """The running watcher, if it watches the root of snap; a watcher of another root is not that scan."""
+    watcher = _watcher
+    if watcher is None or snap is None or watcher.store.root_path != snap.root_path:
+        return None
+    return watcher
+
+def current_tree():
+    """The freshest tree we hold: the watcher's live store if it is running, else the snapshot.
+
+    Returns (tree, lock, meta); lock is None for the read-only snapshot.
+    """
+    snap = load_snapshot()
+    if snap is None:
+        return None, None, {}
+    watcher = live_watcher(snap)
+    if watcher is not None:
+        return watcher.store, watcher.lock, snap.meta
+    return snap, None, snap.meta
+
+def tree_version():
+    """Identifies what current_tree() serves: the snapshot file plus the watcher's delta version."""
+    watcher = live_watcher(load_snapshot())
+    return _snapshot_key, watcher.version if watcher is not None else None
+
+def conditional(tag: str, content: dict) -> JSONResponse:
+    """A tree response carrying its ETag; clients revalidate with If-None-Match instead of refetching."""
+    return JSONResponse(content, headers={"ETag": tag, "Cache-Control": "no-cache"})
+
+def unchanged(tag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": tag, "Cache-Control": "no-cache"})
 
 class ScanRequest(BaseModel):
     path: str
     max_depth: Optional[int] = 3 # Lower default for speed
     excludes: Optional[List[str]] = []
+    workers: Optional[int] = None # Parallel walker threads (defaults to scanner.DEFAULT_WORKERS)
+    source: Optional[str] = "live" # /api/scan/node: "live", "cache" (last full scan) or "auto"
+    incremental: bool = False # /api/scan/full: only re-list directories changed since the last snapshot
+    sizes: bool = False # Also count files and bytes per directory (du-style, rolled up the tree)
+    engine: str = "parallel" # /api/scan/full: "parallel" (os.scandir threads) or "find"
+    # Throttling (see scanner.ScanLimits)
+    nice: Optional[int] = None # 1-19: lower CPU priority of the scan threads / find
+    io_class: Optional[str] = None # "idle", "best-effort" or "realtime" (ionice class)
+    io_level: Optional[int] = None # 0-7 within best-effort/realtime
+    max_rate: Optional[float] = None # Directories listed per second
+    time_budget: Optional[float] = None # Seconds; the walk stops and keeps what it has
+    one_filesystem: bool = False # Do not descend into other mounted filesystems (like find -xdev)
+    stream: bool = False # /api/scan: NDJSON lines as directories are listed instead of one document (see stream.py)
+    profile: Optional[str] = None # /api/scan/full: "cprofile" or "sample" to profile this scan (see profiling.py)
+    compact: bool = False # Tree responses without per-node paths and default fields (see wire.py)
+    analytics: bool = False # /api/scan/full: file histograms by extension, size and age per subtree (see analytics.py); implies sizes
+    extensions: Optional[List[str]] = None # With analytics: extensions that always get a slot ("log", "tar.gz")
 
-@app.post("/api/scan/full")
-def scan_full(req: ScanRequest, background_tasks: BackgroundTasks):
-    """Starts a full parallel scan in the background."""
-    if global_scan_status.is_scanning:
-        return {"status": "already_scanning", "progress": global_scan_status.progress}
+def scan_limits(req: ScanRequest) -> ScanLimits:
+    if req.io_class is not None and req.io_class not in IO_CLASSES:
+        raise HTTPException(status_code=400, detail=f"io_class must be one of {', '.join(IO_CLASSES)}")
+    if req.nice is not None and not 0 <= req.nice <= 19:
+        raise HTTPException(status_code=400, detail="nice must be between 0 and 19")
+    if req.engine not in ("parallel", "find"):
+        raise HTTPException(status_code=400, detail="engine must be parallel or find")
+    return ScanLimits(req.nice, req.io_class, req.io_level, req.max_rate, req.time_budget)
 
-    if not os.path.exists(req.path):
-        raise HTTPException(status_code=404, detail=f"Path not found: {req.path}")
+def check_excludes(req: ScanRequest):
+    """Rejects exclude rules that do not compile (see excludes.py) before a scan is started."""
+    try:
+        exclude_matcher(req.excludes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    def background_scan():
-        logger.info(f"Starting background full scan for {req.path}")
-        tree = scan_directory_parallel(req.path, req.max_depth or 50, req.excludes)
-        if tree:
-            import time
-            timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-            save_data = {
-                "timestamp": timestamp,
-                "path": req.path,
-                "tree": tree.model_dump()
-            }
-            try:
-                if not DATA_DIR.exists():
-                    DATA_DIR.mkdir(parents=True, exist_ok=True)
-                with open(TREE_FILE, "w") as f:
-                    json.dump(save_data, f, indent=2)
-                logger.info("Background scan completed and saved.")
-            except Exception as e:
-                logger.error(f"Failed to save background scan: {e}")
+def cached_subtree(path: str, depth: int):
+    """Looks a path up in the last full scan: (node dict, stale flag, snapshot) or None.
 
-    background_tasks.add_task(background_scan)
-    return {"status": "started"}
+    A node is stale when its directory changed after the snapshot was taken (or is gone);
+    only the node's own listing is checked, which costs one stat.
+    """
+    tree, lock, meta = current_tree()
+    if tree is None:
+        return None
+    if lock is not None:
+        # Watched tree: changes are applied as they happen, so it is never stale
+        with lock:
+            idx = tree.find(path)
+            return (tree.to_dict(idx, depth), False, meta) if idx >= 0 else None
+    idx = tree.find(path)
+    if idx < 0:
+        return None
+    try:
+        stale = os.stat(path).st_mtime > meta.get("created", 0)
+    except OSError:
+        stale = True
+    return tree.to_dict(idx, depth), stale, meta
 
-@app.get("/api/scan/status")
-def get_scan_status():
-    """Returns the current background scan progress."""
-    return {
-        "is_scanning": global_scan_status.is_scanning,
-        "progress": global_scan_status.progress,
-        "scanned": global_scan_status.scanned_dirs,
-        "total": global_scan_status.total_dirs,
-        "error": global_scan_status.error
+# Retained, content-addressed scans for diffs over time (see history.py); created on first use
+_history: Optional["HistoryStore"] = None
+_history_lock = threading.Lock()
+
+def history_store() -> "HistoryStore":
+    global _history
+    with _history_lock:
+        if _history is None:
+            from history import HistoryStore
+            _history = HistoryStore(DATA_DIR / "history.db")
+        return _history
+
+# Background full scans (see jobs.py); /api/scan/status reports on the latest of them
+jobs = JobManager()
+_write_lock = threading.Lock() # Concurrent jobs finish in turn: the last one saved is the current scan
+
+# Multi-host mode (see cluster.py): agents push their scans and deltas, a collector merges them
+# (set up by startup(), like the rest of the server-only state)
+agent: Optional["Agent"] = None
+collector: Optional["Collector"] = None
+_agent_task: Optional[asyncio.Task] = None
+
+def start_cluster():
+    global agent, collector
+    if cluster.MODE == "agent":
+        if cluster.COLLECTOR_URL:
+            agent = cluster.Agent(cluster.COLLECTOR_URL, cluster.HOST_NAME, cluster.TOKEN)
+        else:
+            logger.error("NUXVIEW_MODE=agent needs NUXVIEW_COLLECTOR_URL; not pushing anywhere")
+    elif cluster.MODE == "collector":
+        collector = cluster.Collector(DATA_DIR / "hosts")
+
+@app.on_event("startup")
+async def startup():
+    """Server-only setup, kept out of `import main`: logging, cluster mode, the frontend mount.
+
+    The pools, the job manager and the snapshot cache start no threads and open no files until
+    their first use. Scans without the server go through cli.py.
+    """
+    global _agent_task
+    configure_logging()
+    start_cluster()
+    mount_frontend()
+    if agent is not None:
+        _agent_task = asyncio.create_task(agent_loop())
+
+@app.on_event("shutdown")
+def stop_jobs():
+    if _agent_task is not None:
+        _agent_task.cancel()
+    jobs.shutdown()
+    if _history is not None:
+        _history.close()
+    scan_pool.shutdown()
+    io_pool.shutdown()
+
+@app.exception_handler(PoolBusy)
+async def pool_busy(request, exc: PoolBusy):
+    return JSONResponse(status_code=429, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+def run_full_scan(job: ScanJob, req: ScanRequest, limits: ScanLimits):
+    if not req.profile:
+        return _full_scan(job, req, limits)
+    from profiling import PROFILE_MODES, ScanProfile
+    profile = job.status.profile = ScanProfile(req.profile, PROFILE_DIR / f"{job.id}{PROFILE_MODES[req.profile]}")
+    with profile:
+        return profile.wrap(_full_scan)(job, req, limits)
+
+def _full_scan(job: ScanJob, req: ScanRequest, limits: ScanLimits):
+    logger.info(f"Starting background full scan {job.id} for {req.path}")
+    max_depth = req.max_depth or 50
+    excludes = req.excludes or []
+    previous = None
+    if req.incremental:
+        try:
+            previous = load_snapshot()
+        except Exception as e:
+            logger.error(f"Previous snapshot unusable, doing a full rescan: {e}")
+        # Listings can only be reused if they were produced with the same parameters
+        if previous is not None and (previous.meta.get("path") != req.path
+                                     or previous.meta.get("max_depth") != max_depth
+                                     or previous.meta.get("excludes") != excludes
+                                     or previous.meta.get("one_filesystem", False) != req.one_filesystem):
+            previous = None
+    started = time.time()
+    analytics = normalize_extensions(req.extensions) if req.analytics else None
+    # Keep the columnar store: serializing it skips building millions of FileNode objects
+    if req.engine == "find":
+        store = walk_with_find(req.path, max_depth, excludes, req.sizes, job.status, limits, req.one_filesystem, analytics)
+    else:
+        store = walk_parallel(req.path, max_depth, excludes, req.workers, previous, req.sizes, job.status, limits,
+                              one_filesystem=req.one_filesystem, analytics=analytics)
+    if not store:
+        return None
+    if job.status.cancelled:
+        # Stopped early: keep the partial tree for /api/jobs/{id}/cancel but leave the last complete scan in place
+        job.partial = store
+        return None
+    meta = {
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "created": started,
+        "path": req.path,
+        "max_depth": max_depth,
+        "excludes": excludes,
+        "sizes": req.sizes or req.analytics,
+        "analytics": req.analytics,
+        "one_filesystem": req.one_filesystem,
+        "job_id": job.id,
     }
+    if meta["sizes"]:
+        # Subdirectories below max_depth were not entered: the root's totals are a lower bound
+        meta["truncated"] = store.size_fields(0).get("truncated", False)
+    try:
+        with _write_lock, job.status.metrics.phase("save"):
+            if not DATA_DIR.exists():
+                DATA_DIR.mkdir(parents=True, exist_ok=True)
+            write_snapshot(store, TREE_FILE, meta)
+        logger.info(f"Background scan {job.id} completed and saved.")
+        restart_watcher(req.path)
+    except Exception as e:
+        logger.error(f"Failed to save background scan: {e}")
+        job.status.update(error=f"Failed to save scan: {e}")
+        return None
+    history_id = None
+    try:
+        with job.status.metrics.phase("history"):
+            history_id = history_store().record(store, meta)
+    except Exception as e:
+        logger.error(f"Failed to add scan {job.id} to history: {e}")
+    # Whether listings were actually reused: sizes scans and changed parameters rescan everything
+    return {"nodes": len(store), "timestamp": meta["timestamp"], "history_id": history_id, "incremental": job.status.incremental}
+
+@app.post("/api/scan/full")
+async def scan_full(req: ScanRequest):
+    """Queues a full parallel scan; a scan with the same parameters already queued or running is reused."""
+    if not await io_pool.run(os.path.exists, req.path):
+        raise HTTPException(status_code=404, detail=f"Path not found: {req.path}")
+
+    limits = scan_limits(req)
+    check_excludes(req)
+    if req.incremental and req.engine == "find":
+        raise HTTPException(status_code=400, detail="incremental scans need engine=parallel (find lists every directory)")
+    from profiling import PROFILE_MODES
+    if req.profile is not None and req.profile not in PROFILE_MODES:
+        raise HTTPException(status_code=400, detail=f"profile must be one of {', '.join(PROFILE_MODES)}")
+    try:
+        extensions = normalize_extensions(req.extensions)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    key = (os.path.abspath(req.path), req.max_depth or 50, tuple(req.excludes or []), req.sizes, req.one_filesystem, req.profile,
+           req.analytics, tuple(extensions))
+    try:
+        job, created = jobs.submit(key, req.model_dump(), lambda job: run_full_scan(job, req, limits))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    if not created:
+        return {"status": "already_scanning", "job_id": job.id, "state": job.state, "progress": job.status.progress}
+    return {"status": "started", "job_id": job.id, "state": job.state}
+
+@app.get("/api/scan/status")
+async def get_scan_status(job_id: Optional[str] = None):
+    """Progress of one scan job (default: the latest); same shape as before the job registry."""
+    job = jobs.get(job_id) if job_id else jobs.latest()
+    if job is None:
+        if job_id:
+            raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+        return {"is_scanning": False, "progress": 0, "scanned": 0, "total": 0, "error": None}
+    status = job.status.to_dict()
+    status.update({"is_scanning": job.active, "error": job.error or status["error"], "job_id": job.id, "state": job.state})
+    return status
+
+@app.get("/api/jobs")
+async def list_jobs():
+    return {"max_concurrent": jobs.max_concurrent, "jobs": [job.to_dict() for job in reversed(jobs.list())]}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job.to_dict()
+
+@app.get("/api/jobs/{job_id}/profile")
+async def get_job_profile(job_id: str):
+    """The profile of a job started with "profile" (pstats file or collapsed stacks), once it finished."""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    profile = job.status.profile
+    if profile is None or not profile.saved:
+        raise HTTPException(status_code=404, detail="No profile for this job (not requested, or the scan is still running)")
+    return FileResponse(profile.path, filename=os.path.basename(profile.path))
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str, wait: float = 5.0, depth: int = 1):
+    """Stops a queued or running scan and returns the tree walked so far (`depth` levels of it).
+
+    Waits up to `wait` seconds for the walk to wind down; the last saved snapshot is left untouched.
+    """
+    job = jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    deadline = time.monotonic() + max(0.0, min(wait, 30.0))
+    while not job.finished_event.is_set() and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    result = job.to_dict()
+    partial = job.partial
+    result["tree"] = await io_pool.run(partial.to_dict, 0, max(0, depth)) if partial is not None else None
+    return result
 
 @app.post("/api/scan")
-def scan(req: ScanRequest):
+async def scan(req: ScanRequest):
     # Keep legacy for shallow scans if needed, but point to parallel
-    tree = scan_directory_parallel(req.path, req.max_depth or 3, req.excludes)
-    return {"status": "success", "tree": tree}
+    limits = scan_limits(req)
+    check_excludes(req)
+    if req.stream:
+        if not await io_pool.run(os.path.isdir, req.path):
+            raise HTTPException(status_code=404, detail=f"Path not found: {req.path}")
+        return await stream_scan(req.path, req.max_depth or 3, req.excludes or [], req.workers, req.sizes, limits, req.one_filesystem)
+    def live_scan():
+        tree = scan_directory_parallel(req.path, req.max_depth or 3, req.excludes, req.workers, req.sizes, limits, req.one_filesystem)
+        return {"status": "success", "tree": compact(tree) if req.compact and tree else tree}
+    return await scan_pool.respond(live_scan)
+
+async def live_node(path: str, depth: int = 1, excludes: Optional[List[str]] = None):
+    """Live shallow scan of path as a node dict, served through the node cache (see nodecache.py)."""
+    key = node_cache.key(path, depth, excludes)
+    def scan():
+        tree = scan_directory(path, depth, excludes)
+        return tree.model_dump() if tree is not None else None
+    return await node_cache.get(key, lambda: io_pool.run(node_cache.lookup, key),
+                                lambda: scan_pool.run(node_cache.load, key, scan))
 
 @app.post("/api/scan/node")
-def scan_node(req: ScanRequest):
+async def scan_node(req: ScanRequest):
     """Scan only one level deep for lazy loading."""
-    if not os.path.exists(req.path):
+    if not await io_pool.run(os.path.exists, req.path):
         raise HTTPException(status_code=404, detail=f"Path not found: {req.path}")
     
+    if req.source in ("cache", "auto"):
+        cached = await io_pool.run(cached_subtree, os.path.abspath(req.path), 1)
+        if cached is not None:
+            node, stale, meta = cached
+            if req.source == "cache" or not stale:
+                return {"status": "success", "node": compact(node) if req.compact else node, "source": "cache", "stale": stale,
+                        "timestamp": meta.get("timestamp")}
+        elif req.source == "cache":
+            raise HTTPException(status_code=404, detail=f"Path not in cached scan: {req.path}")
+
     logger.info(f"Node-scan for {req.path}")
     try:
         # Depth 1 only
-        tree = scan_directory(req.path, 1, req.excludes)
+        tree = await live_node(req.path, 1, req.excludes)
+    except PoolBusy:
+        raise
     except Exception as e:
         logger.error(f"Node-scan failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
     
-    return {"status": "success", "node": tree}
+    return {"status": "success", "node": compact(tree) if req.compact and tree else tree}
+
+@app.post("/api/tree/node")
+@io_pool.offload
+def get_tree_node(req: ScanRequest, if_none_match: Optional[str] = Header(None)):
+    """Serves any subtree of the last full scan from memory, `max_depth` levels deep.
+
+    The ETag covers the tree version, the request and the directory's mtime (which decides `stale`).
+    """
+    path = os.path.abspath(req.path)
+    depth = max(0, req.max_depth or 1)
+    try:
+        dir_mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        dir_mtime = None
+    tag = etag("node", tree_version(), path, depth, req.compact, dir_mtime)
+    if not_modified(tag, if_none_match):
+        return unchanged(tag)
+    cached = cached_subtree(path, depth)
+    if cached is None:
+        raise HTTPException(status_code=404, detail=f"Path not in cached scan: {req.path}")
+    node, stale, meta = cached
+    return conditional(tag, {"status": "success", "node": compact(node) if req.compact else node, "stale": stale,
+                             "timestamp": meta.get("timestamp")})
+
+@app.get("/api/tree/stream")
+async def stream_cached_tree(path: Optional[str] = None, max_depth: Optional[int] = None, order: str = "dfs",
+                             if_none_match: Optional[str] = Header(None)):
+    """The last full scan (or the subtree at path) as NDJSON, one directory per line, parents first.
+
+    order=dfs sends each directory followed by its subtree, bfs sends it level by level; max_depth
+    limits the levels below path (default: all of them).
+    """
+    if order not in ORDERS:
+        raise HTTPException(status_code=400, detail=f"order must be one of {', '.join(ORDERS)}")
+    tag = etag("stream", await io_pool.run(tree_version), path and os.path.abspath(path), max_depth, order)
+    if not_modified(tag, if_none_match):
+        return unchanged(tag)
+    tree, lock, meta = await io_pool.run(current_tree)
+    if tree is None:
+        raise HTTPException(status_code=404, detail="No full scan yet; run /api/scan/full first")
+    idx = 0
+    if path:
+        def locate():
+            if lock is None:
+                return tree.find(path)
+            with lock:
+                return tree.find(path)
+        idx = await io_pool.run(locate)
+    if idx < 0:
+        raise HTTPException(status_code=404, detail=f"Path not in cached scan: {path}")
+    start = {"timestamp": meta.get("timestamp")}
+    watcher = live_watcher(load_snapshot())
+    if lock is not None and watcher is not None:
+        start["version"] = watcher.version # Deltas after this version apply on top of the stream
+    response = await stream_tree(tree, idx, None if max_depth is None else max(0, max_depth), order, lock, start)
+    response.headers["ETag"] = tag
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+def restart_watcher(path: str):
+    """Points a running watcher at a freshly saved scan, whatever its root: the watched tree must be the current scan."""
+    global _watcher
+    old = _watcher
+    if old is None:
+        return
+    from watcher import Watcher
+    snap = load_snapshot()
+    watcher = Watcher(TreeStore.from_view(snap), snap.meta.get("max_depth", 50), snap.meta.get("excludes"))
+    watcher.start()
+    _watcher = watcher
+    old.stop() # Subscribers of the old watcher are disconnected and reconnect to the new one
+
+@app.get("/api/query/top")
+@io_pool.offload
+def query_top(path: Optional[str] = None, by: str = "size", n: int = 50):
+    """Top-n directories under path (default: scan root) by size, allocated, files or age."""
+    if by not in TOP_KEYS:
+        raise HTTPException(status_code=400, detail=f"by must be one of {', '.join(TOP_KEYS)}")
+    snap = load_snapshot()
+    if snap is None:
+        raise HTTPException(status_code=404, detail="No full scan yet; run /api/scan/full first")
+    if by in SIZE_KEYS and "total_bytes" not in snap.columns:
+        raise HTTPException(status_code=400, detail="Last full scan did not gather sizes; rescan with sizes=true")
+    idx = snap.find(path) if path else 0
+    if idx < 0:
+        raise HTTPException(status_code=404, detail=f"Path not in cached scan: {path}")
+
+    started = time.perf_counter()
+    hits = top_n(snap, idx, by, max(1, min(n, 1000)))
+    mtime = snap.columns["mtime"]
+    results = [
+        {"path": snap.path(i), "name": snap.name(i), "modified": mtime[i] / 1e9 if mtime[i] > 0 else None, **snap.size_fields(i)}
+        for i in hits
+    ]
+    return {
+        "status": "success",
+        "by": by,
+        "path": snap.path(idx),
+        "timestamp": snap.meta.get("timestamp"),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        "results": results,
+    }
+
+@app.get("/api/query/analytics")
+@io_pool.offload
+def query_analytics(path: Optional[str] = None, children: bool = False, by: str = "files", n: int = 50):
+    """Files below path (default: scan root) by extension, size and age, from the last full scan.
+
+    With children=true the same histograms follow for the n largest children (by files or bytes),
+    to find which subtree holds the many small files or the old archives.
+    """
+    if by not in ("files", "bytes"):
+        raise HTTPException(status_code=400, detail="by must be files or bytes")
+    snap = load_snapshot()
+    if snap is None:
+        raise HTTPException(status_code=404, detail="No full scan yet; run /api/scan/full first")
+    hist = snap.histograms
+    if hist is None:
+        raise HTTPException(status_code=400, detail="Last full scan did not gather analytics; rescan with analytics=true")
+    idx = snap.find(path) if path else 0
+    if idx < 0:
+        raise HTTPException(status_code=404, detail=f"Path not in cached scan: {path}")
+
+    result = {
+        "status": "success",
+        "path": snap.path(idx),
+        "timestamp": snap.meta.get("timestamp"),
+        "tracked_extensions": hist.extensions,
+        **snap.histogram(idx),
+    }
+    if children:
+        key = hist.files if by == "files" else snap.columns["total_bytes"].__getitem__
+        kids = sorted(snap.children(idx), key=key, reverse=True)[:max(1, min(n, 1000))]
+        result["children"] = [{"name": snap.name(c), "path": snap.path(c), **snap.histogram(c)} for c in kids]
+    return result
+
+@app.get("/api/history")
+@io_pool.offload
+def list_history(path: Optional[str] = None):
+    """Retained full scans, newest first (of one scan root if path is given)."""
+    history = history_store()
+    return {"status": "success", "keep": history.keep, "snapshots": history.list(os.path.abspath(path) if path else None)}
+
+@app.get("/api/history/diff")
+@io_pool.offload
+def diff_history(to_id: Optional[int] = None, from_id: Optional[int] = None, since_days: Optional[float] = None,
+                 root: Optional[str] = None, path: Optional[str] = None, limit: int = 100, max_depth: Optional[int] = None):
+    """Directories added, removed and grown between two retained scans of the same root.
+
+    `to_id` defaults to the latest scan of `root` (default: the current snapshot's root); the
+    baseline is `from_id`, else the newest scan at least `since_days` older, else the one before.
+    """
+    history = history_store()
+    if to_id is not None:
+        new = history.get(to_id)
+    else:
+        if root is None:
+            snap = load_snapshot()
+            root = snap.meta.get("path") if snap else None
+        listed = history.list(os.path.abspath(root)) if root else []
+        new = history.get(listed[0]["id"]) if listed else None
+    if new is None:
+        raise HTTPException(status_code=404, detail="No scan in history; run /api/scan/full first")
+
+    if from_id is not None:
+        old = history.get(from_id)
+    elif since_days is not None:
+        old = history.before(new["root_path"], new["created"] - since_days * 86400)
+    else:
+        older = [s for s in history.list(new["root_path"]) if s["id"] != new["id"] and s["created"] <= new["created"]]
+        old = history.get(older[0]["id"]) if older else None
+    if old is None:
+        raise HTTPException(status_code=404, detail="No earlier scan of this root to compare with")
+    if old["root_path"] != new["root_path"]:
+        raise HTTPException(status_code=400, detail="Snapshots are of different roots")
+
+    started = time.perf_counter()
+    try:
+        result = history.diff(old, new, path, max(1, min(limit, 1000)), max_depth)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Path not in both scans: {path}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "status": "success",
+        "from": {k: old[k] for k in ("id", "timestamp", "created")},
+        "to": {k: new[k] for k in ("id", "timestamp", "created")},
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        **result,
+    }
+
+@app.get("/api/search")
+@io_pool.offload
+def search_directories(q: str, mode: str = "auto", path: Optional[str] = None, offset: int = 0, limit: int = 100,
+                       case_sensitive: bool = False):
+    """Directories whose name (or, if q contains "/", full path) matches q, paged, from the last full scan."""
+    if mode == "auto":
+        mode = "glob" if any(c in q for c in "*?[") else "substring"
+    if mode not in MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be auto or one of {', '.join(MODES)}")
+    if not q:
+        raise HTTPException(status_code=400, detail="Empty query")
+    snap = load_snapshot()
+    if snap is None:
+        raise HTTPException(status_code=404, detail="No full scan yet; run /api/scan/full first")
+    idx = snap.find(path) if path else 0
+    if idx < 0:
+        raise HTTPException(status_code=404, detail=f"Path not in cached scan: {path}")
+
+    started = time.perf_counter()
+    hits, total = search_index(snap, q, mode, idx, max(0, offset), max(1, min(limit, 1000)), case_sensitive)
+    return {
+        "status": "success",
+        "mode": mode,
+        "path": snap.path(idx),
+        "timestamp": snap.meta.get("timestamp"),
+        "total": total,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        "results": [{"path": snap.path(i), "name": snap.name(i), **snap.size_fields(i)} for i in hits],
+    }
+
+def carried_meta(snap: Optional[Snapshot]) -> dict:
+    """A snapshot's scan parameters, without the layout keys write_snapshot regenerates.
+
+    "analytics" goes too: watched and pushed trees carry no histograms (the watcher does not
+    update them), so the rewritten snapshot must not announce hist_* sections it lacks.
+    """
+    meta = dict(snap.meta) if snap else {}
+    for key in ("sections", "columns", "nodes", "names", "root_path", "byteorder", "mounts", "analytics"):
+        meta.pop(key, None)
+    return meta
+
+@app.post("/api/watch/start")
+@scan_pool.offload
+def watch_start():
+    """Loads the last full scan into memory and keeps it current with filesystem events."""
+    global _watcher
+    if _watcher is not None:
+        return {"status": "already_watching", **_watcher.status()}
+    snap = load_snapshot()
+    if snap is None:
+        raise HTTPException(status_code=404, detail="No full scan to watch; run /api/scan/full first")
+    from watcher import Watcher
+    watcher = Watcher(TreeStore.from_view(snap), snap.meta.get("max_depth", 50), snap.meta.get("excludes"))
+    watcher.start()
+    _watcher = watcher
+    return {"status": "started", **watcher.status()}
+
+@app.post("/api/watch/stop")
+@scan_pool.offload
+def watch_stop():
+    """Stops watching and persists the live tree so the snapshot includes the applied changes."""
+    global _watcher
+    watcher, _watcher = _watcher, None
+    if watcher is None:
+        return {"status": "not_watching"}
+    watcher.stop()
+    if watcher.version:
+        with _write_lock:
+            snap = load_snapshot()
+            if live_watcher(snap) is not watcher:
+                # The snapshot was replaced by a scan of another root: never overwrite it with this tree
+                logger.warning(f"Not persisting watched tree of {watcher.store.root_path}: the current scan is of another root")
+                return {"status": "stopped", "persisted": False}
+            try:
+                with watcher.lock:
+                    write_snapshot(watcher.store, TREE_FILE, carried_meta(snap))
+            except Exception as e:
+                logger.error(f"Failed to persist watched tree: {e}")
+                return {"status": "stopped", "persisted": False}
+            return {"status": "stopped", "persisted": True}
+    return {"status": "stopped"}
+
+@app.get("/api/watch/status")
+async def watch_status():
+    if _watcher is None:
+        return {"status": "not_watching"}
+    return {"status": "watching", **_watcher.status()}
+
+@app.get("/api/watch/events")
+async def watch_events():
+    """Server-Sent Events stream of batched tree deltas ({version, resync, deltas: [...]})."""
+    watcher = _watcher
+    if watcher is None:
+        raise HTTPException(status_code=404, detail="Not watching; POST /api/watch/start first")
+
+    async def stream():
+        queue = watcher.subscribe()
+        try:
+            yield f"event: hello\ndata: {json.dumps(watcher.status())}\n\n"
+            while True:
+                try:
+                    batch = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if batch is None:
+                    break # Watcher stopped
+                yield f"event: delta\ndata: {json.dumps(batch)}\n\n"
+        finally:
+            watcher.unsubscribe(queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 @app.post("/api/node/details")
+@io_pool.offload
 def get_node_details(req: ScanRequest):
     """Refetches metadata for a specific path."""
-    if not os.path.exists(req.path):
-        raise HTTPException(status_code=404, detail=f"Path not found: {req.path}")
-
+    from details import node_details
     try:
-        stat_info = os.stat(req.path)
-        
-        # Cross-platform owner/group
-        owner = str(stat_info.st_uid)
-        group = str(stat_info.st_gid)
-        try:
-            import pwd, grp
-            owner = pwd.getpwuid(stat_info.st_uid).pw_name
-            group = grp.getgrgid(stat_info.st_gid).gr_name
-        except ImportError:
-            pass # Windows or non-posix
-
-        import datetime
-        details = {
-            "name": os.path.basename(req.path),
-            "path": req.path,
-            "size": stat_info.st_size,
-            "permissions": oct(stat_info.st_mode)[-3:], # Last 3 digits for standard unix perm
-            "owner": owner,
-            "group": group,
-            "modified": datetime.datetime.fromtimestamp(stat_info.st_mtime).strftime("%Y-%m-%d %H:%M:%S"),
-            "accessed": datetime.datetime.fromtimestamp(stat_info.st_atime).strftime("%Y-%m-%d %H:%M:%S"),
-            "created": datetime.datetime.fromtimestamp(stat_info.st_ctime).strftime("%Y-%m-%d %H:%M:%S"),
-            "is_dir": os.path.isdir(req.path)
-        }
-        return {"status": "success", "details": details}
+        return {"status": "success", "details": node_details(req.path)}
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Path not found: {req.path}")
+    except ValueError as e: # Embedded null byte
+        raise HTTPException(status_code=400, detail=f"Invalid path: {e}")
     except Exception as e:
         logger.error(f"Details fetch failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/tree")
-def get_tree():
-    """Returns the cached tree root, or falls back to a live root scan."""
-    # 1. Try Cache File
+class DetailsBatchRequest(BaseModel):
+    paths: List[str]
+
+@app.post("/api/node/details/batch")
+async def get_node_details_batch(req: DetailsBatchRequest):
+    """lstat metadata for many paths in one round trip, as rows of `fields` in request order.
+
+    Rows of paths that could not be stat'ed are null, with the reason in errors (keyed by row).
+    """
+    from details import BATCH_FIELDS, BATCH_PARALLEL, MAX_BATCH, MIN_SLICE, details_rows
+    if len(req.paths) > MAX_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH} paths per batch")
+    size = max(MIN_SLICE, -(-len(req.paths) // BATCH_PARALLEL))
+    slices = [req.paths[i:i + size] for i in range(0, len(req.paths), size)]
+    parts = await asyncio.gather(*(io_pool.run(details_rows, part) for part in slices))
+    rows, errors = [], {}
+    for offset, part in zip(range(0, len(req.paths), size), parts):
+        rows += part["rows"]
+        errors.update({str(offset + pos): msg for pos, msg in part["errors"].items()})
+    return {"status": "success", "fields": BATCH_FIELDS, "rows": rows, "errors": errors}
+
+def cached_root(compact_nodes: bool, if_none_match: Optional[str]) -> Optional[Response]:
+    """The root of the last full scan as a response (or a 304), None if there is no usable snapshot."""
     if TREE_FILE.exists():
         try:
-            with open(TREE_FILE, "r") as f:
-                data = json.load(f)
-            
-            return {
-                "status": "success",
-                "timestamp": data.get("timestamp"),
-                "path": data.get("path"),
-                "root": {
-                    "name": root_data.get("name"),
-                    "path": root_data.get("path"),
-                    "type": "directory",
-                    "children": [] # Root only, no children
-                }
-            }
+            tag = etag("tree", tree_version(), compact_nodes)
+            if not_modified(tag, if_none_match):
+                return unchanged(tag)
+            tree, lock, meta = current_tree()
+            if tree is not None:
+                root = tree.to_dict(0, depth=0) # Root only, no children
+                return conditional(tag, {
+                    "status": "success",
+                    "timestamp": meta.get("timestamp"),
+                    "path": meta.get("path"),
+                    "root": compact(root) if compact_nodes else root,
+                })
         except Exception as e:
             logger.error(f"Cache broken: {e}. Falling back to live...")
+    return None
+
+@app.get("/api/tree")
+async def get_tree(compact_nodes: bool = Query(False, alias="compact"), if_none_match: Optional[str] = Header(None)):
+    """Returns the cached tree root, or falls back to a live root scan."""
+    # 1. Try Cache File
+    cached = await io_pool.run(cached_root, compact_nodes, if_none_match)
+    if cached is not None:
+        return cached
 
     # 2. Live Fallback (No cache or cache broken)
     try:
@@ -178,29 +822,218 @@ def get_tree():
         if os.name == 'nt': root_path = "C:\\" # Windows support
         
         logger.info(f"Performing LIVE fallback scan for {root_path}")
-        live_root = scan_directory(root_path, 1)
+        live_root = await live_node(root_path, 1)
         if live_root:
             return {
                 "status": "success",
                 "timestamp": "Live (No Cache)",
                 "path": root_path,
-                "root": live_root.model_dump()
+                "root": compact(live_root) if compact_nodes else live_root
             }
+    except PoolBusy:
+        raise
     except Exception as e:
         logger.error(f"Live fallback failed: {e}")
 
     return {"status": "error", "detail": "Could not load tree (Cache missing & Live fail)"}
 
+# Multi-host: agent side
+
+async def agent_loop():
+    """Agent mode: rescans AGENT_PATH periodically and mirrors the result on the collector.
+
+    While a watcher runs, its tree is pushed once (anchored at the watcher's version) and then
+    only its delta batches follow; a gap or resync on either side re-sends the whole tree.
+    Without a watcher every newly saved snapshot file is pushed as is.
+    """
+    tmp = DATA_DIR / f".push-{cluster.HOST_NAME}.nxv"
+    watcher: Optional["Watcher"] = None
+    queue: Optional[asyncio.Queue] = None
+    anchor = 0 # Watcher version contained in the last pushed tree
+    need_tree = False
+    pushed_key = None
+    next_scan = time.monotonic()
+    while True:
+        try:
+            if cluster.AGENT_INTERVAL > 0 and time.monotonic() >= next_scan:
+                next_scan = time.monotonic() + cluster.AGENT_INTERVAL
+                req = ScanRequest(path=cluster.AGENT_PATH, max_depth=50, sizes=cluster.AGENT_SIZES, incremental=True)
+                try:
+                    await scan_full(req)
+                except HTTPException as e:
+                    logger.error(f"Agent: scheduled scan of {req.path} not started: {e.detail}")
+
+            if _watcher is not watcher:
+                if queue is not None:
+                    watcher.unsubscribe(queue)
+                watcher, queue = _watcher, None
+                if watcher is not None:
+                    queue = watcher.subscribe() # Before the tree is copied, so no batch falls in between
+                    need_tree = True
+
+            if watcher is None:
+                snap = load_snapshot()
+                if snap is None or _snapshot_key == pushed_key:
+                    await asyncio.sleep(1)
+                elif cluster.AGENT_WATCH:
+                    await watch_start()
+                else:
+                    key = _snapshot_key
+                    await asyncio.to_thread(agent.push_snapshot, TREE_FILE)
+                    pushed_key = key
+                continue
+
+            if need_tree:
+                snap = load_snapshot()
+                if live_watcher(snap) is not watcher:
+                    # A scan of another root was just saved; restart_watcher swaps the watcher shortly
+                    await asyncio.sleep(1)
+                    continue
+                with watcher.lock:
+                    anchor = watcher.version
+                meta = {**carried_meta(snap), "version": anchor, "host": cluster.HOST_NAME}
+                await asyncio.to_thread(agent.push_tree, watcher.store, watcher.lock, meta, tmp)
+                need_tree = False
+                pushed_key = _snapshot_key
+                continue
+
+            try:
+                batch = await asyncio.wait_for(queue.get(), timeout=1)
+            except asyncio.TimeoutError:
+                continue
+            if batch is None:
+                continue # Watcher stopped; the next pass notices
+            if batch["resync"]:
+                need_tree = True
+            elif batch["version"] > anchor:
+                try:
+                    await asyncio.to_thread(agent.push_deltas, batch)
+                except ResyncNeeded:
+                    need_tree = True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Collector unreachable or scan problems: keep the loop alive and try again
+            logger.error(f"Agent: {e}")
+            await asyncio.sleep(5)
+
+# Multi-host: collector side
+
+def require_collector() -> "Collector":
+    if collector is None:
+        raise HTTPException(status_code=404, detail="Not a collector; start with NUXVIEW_MODE=collector")
+    return collector
+
+def check_push(host: str, token: Optional[str], request: Request) -> "Collector":
+    target = require_collector()
+    if not check_token(token, request.client.host if request.client else None):
+        detail = "Bad or missing cluster token" if cluster.TOKEN else "Pushes from other hosts need NUXVIEW_CLUSTER_TOKEN on the collector"
+        raise HTTPException(status_code=403, detail=detail)
+    if not valid_host(host):
+        raise HTTPException(status_code=400, detail=f"Invalid host name: {host}")
+    return target
+
+@app.post("/api/collector/hosts/{host}/snapshot")
+async def collector_snapshot(host: str, request: Request, x_nuxview_token: Optional[str] = Header(None)):
+    """Replaces a host's tree with a pushed snapshot file (Content-Encoding: gzip accepted)."""
+    target = check_push(host, x_nuxview_token, request)
+    if int(request.headers.get("content-length") or 0) > cluster.MAX_PUSH_BYTES:
+        raise HTTPException(status_code=413, detail=f"Snapshot larger than {cluster.MAX_PUSH_BYTES} bytes")
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > cluster.MAX_PUSH_BYTES:
+            raise HTTPException(status_code=413, detail=f"Snapshot larger than {cluster.MAX_PUSH_BYTES} bytes")
+    try:
+        state = await io_pool.run(target.ingest, host, bytes(body), request.headers.get("content-encoding"))
+    except PushTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", **state.to_dict()}
+
+@app.post("/api/collector/hosts/{host}/deltas")
+async def collector_deltas(host: str, request: Request, batch: dict = Body(...), x_nuxview_token: Optional[str] = Header(None)):
+    """Applies one watcher delta batch of a host; 409 asks the agent to push its whole tree."""
+    target = check_push(host, x_nuxview_token, request)
+    try:
+        state = await io_pool.run(target.apply, host, batch)
+    except ResyncNeeded:
+        raise HTTPException(status_code=409, detail="Out of sync; push the full tree")
+    return {"status": "success", "version": state.version}
+
+@app.get("/api/collector/hosts")
+async def collector_hosts():
+    return {"status": "success", "hosts": require_collector().list()}
+
+@app.get("/api/collector/tree")
+@io_pool.offload
+def collector_tree(path: Optional[str] = None, max_depth: int = 1):
+    """Combined tree of all hosts; path is "host:/abs/path" (default: one child per host)."""
+    target = require_collector()
+    try:
+        tree = target.tree(path, max(0, max_depth))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Path not in any host tree: {path}")
+    return {"status": "success", "tree": tree}
+
+@app.get("/api/collector/top")
+@io_pool.offload
+def collector_top(by: str = "size", n: int = 50, hosts: Optional[str] = None):
+    """Top-n directories across all hosts (or the comma-separated `hosts`), paths host-prefixed."""
+    target = require_collector()
+    if by not in TOP_KEYS:
+        raise HTTPException(status_code=400, detail=f"by must be one of {', '.join(TOP_KEYS)}")
+    started = time.perf_counter()
+    results = target.top(by, max(1, min(n, 1000)), hosts.split(",") if hosts else None)
+    return {"status": "success", "by": by, "elapsed_ms": round((time.perf_counter() - started) * 1000, 2), "results": results}
+
+def cluster_status() -> dict:
+    if agent is not None:
+        return {"mode": "agent", **agent.status()}
+    if collector is not None:
+        return {"mode": "collector", "hosts": len(collector.hosts)}
+    return {"mode": "standalone"}
+
 @app.get("/api/health")
-def health():
-    return {"status": "ok"}
+async def health():
+    from details import cache_info
+    return {"status": "ok", "pools": {"scan": scan_pool.stats(), "io": io_pool.stats()}, "name_cache": cache_info(),
+            "node_cache": node_cache.stats(), "cluster": cluster_status()}
+
+# Metrics
+
+pool_in_flight = metrics.Gauge("nuxview_pool_in_flight", "Calls running or waiting on a work pool", ("pool",))
+pool_rejected = metrics.Gauge("nuxview_pool_rejected", "Calls turned away with 429 since start", ("pool",))
+job_count = metrics.Gauge("nuxview_jobs", "Scan jobs in the registry by state", ("state",))
+
+@metrics.on_collect
+def _server_gauges():
+    for pool in (scan_pool, io_pool):
+        pool_in_flight.set(pool.in_flight, pool=pool.name)
+        pool_rejected.set(pool.rejected, pool=pool.name)
+    states = {}
+    for job in jobs.list():
+        states[job.state] = states.get(job.state, 0) + 1
+    for state in ("queued", "running", "done", "failed", "cancelled"):
+        job_count.set(states.get(state, 0), state=state)
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Prometheus text exposition of request latencies, scan phases, errors and process memory."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 # Serving Static Files
 # We expect the frontend build to be in a directory named 'frontend' sibling to 'backend' directory in production
 # Struct: ~/.nuxview/app/backend/main.py  -> ~/.nuxview/app/frontend
 FRONTEND_DIR = Path(__file__).parent.parent / "frontend"
 
-if FRONTEND_DIR.exists():
-    app.mount("/", StaticFiles(directory=str(FRONTEND_DIR), html=True), name="static")
-else:
-    logger.warning(f"Frontend directory not found at {FRONTEND_DIR}. Running in API-only mode.")
+def mount_frontend():
+    """Serves the UI under "/" (last route, so the API routes win); called by startup()."""
+    if cluster.MODE == "agent":
+        logger.info(f"Agent mode: headless, pushing to {cluster.COLLECTOR_URL or '(no collector)'} as {cluster.HOST_NAME}")
+    elif FRONTEND_DIR.exists():
+        from fastapi.staticfiles import StaticFiles
+        app.mount("/", StaticFiles(directory=str(FRONTEND_DIR), html=True), name="static")
+    else:
+        logger.warning(f"Frontend directory not found at {FRONTEND_DIR}. Running in API-only mode.")
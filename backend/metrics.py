@@ -0,0 +1,265 @@
+import os
+import time
+import errno
+import resource
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Process-wide counters and histograms, rendered in the Prometheus text format at /api/metrics.
+# Kept dependency-free: a handful of metric types with label tuples, one lock per metric.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PHASE_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: Dict[Tuple, Any] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, value: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        slot = bisect_left(self.buckets, value) # First bucket with le >= value; len(buckets) is +Inf
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][slot] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="' + _number(float(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+REGISTRY: List[_Metric] = []
+_callbacks: List[Callable[[], None]] = []
+
+def on_collect(fn: Callable[[], None]):
+    """Registers fn to refresh gauges (pool sizes, job counts...) right before each render."""
+    _callbacks.append(fn)
+    return fn
+
+http_latency = Histogram("nuxview_http_request_duration_seconds",
+                         "Time from request to the last response byte, by route template", ("method", "route", "status"))
+serialize_time = Histogram("nuxview_serialize_seconds", "JSON encoding of offloaded handler results", ("handler",))
+scan_phase = Histogram("nuxview_scan_phase_seconds", "Time per scan phase, one observation per scan", ("engine", "phase"),
+                       PHASE_BUCKETS)
+scans = Counter("nuxview_scans_total", "Finished directory walks", ("engine", "outcome"))
+scan_dirs = Counter("nuxview_scan_dirs_total", "Directories walked", ("engine",))
+scan_rate = Gauge("nuxview_scan_dirs_per_second", "Directories per second of the last finished walk", ("engine",))
+syscalls = Counter("nuxview_scan_syscalls_total", "Filesystem calls made by the in-process walkers", ("engine", "call"))
+scan_errors = Counter("nuxview_scan_errors_total", "Directories or files that could not be read, by errno", ("engine", "errno"))
+peak_rss = Gauge("nuxview_process_peak_rss_bytes", "Peak resident set size of the server process")
+resident = Gauge("nuxview_process_resident_bytes", "Current resident set size of the server process")
+
+def peak_rss_bytes() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 # Linux reports KiB
+
+@on_collect
+def _process_gauges():
+    peak_rss.set(peak_rss_bytes())
+    try:
+        with open("/proc/self/statm") as f:
+            resident.set(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE"))
+    except (OSError, ValueError, IndexError):
+        pass
+
+def render() -> str:
+    for fn in _callbacks:
+        fn()
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+def errno_name(e: OSError) -> str:
+    return errno.errorcode.get(e.errno, "other") if e.errno else "other"
+
+# find reports failures as "find: '<path>': <strerror>"
+_STRERRORS = {os.strerror(code): errno.errorcode[code] for code in
+              (errno.EACCES, errno.EPERM, errno.ELOOP, errno.ENOENT, errno.ENOTDIR, errno.EIO, errno.ESTALE, errno.ENAMETOOLONG)}
+
+def find_error_name(line: str) -> str:
+    return _STRERRORS.get(line.rstrip().rsplit(": ", 1)[-1], "other")
+
+class ScanMetrics:
+    """Instrumentation of one scan, carried on its ScanStatus.
+
+    Phases accumulate here and are observed into scan_phase by flush(): the walkers flush at
+    the end of the walk, the job runner once more after save/history. Call and error counts
+    go to the process counters as they are added.
+    """
+
+    def __init__(self, engine: str = "parallel"):
+        self.engine = engine
+        self.phases: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.dirs = 0
+        self.dirs_per_sec: Optional[float] = None
+        self.peak_rss: Optional[int] = None
+        self._unflushed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add_time(self, phase: str, seconds: float):
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+            self._unflushed[phase] = self._unflushed.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_calls(self, **calls: int):
+        with self._lock:
+            for call, n in calls.items():
+                self.calls[call] = self.calls.get(call, 0) + n
+        for call, n in calls.items():
+            if n:
+                syscalls.inc(n, engine=self.engine, call=call)
+
+    def add_error(self, name: str, n: int = 1):
+        with self._lock:
+            self.errors[name] = self.errors.get(name, 0) + n
+        scan_errors.inc(n, engine=self.engine, errno=name)
+
+    def finish_walk(self, dirs: int, seconds: float, outcome: str):
+        """Records the walk's totals (called once by the walker) and flushes its phases."""
+        self.dirs = dirs
+        self.dirs_per_sec = round(dirs / seconds, 1) if seconds > 0 else None
+        self.peak_rss = peak_rss_bytes()
+        scans.inc(engine=self.engine, outcome=outcome)
+        scan_dirs.inc(dirs, engine=self.engine)
+        if self.dirs_per_sec is not None and outcome == "done":
+            scan_rate.set(self.dirs_per_sec, engine=self.engine)
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._unflushed = self._unflushed, {}
+        for phase, seconds in pending.items():
+            scan_phase.observe(seconds, engine=self.engine, phase=phase)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "engine": self.engine,
+                "phases": {k: round(v, 4) for k, v in self.phases.items()},
+                "dirs_per_sec": self.dirs_per_sec,
+                "syscalls": dict(self.calls),
+                "errors": dict(self.errors),
+                "peak_rss_bytes": self.peak_rss,
+            }
+
+class LatencyMiddleware:
+    """ASGI middleware observing http_latency per route template (not per raw path).
+
+    Timed until the last body chunk is sent, so streamed responses count their full duration.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = [500]
+        recorded = [False]
+
+        def record():
+            if not recorded[0]:
+                recorded[0] = True
+                route = scope.get("route")
+                http_latency.observe(time.perf_counter() - started, method=scope["method"],
+                                     route=getattr(route, "path", None) or "unmatched", status=status[0])
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                record()
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            record() # Errors and disconnects before the last chunk
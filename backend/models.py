@@ -7,6 +7,18 @@ class FileNode(BaseModel):
     type: str = "directory"  # explicit type
     children: Optional[List['FileNode']] = None
     has_children: bool = False # optimization for UI
+    # Filled in by scans with sizes=True (totals over the whole subtree)
+    size: Optional[int] = None # Apparent bytes
+    allocated: Optional[int] = None # Bytes on disk (st_blocks * 512)
+    file_count: Optional[int] = None
+    largest_file: Optional[str] = None
+    largest_file_size: Optional[int] = None
+    truncated: Optional[bool] = None # Directories below max_depth were not entered: the totals are a lower bound
+    # Set on the scan root and on mount points, where the filesystem changes
+    device: Optional[str] = None # "major:minor"
+    fstype: Optional[str] = None
+    mount_point: Optional[str] = None
+    remote: Optional[bool] = None
 
 # Needed for recursive models
 FileNode.model_rebuild()
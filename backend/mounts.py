@@ -0,0 +1,78 @@
+import os
+import re
+from typing import Any, Dict, List, NamedTuple, Optional
+
+MOUNTINFO = "/proc/self/mountinfo"
+
+class Mount(NamedTuple):
+    mount_point: str
+    fstype: str
+    device: str # "major:minor" as in mountinfo
+    source: str
+
+# Mount points escape space, tab, newline and backslash as \ooo
+_ESCAPE = re.compile(r"\\([0-7]{3})")
+
+def _unescape(field: str) -> str:
+    return _ESCAPE.sub(lambda m: chr(int(m.group(1), 8)), field)
+
+def read_mounts(path: str = MOUNTINFO) -> List[Mount]:
+    """Mounts of this process's namespace, in mount order; [] where mountinfo is unavailable."""
+    mounts = []
+    try:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return mounts
+    for line in lines:
+        # "<id> <parent> <major:minor> <root> <mount point> <options> [optional...] - <fstype> <source> <super options>"
+        fields = line.split()
+        try:
+            sep = fields.index("-", 6)
+            mounts.append(Mount(_unescape(fields[4]), fields[sep + 1], fields[2], _unescape(fields[sep + 2])))
+        except (ValueError, IndexError):
+            continue
+    return mounts
+
+# Network and FUSE-over-network filesystems: high latency per call, so they get few walker
+# threads of their own instead of sharing (and stalling) the local ones
+REMOTE_FSTYPES = {
+    "nfs", "nfs4", "cifs", "smb3", "smbfs", "afs", "ceph", "glusterfs", "9p", "lustre", "gpfs",
+    "fuse.sshfs", "fuse.rclone", "fuse.s3fs", "fuse.gcsfuse", "fuse.davfs", "davfs",
+}
+
+def is_remote(fstype: Optional[str]) -> bool:
+    return fstype in REMOTE_FSTYPES
+
+def device_number(device: str) -> int:
+    """mountinfo's "major:minor" as the st_dev value stat() reports for that filesystem."""
+    major, minor = device.split(":")
+    return os.makedev(int(major), int(minor))
+
+class MountTable:
+    """Mounts by mount point and by st_dev, read once per scan."""
+
+    def __init__(self, mounts: Optional[List[Mount]] = None):
+        self.mounts = read_mounts() if mounts is None else mounts
+        # Later mounts shadow earlier ones on the same mount point
+        self.by_path: Dict[str, Mount] = {m.mount_point: m for m in self.mounts}
+        self.by_device: Dict[int, Mount] = {}
+        for mount in self.mounts:
+            try:
+                # Bind mounts share a device: keep the shortest (outermost) mount point
+                dev = device_number(mount.device)
+            except ValueError:
+                continue
+            known = self.by_device.get(dev)
+            if known is None or len(mount.mount_point) < len(known.mount_point):
+                self.by_device[dev] = mount
+
+    def describe(self, devices) -> Dict[int, Dict[str, Any]]:
+        """{st_dev: {fstype, source, mount_point, remote}} for the devices a tree spans."""
+        table = {}
+        for dev in devices:
+            mount = self.by_device.get(dev)
+            if mount is not None:
+                table[dev] = {"fstype": mount.fstype, "source": mount.source, "mount_point": mount.mount_point,
+                              "remote": is_remote(mount.fstype)}
+        return table
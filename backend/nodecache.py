@@ -0,0 +1,156 @@
+import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from metrics import Counter, Gauge, on_collect
+from scanner import RACY_WINDOW_NS
+
+# Short-lived cache of live node scans (/api/scan/node, the live fallback of /api/tree).
+# A UI re-expanding a path, or several dashboards open on the same tree, would otherwise rerun
+# scandir on the directory and on every child (the has_children peek) for each request.
+#
+# An entry is served while it is younger than TTL and the directory's mtime is the one seen
+# before it was scanned, so entries, renames and removals directly below it show up at once.
+# Changes deeper down (a child gaining its first subdirectory) wait for the TTL.
+# Entries are evicted least recently used first once their estimated size passes MAX_BYTES.
+TTL = float(os.environ.get("NUXVIEW_NODE_CACHE_TTL", 5.0)) # Seconds; 0 disables the cache
+MAX_BYTES = int(os.environ.get("NUXVIEW_NODE_CACHE_BYTES", 0)) or 32 << 20
+NODE_OVERHEAD = 240 # Rough bytes per cached node besides its path and name
+
+lookups = Counter("nuxview_node_cache_total", "Live node scan requests by how they were served", ("result",))
+cache_bytes = Gauge("nuxview_node_cache_bytes", "Estimated size of the live node scan cache")
+
+def estimate_size(node: Dict[str, Any]) -> int:
+    size = 0
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        size += NODE_OVERHEAD + len(n.get("path") or "") + len(n.get("name") or "")
+        stack.extend(n.get("children") or ())
+    return size
+
+class _Entry:
+    __slots__ = ("node", "mtime_ns", "created", "size")
+
+    def __init__(self, node, mtime_ns: int, size: int):
+        self.node = node
+        self.mtime_ns = mtime_ns
+        self.created = time.monotonic()
+        self.size = size
+
+class NodeCache:
+    """Scans keyed by (path, depth, excludes); identical concurrent requests share one scan.
+
+    lookup() and load() block (stat, scandir) and run on the worker pools; get() runs on the
+    event loop and coalesces: the first request for a key starts the fetch and later ones await
+    the same future instead of queueing scans of their own.
+    """
+
+    def __init__(self, ttl: float = TTL, max_bytes: int = MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending: Dict[Hashable, asyncio.Future] = {} # Event loop only
+
+    @staticmethod
+    def key(path: str, depth: int, excludes=None) -> tuple:
+        return os.path.abspath(path), depth, tuple(sorted(excludes or ()))
+
+    def lookup(self, key) -> Optional[Any]:
+        """The cached node for key if it is still fresh, else None (and the entry is dropped)."""
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.created <= self.ttl:
+            try:
+                mtime_ns = os.stat(key[0]).st_mtime_ns
+            except OSError:
+                mtime_ns = None
+            if mtime_ns == entry.mtime_ns:
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                lookups.inc(result="hit")
+                return entry.node
+        lookups.inc(result="expired")
+        self._drop(key, entry)
+        return None
+
+    def load(self, key, scan: Callable[[], Any]) -> Optional[Any]:
+        """Runs scan() (returning a node dict or None) and caches its result for key."""
+        lookups.inc(result="miss")
+        started_ns = time.time_ns()
+        try:
+            # stat before listing: a change made while we list still bumps the mtime we compare to
+            mtime_ns = os.stat(key[0]).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        node = scan()
+        # A directory changed within the last timestamp tick may change again without its mtime
+        # moving (see RACY_WINDOW_NS); such scans are served to their waiters but not kept
+        if self.ttl > 0 and node is not None and mtime_ns is not None and mtime_ns < started_ns - RACY_WINDOW_NS:
+            self._store(key, _Entry(node, mtime_ns, estimate_size(node)))
+        return node
+
+    async def get(self, key, lookup: Callable[[], Awaitable], load: Callable[[], Awaitable]):
+        """Fresh cached node, or the result of the scan in flight for key, or a new scan.
+
+        lookup/load wrap self.lookup and self.load in the pool they should run on.
+        """
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._fetch(lookup, load))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        else:
+            lookups.inc(result="coalesced")
+        # Shielded: a client that disconnects does not cancel the scan the others are waiting for
+        return await asyncio.shield(pending)
+
+    @staticmethod
+    async def _fetch(lookup, load):
+        node = await lookup()
+        return node if node is not None else await load()
+
+    def _store(self, key, entry: _Entry):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.size
+            self._entries[key] = entry
+            self.bytes += entry.size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.size
+
+    def _drop(self, key, entry: _Entry):
+        with self._lock:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+                self.bytes -= entry.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.bytes, "max_bytes": self.max_bytes, "ttl": self.ttl,
+                    "in_flight": len(self._pending)}
+
+node_cache = NodeCache()
+
+@on_collect
+def _cache_gauges():
+    cache_bytes.set(node_cache.bytes)
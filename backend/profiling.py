@@ -0,0 +1,129 @@
+import os
+import sys
+import logging
+import threading
+from collections import Counter
+from typing import Callable, Dict, List
+
+# cProfile and pstats are imported by the profiled scan that needs them, not at server startup
+
+logger = logging.getLogger("nuxview.profiling")
+
+# Opt-in profile of one full scan (/api/scan/full with "profile"). Both modes cover every thread
+# the scan runs on: the job thread plus the walker's workers, each entered through wrap().
+#   cprofile  deterministic: a cProfile per thread, merged into one pstats file (snakeviz, pstats).
+#             From Python 3.12 cProfile runs on sys.monitoring, which allows one profiler per
+#             process and records every thread: a single profiler then covers the whole scan (and
+#             whatever else the server runs meanwhile). If another profiler is already active
+#             (a second profiled scan, a debugger), the scan is sampled instead.
+#   sample    a sampler thread records the stacks of those threads every SAMPLE_INTERVAL seconds;
+#             written as collapsed stacks ("a;b;c count"), the input of flamegraph.pl / speedscope
+PROFILE_MODES = {"cprofile": ".prof", "sample": ".folded"}
+SAMPLE_INTERVAL = float(os.environ.get("NUXVIEW_PROFILE_INTERVAL", 0.005))
+PER_THREAD_CPROFILE = sys.version_info < (3, 12)
+
+class ScanProfile:
+    def __init__(self, mode: str, path):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"profile must be one of {', '.join(PROFILE_MODES)}")
+        self.mode = mode
+        self.path = str(path)
+        self.saved = False
+        self.samples = 0
+        self._threads: Dict[int, str] = {} # ident -> thread name, while the thread runs
+        self._profiles: List["cProfile.Profile"] = []
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._sampler = None
+        self._shared = None # The process-wide cProfile.Profile (Python 3.12+)
+        self._lock = threading.Lock()
+
+    def wrap(self, fn: Callable) -> Callable:
+        """fn, run with this thread profiled (use as the target of every thread of the scan)."""
+        import cProfile
+        def run(*args, **kwargs):
+            ident = threading.get_ident()
+            with self._lock:
+                self._threads[ident] = threading.current_thread().name
+            profile = cProfile.Profile() if self.mode == "cprofile" and PER_THREAD_CPROFILE else None
+            try:
+                if profile is not None:
+                    profile.enable() # Per thread: only calls made on this thread are recorded
+                return fn(*args, **kwargs)
+            finally:
+                if profile is not None:
+                    profile.disable()
+                with self._lock:
+                    self._threads.pop(ident, None)
+                    if profile is not None:
+                        self._profiles.append(profile)
+        return run
+
+    def _sample(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            with self._lock:
+                threads = dict(self._threads)
+            frames = sys._current_frames()
+            for ident, name in threads.items():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(name.rsplit("_", 1)[0]) # Group workers of the same pool under one root
+                self._stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def __enter__(self):
+        if self.mode == "cprofile" and not PER_THREAD_CPROFILE:
+            import cProfile
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+                self._shared = profile
+                self._profiles.append(profile)
+            except ValueError as e: # "Another profiling tool is already active"
+                logger.warning(f"cProfile unavailable ({e}), sampling the scan instead")
+                self.mode = "sample"
+                self.path = os.path.splitext(self.path)[0] + PROFILE_MODES["sample"]
+        if self.mode == "sample":
+            self._sampler = threading.Thread(target=self._sample, name="nuxview-profiler", daemon=True)
+            self._sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._shared is not None:
+            self._shared.disable()
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        try:
+            self.save()
+        except Exception as e:
+            logger.error(f"Could not write scan profile {self.path}: {e}")
+        return False
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if self.mode == "cprofile":
+            import pstats
+            with self._lock:
+                profiles = list(self._profiles)
+            if not profiles:
+                return
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(self.path)
+        else:
+            with open(self.path, "w") as f:
+                for stack, count in self._stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        self.saved = True
+        logger.info(f"Scan profile ({self.mode}) written to {self.path}")
+
+    def to_dict(self) -> dict:
+        return {"mode": self.mode, "saved": self.saved, "samples": self.samples if self.mode == "sample" else None}
@@ -0,0 +1,46 @@
+import heapq
+from typing import List
+
+# Query key -> column; all rank descending except age (oldest mtime first)
+TOP_KEYS = {"size": "total_bytes", "allocated": "total_alloc", "files": "total_files", "age": "mtime"}
+SIZE_KEYS = {"size", "allocated", "files"}
+
+# Subtrees up to this many nodes are ranked with a heap over their contiguous node range; larger
+# ones walk the precomputed global ordering and keep the hits inside the range. Either way the
+# work is bounded: ~n*log(k) for small scopes, ~k * total/scope for large ones.
+SLICE_LIMIT = 200_000
+
+def top_n(tree, idx: int, by: str, n: int) -> List[int]:
+    """Indices of the n directories under idx (excluding idx itself) ranked by `by`."""
+    column = TOP_KEYS[by]
+    values = tree.columns[column]
+    descending = by != "age"
+    # mtime <= 0 means unknown or modified during the scan (see scanner.RACY_WINDOW_NS)
+    valid = (lambda i: True) if descending else (lambda i: values[i] > 0)
+
+    sorted_index = getattr(tree, "sorted_indexes", {}).get(column)
+    if sorted_index is None or not hasattr(tree, "end"):
+        # Live TreeStore (watcher) or old snapshot: no ordering on disk, rank the whole subtree
+        candidates = (i for i in _descendants(tree, idx) if valid(i))
+        pick = heapq.nlargest if descending else heapq.nsmallest
+        return pick(n, candidates, key=values.__getitem__)
+
+    lo, hi = idx + 1, tree.end[idx]
+    if hi - lo <= SLICE_LIMIT and hi - lo < len(sorted_index):
+        pick = heapq.nlargest if descending else heapq.nsmallest
+        return pick(n, (i for i in range(lo, hi) if valid(i)), key=values.__getitem__)
+
+    results = []
+    for i in sorted_index:
+        if lo <= i < hi:
+            results.append(i)
+            if len(results) >= n:
+                break
+    return results
+
+def _descendants(tree, idx: int):
+    stack = list(tree.children(idx))
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(tree.children(node))
@@ -0,0 +1,37 @@
+import os
+import json
+from typing import Any, Dict
+
+from treestore import TreeView
+
+# Records of the NDJSON tree streams (format described in stream.py). Kept apart from stream.py,
+# which needs FastAPI, so the scanner CLI (cli.py) writes the very same lines.
+
+def encode(record: Dict[str, Any]) -> bytes:
+    return json.dumps(record, separators=(",", ":")).encode() + b"\n"
+
+def node_record(view: TreeView, idx: int, path: str, depth: int) -> Dict[str, Any]:
+    record = {
+        "kind": "node",
+        "name": view.name(idx),
+        "path": path,
+        "parent": os.path.dirname(path) if idx else None,
+        "depth": depth,
+        "type": "directory",
+        "has_children": view.has_children(idx),
+    }
+    record.update(view.size_fields(idx))
+    record.update(view.mount_fields(idx))
+    return record
+
+def dir_record(node: int, path: str, depth: int, has_children: bool) -> Dict[str, Any]:
+    """A directory as walk_parallel's on_dir reports it, while the walk is still running."""
+    return {
+        "kind": "node",
+        "name": os.path.basename(path) or "/",
+        "path": path,
+        "parent": os.path.dirname(path) if node else None,
+        "depth": depth,
+        "type": "directory",
+        "has_children": has_children,
+    }
@@ -1,39 +1,185 @@
 import os
+import ctypes
+import platform
 import subprocess
+import shutil
 import logging
 import threading
-from typing import List, Optional, Dict, Any
-from models import FileNode
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Callable, List, Optional, Dict, Any, Set
+from treestore import TreeStore
+from excludes import ExcludeMatcher, compile_excludes
+from mounts import Mount, MountTable, device_number, is_remote
+from metrics import ScanMetrics, errno_name, find_error_name
+from analytics import Histograms
+
+# The walkers build TreeStores and need no pydantic; FileNode is imported where a function returns
+# one, so the standalone CLI (cli.py) starts without it
+if TYPE_CHECKING:
+    from models import FileNode
 
 logger = logging.getLogger("nuxview.scanner")
 
 DEFAULT_EXCLUDES = ["/proc", "/sys", "/dev", "/run", "/tmp", "/var/lib/docker", "/lost+found"]
 
+def exclude_matcher(excludes=None, root: Optional[str] = None) -> ExcludeMatcher:
+    """DEFAULT_EXCLUDES plus the request's rules, compiled (see excludes.py); matchers pass through.
+
+    With root, the matcher is bound to that scan root (unless it already is): rules then only
+    match below it, in every engine.
+    """
+    if isinstance(excludes, ExcludeMatcher):
+        matcher = excludes
+    else:
+        matcher = compile_excludes(DEFAULT_EXCLUDES + list(excludes or []))
+    return matcher.below(root) if root is not None and matcher.root is None else matcher
+
+# Parallel walker tuning. Directory listing is I/O bound (getdents/stat release the GIL),
+# so we run more threads than cores. NUXVIEW_SCAN_WORKERS overrides the default.
+DEFAULT_WORKERS = int(os.environ.get("NUXVIEW_SCAN_WORKERS", 0)) or min(32, (os.cpu_count() or 1) * 4)
+MAX_WORKERS = int(os.environ.get("NUXVIEW_MAX_SCAN_WORKERS", 0)) or 64 # Cap on per-request worker counts
+MAX_QUEUED_DIRS = 4096 # Per-worker deque bound; overflow is walked inline
+REMOTE_WORKERS = int(os.environ.get("NUXVIEW_REMOTE_SCAN_WORKERS", 0)) or 4 # Threads per network filesystem (see mounts.REMOTE_FSTYPES)
+
+# Directories modified this close to the start of a scan may change again within the same
+# timestamp tick after we listed them; their mtime is not recorded so the next incremental
+# rescan lists them again (the "racy timestamp" problem).
+RACY_WINDOW_NS = 1_000_000_000
+
 class ScanStatus:
+    """Progress of one scan. Every scan gets its own instance (see jobs.py); cancel() asks the
+    walker to stop at the next directory."""
+
     def __init__(self):
         self.is_scanning = False
         self.progress = 0
         self.total_dirs = 0
         self.scanned_dirs = 0
         self.error = None
+        self.stop_reason = None # Why the walk stopped early ("cancelled", "time budget exceeded")
+        self.metrics = ScanMetrics() # Phase timings, call and error counts (see metrics.py)
+        self.profile = None # profiling.ScanProfile when this scan is profiled; walkers wrap their threads with it
+        self.incremental = False # Set by walk_parallel when it got a usable previous scan to reuse listings from
         self._lock = threading.Lock()
+        self._cancel = threading.Event()
 
     def update(self, **kwargs):
         with self._lock:
             for k, v in kwargs.items():
                 setattr(self, k, v)
 
-global_scan_status = ScanStatus()
+    def cancel(self, reason: str = "cancelled"):
+        with self._lock:
+            if self.stop_reason is None:
+                self.stop_reason = reason
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def wait(self, timeout: float) -> bool:
+        """Sleeps up to timeout; returns early (True) once the scan is cancelled."""
+        return self._cancel.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "is_scanning": self.is_scanning,
+                "progress": self.progress,
+                "scanned": self.scanned_dirs,
+                "total": self.total_dirs,
+                "error": self.error,
+                "stop_reason": self.stop_reason,
+                "metrics": self.metrics.to_dict(),
+                "profile": self.profile.to_dict() if self.profile is not None else None,
+            }
+
+# ioprio_set(2) has no libc wrapper; syscall numbers per architecture
+_IOPRIO_SET = {"x86_64": 251, "aarch64": 30, "riscv64": 30, "i386": 289, "i686": 289, "armv7l": 314, "ppc64le": 273, "s390x": 282}
+IO_CLASSES = {"realtime": 1, "best-effort": 2, "idle": 3}
+
+class ScanLimits:
+    """Resource limits for one scan, all optional.
+
+    nice / io_class lower the priority of the walker threads (or of the find process),
+    max_rate caps directories listed per second (token bucket shared by all workers) and
+    time_budget stops the walk after that many seconds, keeping what was scanned so far.
+    """
+
+    def __init__(self, nice: Optional[int] = None, io_class: Optional[str] = None, io_level: Optional[int] = None,
+                 max_rate: Optional[float] = None, time_budget: Optional[float] = None):
+        if io_class is not None and io_class not in IO_CLASSES:
+            raise ValueError(f"io_class must be one of {', '.join(IO_CLASSES)}")
+        self.nice = nice
+        self.io_class = io_class
+        self.io_level = io_level
+        self.max_rate = max_rate if max_rate and max_rate > 0 else None
+        self.time_budget = time_budget if time_budget and time_budget > 0 else None
+        self.deadline: Optional[float] = None
+        self._tokens = self.max_rate or 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._last = time.monotonic()
+        if self.time_budget:
+            self.deadline = self._last + self.time_budget
+
+    def throttle(self, status: ScanStatus):
+        """Called once per directory: enforces the budget, then waits for a rate-limit token."""
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            status.cancel("time budget exceeded")
+            return
+        if self.max_rate is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.max_rate, self._tokens + (now - self._last) * self.max_rate)
+            self._last = now
+            self._tokens -= 1
+            delay = -self._tokens / self.max_rate if self._tokens < 0 else 0
+        if delay:
+            status.wait(delay)
+
+    def lower_priority(self):
+        """Applies nice / io_class to the calling thread (Linux: both are per-thread attributes)."""
+        tid = threading.get_native_id()
+        if self.nice:
+            try:
+                os.setpriority(os.PRIO_PROCESS, tid, self.nice)
+            except (OSError, AttributeError) as e:
+                logger.warning(f"Could not renice scan thread: {e}")
+        if self.io_class:
+            nr = _IOPRIO_SET.get(platform.machine())
+            level = self.io_level if self.io_level is not None else 4
+            prio = (IO_CLASSES[self.io_class] << 13) | (0 if self.io_class == "idle" else level)
+            libc = ctypes.CDLL(None, use_errno=True)
+            if nr is None or libc.syscall(nr, 1, tid, prio) != 0: # 1 = IOPRIO_WHO_PROCESS
+                logger.warning(f"Could not set I/O class {self.io_class} on scan thread (errno {ctypes.get_errno()})")
 
-def paths_to_tree(paths: List[str], root_path: str) -> Optional[FileNode]:
+    def command_prefix(self) -> List[str]:
+        """ionice / nice wrappers for an external scan command, where the tools exist."""
+        prefix = []
+        if self.io_class and shutil.which("ionice"):
+            prefix += ["ionice", "-c", str(IO_CLASSES[self.io_class])]
+            if self.io_class != "idle" and self.io_level is not None:
+                prefix += ["-n", str(self.io_level)]
+        if self.nice and shutil.which("nice"):
+            prefix += ["nice", "-n", str(self.nice)]
+        return prefix
+
+def paths_to_tree(paths: List[str], root_path: str) -> Optional["FileNode"]:
     """Converts a flat list of paths into a hierarchical FileNode structure."""
+    from models import FileNode
     if not paths:
         return None
     
     # Sort paths by length to ensure parents are processed before children
     paths = sorted(paths, key=len)
     
-    nodes: Dict[str, FileNode] = {}
+    nodes: Dict[str, "FileNode"] = {}
     root_node = None
     
     for path in paths:
@@ -57,94 +203,272 @@ def paths_to_tree(paths: List[str], root_path: str) -> Optional[FileNode]:
             
     return root_node
 
-def scan_with_find(root_path: str, max_depth: int = 50, excludes: Optional[List[str]] = None) -> Optional[FileNode]:
-    """Scans the file system using the native Linux 'find' command for maximum speed."""
+class StreamTreeBuilder:
+    """Builds a TreeStore from depth-first (pre-order) entries as they arrive.
+
+    find emits every directory before its contents, so the parent of an entry at depth d is
+    always the last entry seen at depth d-1. Keeping that branch on a stack attaches each
+    node in O(1) without a path dict or a global sort.
+    """
+
+    def __init__(self, root_path: str):
+        self.root_path = root_path
+        self.store: Optional[TreeStore] = None
+        self.count = 0
+        self.sizes = False
+        self.analytics: Optional[List[str]] = None # Pinned extensions when file analytics are gathered (implies sizes)
+        self.max_depth: Optional[int] = None # Directories deeper than this only flag their parent (see treestore.TRUNCATED)
+        self._branch: List[tuple] = [] # (index, path) from the root down to the last entry
+        self._links: Set[tuple] = set() # (dev, inode) of multiply-linked files already counted
+
+    def add(self, depth: int, path: str) -> int:
+        """Attaches one entry; returns its index or -1 when it has no parent in the tree."""
+        if depth == 0:
+            if path != self.root_path:
+                return -1
+            histograms = Histograms(self.analytics) if self.analytics is not None else None
+            self.store = TreeStore(path, sizes=self.sizes, histograms=histograms)
+            self._branch = [(0, path)]
+            self.count = 1
+            return 0
+
+        del self._branch[depth:]
+        if len(self._branch) != depth:
+            return -1 # Parent was filtered out (e.g. excluded), so is this subtree
+        parent, parent_path = self._branch[-1]
+        if os.path.dirname(path) != parent_path:
+            return -1
+        if self.max_depth is not None and depth > self.max_depth:
+            self.store.mark_truncated(parent)
+            return -1
+
+        idx = self.store.add(parent, os.path.basename(path))
+        self._branch.append((idx, path))
+        self.count += 1
+        return idx
+
+    def add_file(self, depth: int, path: str, size: int, blocks: int, ino: int, nlink: int, dev: int, mtime_ns: int = 0):
+        """Counts a non-directory entry into its directory's own totals."""
+        del self._branch[depth:]
+        if depth == 0 or len(self._branch) != depth:
+            return
+        parent, parent_path = self._branch[-1]
+        if os.path.dirname(path) != parent_path:
+            return
+        if nlink > 1:
+            # Hard links: count the inode once. Only multiply-linked files are remembered, which
+            # keeps the set small on ordinary trees.
+            key = (dev, ino)
+            if key in self._links:
+                return
+            self._links.add(key)
+        if self.store.histograms is not None:
+            self.store.histograms.add(parent, os.path.basename(path), size, mtime_ns)
+        cols = self.store.columns
+        cols["files"][parent] += 1
+        cols["bytes"][parent] += size
+        cols["alloc"][parent] += blocks * 512
+        if cols["max_name"][parent] < 0 or size > cols["max_size"][parent]:
+            cols["max_size"][parent] = size
+            cols["max_name"][parent] = self.store.intern(os.path.basename(path))
+
+def _read_records(stream, sep: bytes = b"\0", chunk_size: int = 1 << 16, metrics: Optional[ScanMetrics] = None):
+    """Yields separator-terminated records from a binary stream without buffering it all.
+
+    With metrics, the time spent waiting for the producer is added to the "walk" phase.
+    """
+    pending = b""
+    clock = time.perf_counter
+    while True:
+        started = clock()
+        chunk = stream.read(chunk_size)
+        if metrics is not None:
+            metrics.add_time("walk", clock() - started)
+        if not chunk:
+            break
+        records = (pending + chunk).split(sep)
+        pending = records.pop()
+        yield from records
+    if pending:
+        yield pending
+
+def _timestamp_ns(value: bytes) -> int:
+    """find's %T@ ("1700000000.1234567890") as integer nanoseconds, without float rounding."""
+    sec, _, frac = value.partition(b".")
+    return int(sec) * 1_000_000_000 + int(frac[:9].ljust(9, b"0") or 0)
+
+def _count_find_errors(stream, metrics: ScanMetrics):
+    """Drains find's stderr, counting "find: '<path>': Permission denied" style lines by errno."""
+    for line in stream:
+        metrics.add_error(find_error_name(os.fsdecode(line)))
+
+def _find_watchdog(process: subprocess.Popen, status: ScanStatus, limits: ScanLimits):
+    """Kills find once the scan is cancelled or out of time budget, also while find prints nothing
+    (blocked on a hung mount, or crossing a large pruned or unreadable area)."""
+    while process.poll() is None:
+        if limits.deadline is not None and time.monotonic() > limits.deadline:
+            status.cancel("time budget exceeded")
+        if status.cancelled:
+            process.kill()
+            return
+        timeout = 0.25 if limits.deadline is None else min(0.25, max(0.0, limits.deadline - time.monotonic()))
+        status.wait(timeout)
+
+def walk_with_find(root_path: str, max_depth: int = 50, excludes: Optional[List[str]] = None, sizes: bool = False,
+                   status: Optional[ScanStatus] = None, limits: Optional[ScanLimits] = None, one_filesystem: bool = False,
+                   analytics: Optional[List[str]] = None) -> Optional[TreeStore]:
+    """Scans the file system using the native Linux 'find' command for maximum speed.
+
+    With sizes=True, find also reports every other entry so file counts and bytes are
+    gathered in the same pass (see TreeStore.rollup_sizes). With limits, find runs under
+    ionice/nice and is paced by reading its output no faster than max_rate directories per
+    second (the pipe fills up and blocks it). Cancelling, or running out of time budget,
+    kills find and returns the partial tree. one_filesystem=True passes -xdev.
+    find lists one level past max_depth, so files in the deepest directories are counted too;
+    directories at that level are not kept, they mark their parent truncated instead.
+    analytics (a list of pinned extensions, possibly empty) also builds the file histograms of
+    analytics.py; it implies sizes.
+    """
     root_path = os.path.abspath(root_path)
-    global_scan_status.update(is_scanning=True, progress=0, error=None)
+    status = status or ScanStatus()
+    limits = limits or ScanLimits()
+    status.update(is_scanning=True, progress=0, scanned_dirs=0, total_dirs=0, error=None)
+    metrics = status.metrics
+    metrics.engine = "find"
+    sizes = sizes or analytics is not None
     
-    exclude_args = []
-    # Build exclusion arguments for find
-    for ex in DEFAULT_EXCLUDES:
-        exclude_args.extend(["-not", "-path", f"{ex.rstrip('/')}*"])
-    if excludes:
-        for ex in excludes:
-            exclude_args.extend(["-not", "-path", f"*{ex}*"])
-
-    command = [
+    # Excluded directories are pruned, so find never descends into them
+    matcher = exclude_matcher(excludes, root_path)
+    exclude_args = matcher.find_prune_args()
+
+    # "d <depth> <mtime> <ctime> <inode> <device> <path>\0" per directory: depth lets us attach to
+    # the parent while streaming, NUL separation keeps names containing newlines intact.
+    # Files: "f <depth> <size> <512B blocks> <inode> <links> <device> <mtime> <path>\0"
+    dir_format = ["-printf", "d %d %T@ %C@ %i %D %p\\0"]
+    if sizes:
+        select = ["(", "-type", "d"] + dir_format + ["-o", "-printf", "f %d %s %b %i %n %D %T@ %p\\0", ")"]
+    else:
+        select = ["-type", "d"] + dir_format
+    command = limits.command_prefix() + [
         "find", root_path,
-        "-maxdepth", str(max_depth),
-        "-type", "d"
-    ] + exclude_args
+        "-maxdepth", str(max_depth + 1),
+    ] + (["-xdev"] if one_filesystem else []) + exclude_args + select
 
     logger.info(f"Executing shell scan: {' '.join(command)}")
     
     try:
-        # Merge stderr into stdout to prevent buffer deadlocks
-        # Also use -noleaf for minor speed boost on some FS, and skip hidden by default
-        command = [
-            "find", root_path,
-            "-maxdepth", str(max_depth),
-            "-type", "d"
-        ] + exclude_args
-
         process = subprocess.Popen(
             command, 
             stdout=subprocess.PIPE, 
-            stderr=subprocess.DEVNULL, # Ignore permission denied spam
-            text=True,
-            bufsize=1 # Line buffered
+            stderr=subprocess.PIPE, # Permission denied & co. are counted, not logged
         )
+        errors = threading.Thread(target=_count_find_errors, args=(process.stderr, metrics), daemon=True)
+        errors.start()
         
-        paths = []
-        global_scan_status.update(progress=10)
+        builder = StreamTreeBuilder(root_path)
+        builder.sizes = sizes
+        builder.analytics = analytics
+        builder.max_depth = max_depth
+        started_ns = time.time_ns()
+        status.update(progress=10)
+        limits.start()
+        walk_started = time.perf_counter()
+        threading.Thread(target=_find_watchdog, args=(process, status, limits), daemon=True).start()
         
-        # Read paths
-        for line in process.stdout:
-            p = line.strip()
-            if p:
-                paths.append(p)
-                if len(paths) % 500 == 0:
-                     # More granular progress: 10% to 85%
-                     global_scan_status.update(progress=min(85, 10 + (len(paths) // 500)))
+        for record in _read_records(process.stdout, metrics=metrics):
+            if status.cancelled:
+                process.kill()
+                break
+            if record.startswith(b"f "):
+                fields = record[2:].split(b" ", 7)
+                if len(fields) == 8 and builder.store is not None:
+                    depth, size, blocks, ino, nlink, dev, mtime, raw_path = fields
+                    builder.add_file(int(depth), os.fsdecode(raw_path), int(size), int(blocks), int(ino), int(nlink), int(dev),
+                                     _timestamp_ns(mtime))
+                continue
+            fields = record[2:].split(b" ", 5)
+            if len(fields) < 6:
+                continue
+            depth, mtime, ctime, ino, dev, raw_path = fields
+            limits.throttle(status)
+            path = os.fsdecode(raw_path)
+            if depth != b"0" and matcher.regex_excluded(path):
+                continue # Not pruned by find; skipping it here drops its whole subtree in the builder
+            idx = builder.add(int(depth), path)
+            if idx >= 0:
+                mtime_ns = _timestamp_ns(mtime)
+                if mtime_ns >= started_ns - RACY_WINDOW_NS:
+                    mtime_ns = -1
+                builder.store.set_meta(idx, mtime_ns, _timestamp_ns(ctime), int(ino), int(dev))
+                if one_filesystem and int(dev) != builder.store.columns["dev"][0]:
+                    builder.store.mark_has_children(idx) # Mount point find did not enter (-xdev)
+            if builder.count % 500 == 0:
+                 # More granular progress: 10% to 85%
+                 status.update(progress=min(85, 10 + (builder.count // 500)), scanned_dirs=builder.count, total_dirs=builder.count)
         
         process.wait()
+        errors.join()
+        if status.cancelled:
+            logger.info(f"Shell scan of {root_path} stopped ({status.stop_reason}) after {builder.count} paths")
+        # Streaming: records are parsed and attached while find runs; everything but the wait is "parse"
+        elapsed = time.perf_counter() - walk_started
+        metrics.add_time("parse", max(0.0, elapsed - metrics.phases.get("walk", 0.0)))
         
-        if not paths:
+        if builder.store is None:
             logger.warning("Find command returned no paths.")
-            global_scan_status.update(is_scanning=False, error="No directories found.")
+            status.update(is_scanning=False, error="No directories found.")
+            metrics.finish_walk(0, elapsed, "failed")
             return None
 
-        global_scan_status.update(progress=90)
-        logger.info(f"Parsing {len(paths)} paths into tree...")
-        tree = paths_to_tree(paths, root_path)
-        global_scan_status.update(is_scanning=False, progress=100)
-        return tree
+        with metrics.phase("build"):
+            builder.store.rollup_sizes()
+            if builder.store.histograms is not None:
+                builder.store.histograms.rollup(builder.store)
+            builder.store.mounts = MountTable().describe(set(builder.store.columns["dev"]))
+        logger.info(f"Streamed {builder.count} paths into tree")
+        metrics.finish_walk(builder.count, elapsed, "cancelled" if status.cancelled else "done")
+        if status.cancelled:
+            status.update(is_scanning=False, scanned_dirs=builder.count, total_dirs=builder.count)
+            return builder.store
+        status.update(is_scanning=False, progress=100, scanned_dirs=builder.count, total_dirs=builder.count)
+        return builder.store
 
     except Exception as e:
         logger.error(f"Shell scan threw exception: {e}")
-        global_scan_status.update(is_scanning=False, error=str(e))
+        status.update(is_scanning=False, error=str(e))
+        return None
+
+def scan_with_find(root_path: str, max_depth: int = 50, excludes: Optional[List[str]] = None, sizes: bool = False,
+                   status: Optional[ScanStatus] = None, limits: Optional[ScanLimits] = None) -> Optional["FileNode"]:
+    """Scans with the native 'find' command (see walk_with_find) and returns the tree as FileNodes."""
+    status = status or ScanStatus()
+    store = walk_with_find(root_path, max_depth, excludes, sizes, status, limits)
+    if not store:
         return None
+    with status.metrics.phase("serialize"):
+        node = store.to_filenode()
+    status.metrics.flush()
+    return node
 
-def scan_with_python(root_path: str, max_depth: int = 1, excludes: Optional[List[str]] = None) -> Optional[FileNode]:
+def scan_with_python(root_path: str, max_depth: int = 1, excludes: Optional[List[str]] = None) -> Optional["FileNode"]:
     """Native Python fallback using os.scandir (slower but works everywhere)."""
+    from models import FileNode
     root_path = os.path.abspath(root_path)
     if not os.path.isdir(root_path): return None
     
     name = os.path.basename(root_path) or "/"
     root = FileNode(name=name, path=root_path, type="directory", children=[], has_children=False)
     
-    exclude_list = DEFAULT_EXCLUDES + (excludes or [])
-    
-    # helper for checking exclusions
-    def is_excluded(p: str):
-         return any(ex in p for ex in exclude_list)
+    # Compiled once at the top and handed down the recursion
+    excludes = exclude_matcher(excludes, root_path)
+    is_excluded = excludes.excluded
 
     if max_depth <= 0:
         # Check if it has any subdirectories to set has_children flag (Peek 1 level deep)
         try:
             with os.scandir(root_path) as it:
                 for entry in it:
-                     if entry.is_dir() and not is_excluded(entry.path):
+                     if entry.is_dir(follow_symlinks=False) and not is_excluded(entry.path):
                          root.has_children = True
                          break
         except: pass
@@ -153,7 +477,9 @@ def scan_with_python(root_path: str, max_depth: int = 1, excludes: Optional[List
     try:
         with os.scandir(root_path) as it:
             for entry in it:
-                if entry.is_dir():
+                # Symlinked directories are not entered (like find -type d and the parallel
+                # walker): a link to "." or ".." would otherwise recurse until max_depth
+                if entry.is_dir(follow_symlinks=False):
                     path = entry.path
                     # Check exclusions
                     if is_excluded(path): continue
@@ -169,6 +495,350 @@ def scan_with_python(root_path: str, max_depth: int = 1, excludes: Optional[List
         logger.error(f"Python scan failed at {root_path}: {e}")
         return root
 
+class _Lane:
+    """Workers and deques serving the directories of one filesystem (device)."""
+
+    def __init__(self, dev: int, workers: int, fstype: Optional[str]):
+        self.dev = dev
+        self.fstype = fstype
+        self.workers = workers
+        self.deques = [deque() for _ in range(workers)]
+        self.next_deque = 0 # Round-robin target for work handed over from other lanes
+
+class _ParallelWalker:
+    """Work-stealing directory walker with one worker lane per filesystem.
+
+    Every worker owns a deque: it pushes/pops its own work at the right end (depth-first,
+    good cache locality) and idle workers steal from the left end of the others in its lane (the
+    oldest, usually biggest subtrees). deque append/pop/popleft are atomic, so no queue lock is needed.
+    A directory that is a mount point is handed to the lane of its device, started on first use,
+    so a slow network mount only ties up its own (smaller) set of threads.
+    """
+
+    def __init__(self, max_depth: int, matcher: ExcludeMatcher, workers: int, previous=None, sizes: bool = False,
+                 status: Optional[ScanStatus] = None, limits: Optional[ScanLimits] = None, on_dir: Optional[Callable] = None,
+                 one_filesystem: bool = False, mounts: Optional[MountTable] = None):
+        self.max_depth = max_depth
+        self.one_filesystem = one_filesystem # Like find -xdev: mount points are listed but not entered
+        self.mounts = mounts or MountTable([])
+        self.on_dir = on_dir # on_dir(node, path, depth, has_children) once a directory is listed
+        self.status = status or ScanStatus()
+        self.limits = limits or ScanLimits()
+        self.sizes = sizes
+        self._links: Set[tuple] = set() # (dev, inode) of multiply-linked files already counted
+        self.previous = previous # TreeView of an earlier scan with the same parameters, or None
+        self.is_excluded = matcher.excluded
+        self.workers = max(1, workers)
+        self.lanes: Dict[int, _Lane] = {}
+        self.threads: List[threading.Thread] = []
+        self.root_dev = -1
+        self.pending = 0 # Queued + in-flight directories
+        self.scanned = 0
+        self.discovered = 1
+        self.reused = 0 # Directories whose listing was taken from `previous`
+        self.listed = 0 # scandir calls (lstat calls equal `scanned`)
+        self.file_stats = 0 # File lstats for sizes
+        self.started_ns = time.time_ns()
+        self.failure: Optional[BaseException] = None # First exception a worker died of
+        self._lock = threading.Lock()
+
+    def run(self, store: TreeStore):
+        self.store = store
+        self.pending = 1
+        self.limits.start()
+        self.root_dev = os.lstat(store.root_path).st_dev
+        lane = self._lane(self.root_dev)
+        lane.deques[0].append((0, store.root_path, 0, 0 if self.previous is not None else -1))
+        # Lanes of other devices start (and add threads) while the walk runs
+        joined = 0
+        while True:
+            with self._lock:
+                threads = self.threads[joined:]
+            if not threads:
+                break
+            for t in threads: t.join()
+            joined += len(threads)
+        if self.failure is not None:
+            # The dead worker's directories are missing: a truncated tree must not pass for a scan
+            raise RuntimeError(f"Scan worker failed: {self.failure}") from self.failure
+        self.status.update(scanned_dirs=self.scanned, total_dirs=self.discovered)
+
+    def _lane(self, dev: int) -> _Lane:
+        """The lane of a device, started with a worker count suited to its filesystem."""
+        with self._lock:
+            lane = self.lanes.get(dev)
+            if lane is not None:
+                return lane
+            mount = self.mounts.by_device.get(dev)
+            fstype = mount.fstype if mount else None
+            workers = min(self.workers, REMOTE_WORKERS) if is_remote(fstype) else self.workers
+            lane = self.lanes[dev] = _Lane(dev, workers, fstype)
+            profile = self.status.profile
+            target = profile.wrap(self._worker) if profile is not None else self._worker
+            threads = [threading.Thread(target=self._guarded, args=(target, lane, i), daemon=True) for i in range(workers)]
+            self.threads.extend(threads)
+        for t in threads: t.start()
+        if dev != self.root_dev:
+            logger.info(f"Scan lane for {mount.mount_point if mount else dev} ({fstype or 'unknown'}): {workers} workers")
+        return lane
+
+    def _guarded(self, target: Callable, lane: _Lane, idx: int):
+        try:
+            target(lane, idx)
+        except Exception as e:
+            logger.error(f"Scan worker {threading.current_thread().name} failed: {e!r}")
+            with self._lock:
+                if self.failure is None:
+                    self.failure = e
+
+    def _next_task(self, lane: _Lane, idx: int):
+        own = lane.deques[idx]
+        try:
+            return own.pop()
+        except IndexError:
+            pass
+        for offset in range(1, lane.workers):
+            try:
+                return lane.deques[(idx + offset) % lane.workers].popleft()
+            except IndexError:
+                continue
+        return None
+
+    def _worker(self, lane: _Lane, idx: int):
+        self.limits.lower_priority()
+        backoff = 0.0001
+        while True:
+            task = self._next_task(lane, idx)
+            if task is None:
+                if self.pending == 0:
+                    return
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 0.005)
+                continue
+            backoff = 0.0001
+            try:
+                if not self.status.cancelled and self.failure is None: # Once cancelled or failed, queued directories are only drained
+                    self._scan(lane, idx, *task)
+            finally:
+                with self._lock:
+                    self.pending -= 1
+
+    def _first_link(self, st: os.stat_result) -> bool:
+        """True the first time a multiply-linked inode is seen, so hard links count once."""
+        key = (st.st_dev, st.st_ino)
+        with self._lock:
+            if key in self._links:
+                return False
+            self._links.add(key)
+            return True
+
+    def _unchanged(self, prev: int, st: os.stat_result) -> bool:
+        if prev < 0:
+            return False
+        cols = self.previous.columns
+        return (cols["mtime"][prev] == st.st_mtime_ns
+                and cols["ctime"][prev] == st.st_ctime_ns
+                and cols["ino"][prev] == st.st_ino
+                and cols["dev"][prev] == st.st_dev)
+
+    def _scan(self, lane: _Lane, idx: int, node: int, path: str, depth: int, prev: int = -1):
+        store = self.store
+        previous = self.previous
+        histograms = store.histograms
+        names: List[str] = []
+        listed = stats = 0
+        self.limits.throttle(self.status)
+        try:
+            # stat before listing: a change made while we list still bumps the mtime we record
+            st = os.lstat(path)
+            mtime = st.st_mtime_ns if st.st_mtime_ns < self.started_ns - RACY_WINDOW_NS else -1
+            store.set_meta(node, mtime, st.st_ctime_ns, st.st_ino, st.st_dev)
+            if self.one_filesystem and st.st_dev != self.root_dev:
+                store.mark_has_children(node) # Not entered: assume it has contents, like an unexpanded node
+                return
+
+            if self._unchanged(prev, st):
+                # Listing is unchanged since the previous scan: reuse it, but still visit the
+                # children, whose own contents may have changed
+                self._count(reused=1)
+                if depth >= self.max_depth:
+                    if previous.has_children(prev):
+                        store.mark_truncated(node)
+                    return
+                prev_kids = list(previous.children(prev))
+                names = [previous.name(c) for c in prev_kids]
+                paths = [os.path.join(path, name) for name in names]
+            else:
+                listed = 1
+                leaf = depth >= self.max_depth
+                with os.scandir(path) as it:
+                    names = []
+                    paths = []
+                    files = nbytes = alloc = max_size = 0
+                    max_name = None
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.is_excluded(entry.path):
+                                continue
+                            if leaf:
+                                # Leaf of the requested depth: its files still count, its subdirectories
+                                # are not entered (has_children like scan_with_python, totals flagged)
+                                store.mark_truncated(node)
+                                if not self.sizes:
+                                    break
+                                continue
+                            names.append(entry.name)
+                            paths.append(entry.path)
+                        elif self.sizes:
+                            stats += 1
+                            try:
+                                fst = entry.stat(follow_symlinks=False)
+                            except OSError as e:
+                                self._error(e)
+                                continue
+                            if fst.st_nlink > 1 and not self._first_link(fst):
+                                continue
+                            files += 1
+                            if histograms is not None:
+                                histograms.add(node, entry.name, fst.st_size, fst.st_mtime_ns)
+                            nbytes += fst.st_size
+                            alloc += fst.st_blocks * 512
+                            if max_name is None or fst.st_size > max_size:
+                                max_size, max_name = fst.st_size, entry.name
+                    if self.sizes:
+                        store.set_own_sizes(node, files, nbytes, alloc, max_size, store.intern(max_name) if max_name is not None else -1)
+                prev_kids = [previous.child_by_name(prev, name) if prev >= 0 else -1 for name in names]
+        except PermissionError as e:
+            self._error(e)
+            return # Silent fail for perms
+        except OSError as e:
+            self._error(e)
+            logger.error(f"Parallel scan failed at {path}: {e}")
+            return
+        finally:
+            self._count(scanned=1, listed=listed, stats=stats)
+            if self.on_dir is not None:
+                # Before the children are queued, so a directory is always reported ahead of them
+                self.on_dir(node, path, depth, bool(names) or store.has_children(node))
+
+        if not names:
+            return
+        ids = store.add_children(node, names)
+        own = lane.deques[idx]
+        inline = []
+        queued = 0
+        for child, child_path, child_prev in zip(ids, paths, prev_kids):
+            mount = None if self.one_filesystem else self.mounts.by_path.get(child_path)
+            if mount is not None:
+                other = self._lane_for(mount)
+                if other is not lane:
+                    with self._lock:
+                        target = other.deques[other.next_deque % other.workers]
+                        other.next_deque += 1
+                    target.append((child, child_path, depth + 1, child_prev))
+                    queued += 1
+                    continue
+            if len(own) < MAX_QUEUED_DIRS:
+                own.append((child, child_path, depth + 1, child_prev))
+                queued += 1
+            else:
+                inline.append((child, child_path, child_prev))
+        self._count(discovered=len(names), pending=queued)
+        # Deque is full: walk the overflow on this thread (recursion is bounded by max_depth)
+        for child, child_path, child_prev in inline:
+            if self.status.cancelled:
+                break
+            self._scan(lane, idx, child, child_path, depth + 1, child_prev)
+
+    def _lane_for(self, mount: Mount) -> _Lane:
+        try:
+            return self._lane(device_number(mount.device))
+        except ValueError:
+            return self.lanes[self.root_dev]
+
+    def _error(self, e: OSError):
+        self.status.metrics.add_error(errno_name(e))
+
+    def _count(self, scanned: int = 0, discovered: int = 0, pending: int = 0, reused: int = 0, listed: int = 0, stats: int = 0):
+        with self._lock:
+            self.pending += pending
+            self.reused += reused
+            self.listed += listed
+            self.file_stats += stats
+            self.discovered += discovered
+            before = self.scanned
+            self.scanned += scanned
+            report = (before >> 8) != (self.scanned >> 8)
+        if report:
+            # Progress as the ratio of walked to discovered dirs; 100 is reserved for completion
+            progress = min(99, self.scanned * 100 // max(1, self.discovered))
+            self.status.update(scanned_dirs=self.scanned, total_dirs=self.discovered, progress=progress)
+
+def walk_parallel(root_path: str, max_depth: int = 50, excludes: Optional[List[str]] = None, workers: Optional[int] = None, previous=None, sizes: bool = False,
+                  status: Optional[ScanStatus] = None, limits: Optional[ScanLimits] = None, on_dir: Optional[Callable] = None,
+                  one_filesystem: bool = False, analytics: Optional[List[str]] = None) -> Optional[TreeStore]:
+    """Multi-threaded os.scandir walk producing the same tree as walk_with_find.
+
+    With `previous` (a TreeStore/Snapshot of the same root, depth and excludes), directories whose
+    mtime/ctime/inode/device are unchanged reuse the earlier listing instead of calling scandir.
+    With sizes=True every file is lstat'ed by the worker listing its directory and the totals are
+    rolled up afterwards; listings are never reused then, as file sizes change without touching
+    the directory's mtime. A cancelled (or out of budget, see ScanLimits) walk returns the
+    partial tree, with status.stop_reason set. on_dir, if given, is called from the worker threads
+    as each directory is listed (see stream.py); it may block to slow the walk down.
+    Every filesystem the walk enters gets its own worker lane (see _ParallelWalker); with
+    one_filesystem=True mount points below the root are recorded but not entered.
+    analytics (a list of pinned extensions, possibly empty) also builds the per-subtree file
+    histograms of analytics.py from the same lstat calls; it implies sizes.
+    """
+    root_path = os.path.abspath(root_path)
+    if not os.path.isdir(root_path): return None
+
+    status = status or ScanStatus()
+    status.update(is_scanning=True, progress=0, scanned_dirs=0, total_dirs=1, error=None)
+    metrics = status.metrics
+    metrics.engine = "parallel"
+    sizes = sizes or analytics is not None
+    store = TreeStore(root_path, sizes=sizes, histograms=Histograms(analytics) if analytics is not None else None)
+    if sizes or (previous is not None and (previous.root_path != root_path or "mtime" not in previous.columns)):
+        previous = None
+    status.update(incremental=previous is not None)
+    mounts = MountTable()
+    walker = _ParallelWalker(max_depth, exclude_matcher(excludes, root_path), min(workers or DEFAULT_WORKERS, MAX_WORKERS), previous, sizes, status, limits, on_dir,
+                             one_filesystem, mounts)
+
+    start = time.monotonic()
+    try:
+        # Listing and attaching nodes happen together on the workers: that is all "walk"
+        with metrics.phase("walk"):
+            walker.run(store)
+        with metrics.phase("build"):
+            store.rollup_sizes()
+            if store.histograms is not None:
+                store.histograms.rollup(store)
+            store.mounts = mounts.describe(set(store.columns["dev"]))
+    except Exception as e:
+        logger.error(f"Parallel scan threw exception: {e}")
+        status.update(is_scanning=False, error=str(e))
+        metrics.finish_walk(walker.scanned, time.monotonic() - start, "failed")
+        return None
+    metrics.add_calls(lstat=walker.scanned, scandir=walker.listed, stat=walker.file_stats)
+    metrics.finish_walk(walker.scanned, time.monotonic() - start, "cancelled" if status.cancelled else "done")
+    if status.cancelled:
+        logger.info(f"Parallel scan of {root_path} stopped ({status.stop_reason}) after {walker.scanned} dirs")
+        status.update(is_scanning=False)
+        return store
+
+    lanes = ", ".join(f"{lane.fstype or lane.dev}: {lane.workers}" for lane in walker.lanes.values())
+    logger.info(f"Parallel scan of {root_path}: {walker.scanned} dirs ({walker.reused} unchanged) in {time.monotonic() - start:.2f}s (workers per filesystem: {lanes})")
+    status.update(is_scanning=False, progress=100)
+    return store
+
+def scan_with_parallel(root_path: str, max_depth: int = 50, excludes: Optional[List[str]] = None, workers: Optional[int] = None, sizes: bool = False,
+                       status: Optional[ScanStatus] = None, limits: Optional[ScanLimits] = None, one_filesystem: bool = False) -> Optional["FileNode"]:
+    store = walk_parallel(root_path, max_depth, excludes, workers, sizes=sizes, status=status, limits=limits, one_filesystem=one_filesystem)
+    return store.to_filenode() if store else None
+
 def scan_directory(root_path, max_depth=1, excludes=None):
     """Primary entry point: Tries shell scan, falls back to Python."""
     # For depth 1, Python is faster and safer
@@ -186,6 +856,9 @@ def scan_directory(root_path, max_depth=1, excludes=None):
     logger.warning(f"Shell scan unavailable, falling back to Python for {root_path}")
     return scan_with_python(root_path, max_depth, excludes)
 
-def scan_directory_parallel(root_path, max_depth=50, excludes=None):
-    return scan_directory(root_path, max_depth, excludes)
+def scan_directory_parallel(root_path, max_depth=50, excludes=None, workers=None, sizes=False, limits=None, one_filesystem=False):
+    """Deep scans: work-stealing thread pool over os.scandir."""
+    if max_depth == 1 and not sizes and not one_filesystem:
+        return scan_with_python(root_path, 1, excludes)
+    return scan_with_parallel(root_path, max_depth, excludes, workers, sizes, limits=limits, one_filesystem=one_filesystem)
 
@@ -0,0 +1,159 @@
+import os
+import re
+import fnmatch
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Search index stored in the snapshot next to the sorted name table:
+#   by_name   node indices ordered by name id (name ids follow name order), pre-order within a name
+#   tri_keys  sorted trigrams of the lowercased UTF-8 basenames, packed into 24-bit ints
+#   tri_off   tri_post[tri_off[k]:tri_off[k+1]] are the (ascending) name ids containing tri_keys[k]
+# Queries narrow the candidate names via binary search / trigram intersection, then verify.
+MODES = ("prefix", "substring", "glob")
+_WILDCARDS = re.compile(r"[*?\[]")
+
+def _trigrams(data: bytes) -> set:
+    return {int.from_bytes(data[i:i + 3], "big") for i in range(len(data) - 2)}
+
+def build_search_sections(names: List[bytes], name_id, n: int) -> Dict[str, array]:
+    """Index sections for a snapshot whose name table is `names` (sorted) and nodes `name_id`."""
+    # Counting sort of the nodes by name id keeps pre-order within each name
+    counts = array("I", [0]) * (len(names) + 1)
+    for i in range(n):
+        counts[name_id[i] + 1] += 1
+    for k in range(1, len(counts)):
+        counts[k] += counts[k - 1]
+    by_name = array("I", [0]) * n
+    for i in range(n):
+        nid = name_id[i]
+        by_name[counts[nid]] = i
+        counts[nid] += 1
+
+    postings: Dict[int, array] = {}
+    for nid, raw in enumerate(names):
+        for tri in _trigrams(os.fsdecode(raw).lower().encode("utf-8", "surrogateescape")):
+            post = postings.get(tri)
+            if post is None:
+                post = postings[tri] = array("I")
+            post.append(nid)
+    tri_keys = array("I", sorted(postings))
+    tri_off = array("Q", [0])
+    tri_post = array("I")
+    for key in tri_keys:
+        tri_post.extend(postings[key])
+        tri_off.append(len(tri_post))
+    return {"by_name": by_name, "tri_keys": tri_keys, "tri_off": tri_off, "tri_post": tri_post}
+
+def _bisect(view, value, lo: int = 0, hi: Optional[int] = None, key=None) -> int:
+    """bisect_left over a memoryview (optionally through key), without Python 3.10's key=."""
+    hi = len(view) if hi is None else hi
+    while lo < hi:
+        mid = (lo + hi) // 2
+        current = view[mid] if key is None else key(mid)
+        if current < value:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+def _posting(snap, tri: int) -> Optional[memoryview]:
+    pos = _bisect(snap.tri_keys, tri)
+    if pos == len(snap.tri_keys) or snap.tri_keys[pos] != tri:
+        return None
+    return snap.tri_post[snap.tri_off[pos]:snap.tri_off[pos + 1]]
+
+def _trigram_candidates(snap, literals: List[str]) -> Optional[List[int]]:
+    """Name ids that contain every trigram of the given literals; None if nothing narrows it."""
+    tris = set()
+    for literal in literals:
+        tris |= _trigrams(literal.lower().encode("utf-8", "surrogateescape"))
+    if not tris:
+        return None
+    postings = []
+    for tri in tris:
+        post = _posting(snap, tri)
+        if post is None:
+            return []
+        postings.append(post)
+    postings.sort(key=len)
+    result = set(postings[0].tolist())
+    for post in postings[1:]:
+        result.intersection_update(post.tolist())
+        if not result:
+            break
+    return sorted(result)
+
+def _prefix_range(snap, prefix: str) -> Tuple[int, int]:
+    """Name ids [lo, hi) starting with prefix (case-sensitive: the name table is in str order)."""
+    count = snap.meta["names"]
+    lo = _bisect(None, prefix, 0, count, key=snap.name_by_id)
+    hi = _bisect(None, prefix + "\U0010ffff", lo, count, key=snap.name_by_id)
+    return lo, hi
+
+def match_names(snap, query: str, mode: str, case_sensitive: bool = False) -> Iterator[int]:
+    """Ascending name ids whose basename matches query."""
+    count = snap.meta["names"]
+    folded = query if case_sensitive else query.lower()
+
+    if mode == "prefix":
+        if case_sensitive:
+            yield from range(*_prefix_range(snap, query))
+            return
+        test = lambda name: name.lower().startswith(folded)
+        candidates = _trigram_candidates(snap, [query]) if len(query) >= 3 else None
+    elif mode == "substring":
+        test = (lambda name: folded in name) if case_sensitive else (lambda name: folded in name.lower())
+        candidates = _trigram_candidates(snap, [query]) if len(query) >= 3 else None
+    else:
+        regex = re.compile(fnmatch.translate(query), 0 if case_sensitive else re.IGNORECASE)
+        test = lambda name: regex.match(name) is not None
+        literals = [part for part in _WILDCARDS.split(re.sub(r"\[[^\]]*\]", "*", query)) if len(part) >= 3]
+        candidates = _trigram_candidates(snap, literals)
+        if candidates is None and case_sensitive and not _WILDCARDS.match(query):
+            # Literal head: only the names sharing it can match
+            head = _WILDCARDS.split(query, 1)[0]
+            candidates = range(*_prefix_range(snap, head))
+
+    for nid in (range(count) if candidates is None else candidates):
+        if test(snap.name_by_id(nid)):
+            yield nid
+
+def search(snap, query: str, mode: str = "substring", scope: int = 0, offset: int = 0, limit: int = 100,
+           case_sensitive: bool = False) -> Tuple[List[int], int]:
+    """Matching directory indices (ordered by name, then path) for one page, plus the total count.
+
+    Patterns containing "/" are matched against the full path; the last segment still narrows
+    the candidates through the name index.
+    """
+    path_pattern = None
+    if "/" in query:
+        pattern = query if mode == "glob" else f"*{query}*"
+        if not pattern.startswith(("/", "*")):
+            pattern = "*/" + pattern # Relative patterns match any trailing part of the path
+        path_pattern = re.compile(fnmatch.translate(pattern), 0 if case_sensitive else re.IGNORECASE)
+        last = query.rsplit("/", 1)[1]
+        if mode != "glob":
+            # Whatever follows the last "/" must be the start of the basename
+            query, mode = (last, "prefix") if last else ("*", "glob")
+        else:
+            query = last or "*"
+
+    lo, hi = scope, snap.end[scope]
+    by_name = snap.by_name
+    name_of = lambda k: snap.name_id[by_name[k]]
+    page: List[int] = []
+    total = 0
+    for nid in match_names(snap, query, mode, case_sensitive):
+        start = _bisect(None, nid, 0, len(by_name), key=name_of)
+        for k in range(start, len(by_name)):
+            idx = by_name[k]
+            if snap.name_id[idx] != nid:
+                break
+            if not lo <= idx < hi:
+                continue
+            if path_pattern is not None and not path_pattern.match(snap.path(idx)):
+                continue
+            if offset <= total < offset + limit:
+                page.append(idx)
+            total += 1
+    return page, total
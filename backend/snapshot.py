@@ -0,0 +1,288 @@
+import os
+import sys
+import json
+import mmap
+import struct
+import threading
+import logging
+from array import array
+from typing import Any, Dict, Iterator, Optional
+from treestore import TreeStore, TreeView, HAS_CHILDREN, INDEX_COLUMNS, NAME_COLUMNS
+from search import build_search_sections
+from analytics import SLOTS, Histograms
+
+logger = logging.getLogger("nuxview.snapshot")
+
+# File layout (native byte order, recorded in the header):
+#   MAGIC | u32 version | u32 header length | JSON header | sections, each 8-byte aligned
+# The header maps section name -> [offset, typecode, count]. Nodes are stored in depth-first
+# pre-order with siblings sorted by name, so the subtree of node i is the range [i, end[i]) and
+# children(i) is a contiguous slice of child_table that can be binary-searched by name.
+# Precomputed orderings for top-N queries (see query.py): column -> descending?
+# Stored as "sorted_<column>" sections of node indices; age ignores unknown/racy mtimes (<= 0).
+SORTED_INDEXES = {"total_bytes": True, "total_alloc": True, "total_files": True, "mtime": False}
+
+MAGIC = b"NUXVSNAP"
+VERSION = 1
+_PREFIX = struct.Struct("=8sII")
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+def write_snapshot(store: TreeStore, path, meta: Optional[Dict[str, Any]] = None):
+    """Serializes a TreeStore to path via a temp file + rename, so readers never see a partial file."""
+
+    # Sorted, de-duplicated name table; remap the store's name ids onto it
+    order = sorted(range(len(store.names)), key=store.names.__getitem__)
+    remap = array("I", bytes(4 * len(order)))
+    for new_id, old_id in enumerate(order):
+        remap[old_id] = new_id
+    pool = bytearray()
+    name_off = array("Q", [0])
+    encoded_names = []
+    for old_id in order:
+        raw = os.fsencode(store.names[old_id])
+        encoded_names.append(raw)
+        pool += raw
+        name_off.append(len(pool))
+
+    # Subtree sizes bottom-up. Rows detached by the watcher are skipped, and moved rows may sit
+    # before their new parent, so walk the live tree rather than the index range.
+    size = array("I", [1]) * len(store)
+    for idx in store.postorder():
+        if idx:
+            size[store.parent[idx]] += size[idx]
+    n = size[0]
+
+    # Depth-first renumbering with name-sorted siblings. In pre-order the first child of `new`
+    # is new+1 and each following sibling starts right after the previous sibling's subtree.
+    parent = array("i", [-1]) * n
+    name_id = array("I", [0]) * n
+    end = array("I", [0]) * n
+    flags = bytearray(n)
+    child_off = array("I", [0]) * n
+    child_count = array("I", [0]) * n
+    child_table = array("I", [0]) * max(0, n - 1)
+
+    perm = array("I", [0]) * n # new index -> store index, to carry the extra columns over
+
+    stack = [(0, -1)]
+    nxt = 0
+    table_pos = 0
+    while stack:
+        old, new_parent = stack.pop()
+        new = nxt
+        nxt += 1
+        perm[new] = old
+        parent[new] = new_parent
+        name_id[new] = remap[store.name_id[old]]
+        end[new] = new + size[old]
+        flags[new] = store.flags[old]
+        kids = sorted(store.children(old), key=lambda c: remap[store.name_id[c]])
+        child_off[new] = table_pos
+        child_count[new] = len(kids)
+        pos = new + 1
+        for c in kids:
+            child_table[table_pos] = pos
+            table_pos += 1
+            pos += size[c]
+        for c in reversed(kids):
+            stack.append((c, new))
+
+    sections = {
+        "parent": parent,
+        "name_id": name_id,
+        "end": end,
+        "flags": array("B", flags),
+        "child_off": child_off,
+        "child_count": child_count,
+        "child_table": child_table,
+        "name_off": name_off,
+        "name_pool": array("B", pool),
+    }
+    sections.update(build_search_sections(encoded_names, name_id, n))
+    columns = getattr(store, "columns", {})
+    if columns.keys() & INDEX_COLUMNS:
+        new_of = array("i", [-1]) * len(store)
+        for new, old in enumerate(perm):
+            new_of[old] = new
+    for name, col in columns.items():
+        values = array(col.typecode, map(col.__getitem__, perm))
+        if name in INDEX_COLUMNS:
+            values = array(col.typecode, (new_of[v] if v >= 0 else -1 for v in values))
+        elif name in NAME_COLUMNS:
+            values = array(col.typecode, (remap[v] if v >= 0 else -1 for v in values))
+        sections["col_" + name] = values
+        if name in SORTED_INDEXES:
+            candidates = range(n) if SORTED_INDEXES[name] else [i for i in range(n) if values[i] > 0]
+            sections["sorted_" + name] = array("I", sorted(candidates, key=values.__getitem__, reverse=SORTED_INDEXES[name]))
+    histograms = getattr(store, "histograms", None)
+    if histograms is not None:
+        sections.update(histograms.sections(perm))
+    header = dict(meta or {})
+    header.update({"root_path": store.root_path, "nodes": n, "names": len(order), "byteorder": sys.byteorder,
+                   "columns": list(columns), "mounts": {str(dev): m for dev, m in getattr(store, "mounts", {}).items()}})
+    if histograms is not None:
+        header["analytics"] = histograms.layout()
+
+    # Section offsets depend on the header length, and the header contains the offsets:
+    # iterate until the encoded header stops growing (two passes in practice)
+    header_len = 0
+    while True:
+        offset = _align(_PREFIX.size + header_len)
+        table = {}
+        for name, arr in sections.items():
+            table[name] = [offset, arr.typecode, len(arr)]
+            offset = _align(offset + len(arr) * arr.itemsize)
+        header["sections"] = table
+        encoded = json.dumps(header).encode()
+        if len(encoded) <= header_len:
+            break
+        header_len = len(encoded) + 64
+
+    path = str(path)
+    tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(_PREFIX.pack(MAGIC, VERSION, header_len))
+            f.write(encoded.ljust(header_len))
+            for name, arr in sections.items():
+                f.seek(table[name][0])
+                arr.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+class Snapshot(TreeView):
+    """Read-only view over a snapshot file; every lookup reads straight from the mmap."""
+
+    def __init__(self, path):
+        self.file_path = str(path)
+        with open(self.file_path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, header_len = _PREFIX.unpack_from(self._mm, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Not a NuxView snapshot (v{VERSION}): {self.file_path}")
+            self.meta = json.loads(bytes(self._mm[_PREFIX.size:_PREFIX.size + header_len]))
+            if self.meta.get("byteorder") != sys.byteorder:
+                raise ValueError("Snapshot was written on a host with a different byte order")
+        except Exception:
+            self._mm.close()
+            raise
+
+        self.root_path = self.meta["root_path"]
+        self.mounts = {int(dev): m for dev, m in self.meta.get("mounts", {}).items()}
+        self.columns = {}
+        self.sorted_indexes = {}
+        self._views = []
+        for name, (offset, typecode, count) in self.meta["sections"].items():
+            itemsize = array(typecode).itemsize
+            view = memoryview(self._mm)[offset:offset + count * itemsize].cast(typecode)
+            self._views.append(view)
+            if name.startswith("col_"):
+                self.columns[name[4:]] = view
+            elif name.startswith("sorted_"):
+                self.sorted_indexes[name[7:]] = view
+            else:
+                setattr(self, name, view)
+        layout = self.meta.get("analytics")
+        self.histograms = None
+        if isinstance(layout, dict) and hasattr(self, "hist_count") and hasattr(self, "hist_bytes"):
+            self.histograms = Histograms.from_layout(layout, self.hist_count, self.hist_bytes)
+
+    def __len__(self) -> int:
+        return self.meta["nodes"]
+
+    def check(self):
+        """ValueError unless the tree sections are all there, sized and in range (for files from elsewhere)."""
+        n, names = self.meta.get("nodes"), self.meta.get("names")
+        if not isinstance(n, int) or not isinstance(names, int) or n < 1 or names < 1:
+            raise ValueError("Bad node or name count")
+        expected = {"parent": n, "name_id": n, "end": n, "flags": n, "child_off": n, "child_count": n,
+                    "child_table": n - 1, "name_off": names + 1}
+        for name, length in expected.items():
+            if len(getattr(self, name, ())) != length:
+                raise ValueError(f"Section {name} missing or truncated")
+        for name, view in self.columns.items():
+            if len(view) != n:
+                raise ValueError(f"Column {name} truncated")
+        for name, view in self.sorted_indexes.items():
+            if len(view) > n or (len(view) and max(view) >= n):
+                raise ValueError(f"Index {name} out of range")
+        if self.histograms is not None and not len(self.hist_count) == len(self.hist_bytes) == n * SLOTS:
+            raise ValueError("Histogram sections truncated")
+        if len(getattr(self, "name_pool", ())) < self.name_off[names]:
+            raise ValueError("Name pool truncated")
+        for name, low, high in (("parent", -1, n - 1), ("end", 1, n), ("child_table", 1, n - 1),
+                                ("child_off", 0, max(0, n - 1)), ("child_count", 0, n - 1), ("name_id", 0, names - 1)):
+            view = getattr(self, name)
+            if len(view) and (min(view) < low or max(view) > high):
+                raise ValueError(f"Section {name} out of range")
+        # Pre-order structure: parents come first and subtrees nest, so walking up (path()) or
+        # down (children(), walk()) always ends; a cycle would hang every reader of the file
+        parent, end = self.parent.tolist(), self.end.tolist()
+        child_off, child_count, child_table = self.child_off.tolist(), self.child_count.tolist(), self.child_table.tolist()
+        if parent[0] != -1 or end[0] != n:
+            raise ValueError("Bad root node")
+        for i in range(n):
+            if i and not (0 <= parent[i] < i and end[i] <= end[parent[i]]):
+                raise ValueError(f"Node {i} is not inside its parent")
+            if end[i] <= i:
+                raise ValueError(f"Node {i} has a bad subtree end")
+            off = child_off[i]
+            if off + child_count[i] > len(child_table):
+                raise ValueError(f"Node {i} has a bad child list")
+            # Children tile the subtree: the first starts at i + 1, each next one where the previous ends
+            pos = i + 1
+            for child in child_table[off:off + child_count[i]]:
+                if child != pos or parent[child] != i:
+                    raise ValueError(f"Node {i} lists a child outside its subtree")
+                pos = end[child]
+            if pos != end[i]:
+                raise ValueError(f"Node {i} has a bad subtree end")
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._mm.close()
+
+    def name(self, idx: int) -> str:
+        return self.name_by_id(self.name_id[idx])
+
+    def name_by_id(self, nid: int) -> str:
+        return os.fsdecode(self.name_pool[self.name_off[nid]:self.name_off[nid + 1]].tobytes())
+
+    def has_children(self, idx: int) -> bool:
+        return bool(self.flags[idx] & HAS_CHILDREN)
+
+    def children(self, idx: int) -> Iterator[int]:
+        off = self.child_off[idx]
+        # tolist() so no slice keeps an export of the mmap alive after close()
+        return iter(self.child_table[off:off + self.child_count[idx]].tolist())
+
+    def subtree_range(self, idx: int) -> range:
+        return range(idx, self.end[idx])
+
+    def child_by_name(self, idx: int, name: str) -> int:
+        # Siblings are sorted by name id and name ids follow name order: binary search
+        off = self.child_off[idx]
+        lo, hi = 0, self.child_count[idx]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            child = self.child_table[off + mid]
+            current = self.name(child)
+            if current == name:
+                return child
+            if current < name:
+                lo = mid + 1
+            else:
+                hi = mid
+        return -1
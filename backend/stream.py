@@ -0,0 +1,169 @@
+import os
+import queue
+import asyncio
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+from fastapi.responses import StreamingResponse
+from scanner import ScanLimits, ScanStatus, walk_parallel
+from treestore import TreeView
+from records import encode as _line, dir_record, node_record
+from workpool import PoolBusy, io_pool, scan_pool
+
+# NDJSON tree streaming. Every line is one JSON object with a "kind":
+#   start  - {path, timestamp, order, ...} before any node
+#   node   - one directory in FileNode shape without children, plus "parent" (its parent's path,
+#            null for the root) and "depth"; a parent always comes before its children
+#   sizes  - rolled-up size fields of an already sent node (live scans with sizes=true only,
+#            sent after the walk as totals are only known once every directory was listed)
+#   end    - {nodes, stop_reason}; a stream that ends without it was cut off
+#   error  - {detail}; the stream ends after it
+# Lines are sent in chunks of about CHUNK_BYTES so the server never holds more than a chunk of
+# encoded output per client, and the client can render as the chunks arrive.
+MEDIA_TYPE = "application/x-ndjson"
+ORDERS = ("dfs", "bfs")
+CHUNK_BYTES = 64 * 1024
+FEED_BACKLOG = 4096 # Directories a live walk may run ahead of the client before it blocks
+FEED_POLL = 0.25 # Seconds a drain waits for the walk before flushing what it has
+
+def _next_chunk(lines: Iterator[bytes], lock=None) -> bytes:
+    """Encodes lines until the chunk is full; b"" once the iterator is exhausted."""
+    if lock is not None:
+        with lock:
+            return _next_chunk(lines)
+    chunk = bytearray()
+    for line in lines:
+        chunk += line
+        if len(chunk) >= CHUNK_BYTES:
+            break
+    return bytes(chunk)
+
+async def _pull(fn, *args) -> Any:
+    """io_pool.run, but waits for a free slot instead of failing halfway through a response."""
+    while True:
+        try:
+            return await io_pool.run(fn, *args)
+        except PoolBusy:
+            await asyncio.sleep(0.1)
+
+async def _respond(chunks: AsyncIterator[bytes]) -> StreamingResponse:
+    # The first chunk is produced before the response starts: errors and a busy pool (429)
+    # still surface as regular HTTP errors rather than a truncated stream
+    first = await chunks.__anext__()
+
+    async def body():
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    return StreamingResponse(body(), media_type=MEDIA_TYPE, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+async def stream_tree(view: TreeView, idx: int, depth: Optional[int], order: str, lock=None,
+                      start: Optional[Dict[str, Any]] = None) -> StreamingResponse:
+    """Streams the subtree at idx (`depth` levels, or all of it) of a cached tree as NDJSON.
+
+    A watched tree is locked per chunk, not for the whole response; changes made in between show
+    up in the watcher's deltas after the version announced in the start line.
+    """
+    def lines() -> Iterator[bytes]:
+        yield _line({"kind": "start", "path": view.path(idx), "order": order, **(start or {})})
+        count = 0
+        for node, path, level in view.walk(idx, depth, order):
+            count += 1
+            yield _line(node_record(view, node, path, level))
+        yield _line({"kind": "end", "nodes": count, "stop_reason": None})
+
+    async def chunks():
+        it = lines()
+        first = await io_pool.run(_next_chunk, it, lock)
+        yield first
+        while True:
+            chunk = await _pull(_next_chunk, it, lock)
+            if not chunk:
+                return
+            yield chunk
+
+    return await _respond(chunks())
+
+class _LiveFeed:
+    """Hands directories from the walker threads to the response, in discovery order.
+
+    The queue is bounded: when the client reads slower than the disk is walked, put() blocks the
+    walker instead of buffering the tree. A disconnect cancels the walk via its status.
+    """
+
+    def __init__(self, status: ScanStatus):
+        self.status = status
+        self.queue: "queue.Queue[bytes]" = queue.Queue(maxsize=FEED_BACKLOG)
+        self.done = False # Set by the walk once it returned; the queue then only drains
+
+    def on_dir(self, node: int, path: str, depth: int, has_children: bool):
+        line = _line(dir_record(node, path, depth, has_children))
+        while not self.status.cancelled:
+            try:
+                self.queue.put(line, timeout=FEED_POLL)
+                return
+            except queue.Full:
+                continue
+
+    def close(self):
+        self.done = True
+
+    def drain(self) -> Optional[bytes]:
+        """Up to a chunk of queued lines; b"" if the walk produced nothing for a while, None at the end."""
+        chunk = bytearray()
+        try:
+            chunk += self.queue.get(timeout=FEED_POLL)
+            while len(chunk) < CHUNK_BYTES:
+                chunk += self.queue.get_nowait()
+        except queue.Empty:
+            if not chunk and self.done:
+                return None
+        return bytes(chunk)
+
+async def stream_scan(root_path: str, max_depth: int, excludes: List[str], workers: Optional[int], sizes: bool,
+                      limits: ScanLimits, one_filesystem: bool = False) -> StreamingResponse:
+    """Live parallel walk whose directories are streamed as NDJSON while they are listed.
+
+    The walk runs on scan_pool like a regular /api/scan; leaving early (client gone) cancels it.
+    """
+    root_path = os.path.abspath(root_path)
+    status = ScanStatus()
+    feed = _LiveFeed(status)
+
+    def walk():
+        try:
+            return walk_parallel(root_path, max_depth, excludes, workers, sizes=sizes, status=status, limits=limits,
+                                 on_dir=feed.on_dir, one_filesystem=one_filesystem)
+        finally:
+            feed.close()
+
+    task = asyncio.ensure_future(scan_pool.run(walk))
+    await asyncio.sleep(0) # Let the task reach the pool: a full scan_pool raises PoolBusy (429) here
+    if task.done():
+        task.result()
+
+    async def chunks():
+        try:
+            yield _line({"kind": "start", "path": root_path, "order": "discovery", "max_depth": max_depth, "sizes": sizes})
+            while True:
+                chunk = await _pull(feed.drain)
+                if chunk is None:
+                    break
+                if chunk:
+                    yield chunk
+            store = await task
+            if store is None:
+                yield _line({"kind": "error", "detail": status.error or f"Could not scan {root_path}"})
+                return
+            if sizes:
+                lines = (_line({"kind": "sizes", "path": path, **store.size_fields(idx)}) for idx, path, _ in store.walk())
+                while True:
+                    chunk = await _pull(_next_chunk, lines)
+                    if not chunk:
+                        break
+                    yield chunk
+            yield _line({"kind": "end", "nodes": len(store), "stop_reason": status.stop_reason})
+        finally:
+            if not task.done():
+                status.cancel("client disconnected")
+
+    return await _respond(chunks())
@@ -0,0 +1,379 @@
+import os
+import threading
+from array import array
+from collections import deque
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Any, Tuple
+
+if TYPE_CHECKING:
+    from models import FileNode # Imported on use: the scanner CLI runs without pydantic
+
+HAS_CHILDREN = 1
+REMOVED = 2 # Tombstone left by TreeStore.remove(); indices stay stable for the watcher
+# Subdirectories cut off by max_depth: their files are missing from the totals. Set on the leaf
+# by the walkers and on its ancestors by rollup_sizes().
+TRUNCATED = 4
+
+# Per-directory metadata recorded by the walkers (used by incremental rescans)
+META_COLUMNS = {"mtime": "q", "ctime": "q", "ino": "Q", "dev": "Q"}
+
+# du-style aggregation (scans with sizes=True). The first group covers the files directly in a
+# directory, the second is rolled up over the whole subtree by rollup_sizes().
+SIZE_COLUMNS = {
+    "files": "Q", "bytes": "Q", "alloc": "Q", "max_size": "Q", "max_name": "i",
+    "total_files": "Q", "total_bytes": "Q", "total_alloc": "Q",
+    "largest_size": "Q", "largest_dir": "i", "largest_name": "i",
+}
+# Columns holding node indices / name ids; the snapshot writer renumbers them
+INDEX_COLUMNS = {"largest_dir"}
+NAME_COLUMNS = {"max_name", "largest_name"}
+
+class TreeView:
+    """Read API shared by the in-memory TreeStore and the mmap'ed Snapshot.
+
+    Subclasses provide root_path, parent, name(), children() and has_children(); node 0 is the root.
+    """
+
+    root_path: str
+    mounts: Dict[int, Dict[str, Any]] = {}
+
+    def path(self, idx: int) -> str:
+        if idx == 0:
+            return self.root_path
+        parts = []
+        while idx > 0:
+            parts.append(self.name(idx))
+            idx = self.parent[idx]
+        parts.reverse()
+        return os.path.join(self.root_path, *parts)
+
+    def child_by_name(self, idx: int, name: str) -> int:
+        for child in self.children(idx):
+            if self.name(child) == name:
+                return child
+        return -1
+
+    def find(self, path: str) -> int:
+        """Index of the directory at path, or -1 if it is not part of this tree."""
+        path = os.path.abspath(path)
+        if path == self.root_path:
+            return 0
+        rel = os.path.relpath(path, self.root_path)
+        if rel.startswith(".."):
+            return -1
+        idx = 0
+        for part in rel.split(os.sep):
+            idx = self.child_by_name(idx, part)
+            if idx < 0:
+                return -1
+        return idx
+
+    def name_by_id(self, nid: int) -> str:
+        raise NotImplementedError
+
+    def size_fields(self, idx: int) -> Dict[str, Any]:
+        """Rolled-up size/count fields of a node, or {} when the scan did not gather sizes."""
+        cols = self.columns
+        if "total_bytes" not in cols:
+            return {}
+        fields = {
+            "size": cols["total_bytes"][idx],
+            "allocated": cols["total_alloc"][idx],
+            "file_count": cols["total_files"][idx],
+        }
+        if self.flags[idx] & TRUNCATED:
+            fields["truncated"] = True
+        largest_dir = cols["largest_dir"][idx]
+        if largest_dir >= 0:
+            fields["largest_file"] = os.path.join(self.path(largest_dir), self.name_by_id(cols["largest_name"][idx]))
+            fields["largest_file_size"] = cols["largest_size"][idx]
+        return fields
+
+    def histogram(self, idx: int) -> Optional[Dict[str, Any]]:
+        """Files below a node by extension, size and age (scans with analytics=True), else None."""
+        hist = getattr(self, "histograms", None)
+        return hist.describe(idx) if hist is not None else None
+
+    def mount_fields(self, idx: int) -> Dict[str, Any]:
+        """Filesystem of a node where it changes (the root and mount points); children inherit it."""
+        dev = self.columns["dev"]
+        if idx and dev[idx] == dev[self.parent[idx]]:
+            return {}
+        mount = self.mounts.get(dev[idx])
+        if mount is None:
+            return {}
+        return {"device": f"{os.major(dev[idx])}:{os.minor(dev[idx])}", "fstype": mount["fstype"],
+                "mount_point": mount["mount_point"], "remote": mount["remote"]}
+
+    def to_dict(self, idx: int = 0, depth: Optional[int] = None, path: Optional[str] = None) -> Dict[str, Any]:
+        """Plain-dict subtree with the same shape as FileNode.model_dump()."""
+        path = path or self.path(idx)
+        children = []
+        if depth is None or depth > 0:
+            next_depth = None if depth is None else depth - 1
+            for child in self.children(idx):
+                children.append(self.to_dict(child, next_depth, os.path.join(path, self.name(child))))
+        node = {
+            "name": self.name(idx),
+            "path": path,
+            "type": "directory",
+            "children": children,
+            "has_children": self.has_children(idx),
+        }
+        node.update(self.size_fields(idx))
+        node.update(self.mount_fields(idx))
+        return node
+
+    def walk(self, idx: int = 0, depth: Optional[int] = None, order: str = "dfs") -> Iterator[Tuple[int, str, int]]:
+        """(index, path, level) for the subtree at idx, parents before children, without recursion.
+
+        "dfs" is pre-order (each directory followed by its subtree), "bfs" goes level by level.
+        """
+        breadth_first = order == "bfs"
+        pending = deque([(idx, self.path(idx), 0)])
+        while pending:
+            node, path, level = pending.popleft() if breadth_first else pending.pop()
+            yield node, path, level
+            if depth is not None and level >= depth:
+                continue
+            kids = [(child, os.path.join(path, self.name(child)), level + 1) for child in self.children(node)]
+            pending.extend(kids if breadth_first else reversed(kids))
+
+    def to_filenode(self, idx: int = 0, depth: Optional[int] = None) -> "FileNode":
+        """Materializes the subtree at idx (optionally only `depth` levels) as FileNode objects."""
+        from models import FileNode
+        return FileNode.model_validate(self.to_dict(idx, depth))
+
+class TreeStore(TreeView):
+    """Columnar directory tree used by the scanners.
+
+    One row per directory: parent / first_child / last_child / next_sibling index arrays and an
+    interned name id. Paths are rebuilt from the parent chain on demand, and FileNode objects
+    are only materialized for the subtrees the API actually returns.
+    """
+
+    def __init__(self, root_path: str, sizes: bool = False, histograms=None):
+        self.root_path = root_path
+        self.histograms = histograms # analytics.Histograms: one counter row per node, kept in step by _append
+        self.parent = array("i")
+        self.name_id = array("i")
+        self.first_child = array("i")
+        self.last_child = array("i")
+        self.next_sibling = array("i")
+        self.flags = bytearray()
+        self.names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        self.columns: Dict[str, array] = {name: array(tc) for name, tc in META_COLUMNS.items()}
+        if sizes:
+            self.columns.update({name: array(tc) for name, tc in SIZE_COLUMNS.items()})
+        self._defaults = [(col, -1 if name in INDEX_COLUMNS or name in NAME_COLUMNS else 0) for name, col in self.columns.items()]
+        self.mounts: Dict[int, Dict[str, Any]] = {} # st_dev -> mount description (see mounts.MountTable)
+        self._lock = threading.Lock()
+        self._append(-1, os.path.basename(root_path) or "/")
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def _intern(self, name: str) -> int:
+        nid = self._name_ids.get(name)
+        if nid is None:
+            nid = len(self.names)
+            self._name_ids[name] = nid
+            self.names.append(name)
+        return nid
+
+    def _append(self, parent: int, name: str) -> int:
+        idx = len(self.parent)
+        self.parent.append(parent)
+        self.name_id.append(self._intern(name))
+        self.first_child.append(-1)
+        self.last_child.append(-1)
+        self.next_sibling.append(-1)
+        self.flags.append(0)
+        for col, default in self._defaults:
+            col.append(default)
+        if self.histograms is not None:
+            self.histograms.grow()
+        if parent >= 0:
+            self._link(parent, idx)
+        return idx
+
+    def _link(self, parent: int, idx: int):
+        self.parent[idx] = parent
+        self.next_sibling[idx] = -1
+        last = self.last_child[parent]
+        if last < 0:
+            self.first_child[parent] = idx
+        else:
+            self.next_sibling[last] = idx
+        self.last_child[parent] = idx
+        self.flags[parent] |= HAS_CHILDREN
+
+    def _unlink(self, idx: int):
+        parent = self.parent[idx]
+        prev = -1
+        child = self.first_child[parent]
+        while child >= 0 and child != idx:
+            prev = child
+            child = self.next_sibling[child]
+        if child < 0:
+            return
+        nxt = self.next_sibling[idx]
+        if prev < 0:
+            self.first_child[parent] = nxt
+        else:
+            self.next_sibling[prev] = nxt
+        if self.last_child[parent] == idx:
+            self.last_child[parent] = prev
+        if self.first_child[parent] < 0:
+            self.flags[parent] &= ~HAS_CHILDREN
+        self.next_sibling[idx] = -1
+
+    def add(self, parent: int, name: str) -> int:
+        """Appends one directory under parent and returns its index (single writer only)."""
+        return self._append(parent, name)
+
+    def add_children(self, parent: int, names: List[str]) -> range:
+        """Appends a batch of sibling directories; safe to call from several threads."""
+        with self._lock:
+            start = len(self.parent)
+            for name in names:
+                self._append(parent, name)
+            return range(start, len(self.parent))
+
+    def remove(self, idx: int):
+        """Detaches a directory (and with it its subtree); the row stays as a tombstone."""
+        with self._lock:
+            self._unlink(idx)
+            self.flags[idx] |= REMOVED
+
+    def move(self, idx: int, new_parent: int, new_name: str):
+        """Re-parents and/or renames a directory; its subtree moves with it."""
+        with self._lock:
+            self._unlink(idx)
+            self.name_id[idx] = self._intern(new_name)
+            self._link(new_parent, idx)
+
+    def postorder(self, idx: int = 0) -> Iterator[int]:
+        """Reachable nodes under idx, every child before its parent."""
+        stack = [(idx, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded:
+                yield node
+                continue
+            stack.append((node, True))
+            for child in self.children(node):
+                stack.append((child, False))
+
+    def set_meta(self, idx: int, mtime: int, ctime: int, ino: int, dev: int):
+        cols = self.columns
+        cols["mtime"][idx] = mtime
+        cols["ctime"][idx] = ctime
+        cols["ino"][idx] = ino
+        cols["dev"][idx] = dev
+
+    def mark_has_children(self, idx: int):
+        self.flags[idx] |= HAS_CHILDREN
+
+    def mark_truncated(self, idx: int):
+        self.flags[idx] |= HAS_CHILDREN | TRUNCATED
+
+    def has_children(self, idx: int) -> bool:
+        return bool(self.flags[idx] & HAS_CHILDREN)
+
+    def name(self, idx: int) -> str:
+        return self.names[self.name_id[idx]]
+
+    def name_by_id(self, nid: int) -> str:
+        return self.names[nid]
+
+    def intern(self, name: str) -> int:
+        with self._lock:
+            return self._intern(name)
+
+    def set_own_sizes(self, idx: int, files: int, nbytes: int, alloc: int, max_size: int, max_name: int):
+        cols = self.columns
+        cols["files"][idx] = files
+        cols["bytes"][idx] = nbytes
+        cols["alloc"][idx] = alloc
+        cols["max_size"][idx] = max_size
+        cols["max_name"][idx] = max_name
+
+    def rollup_sizes(self):
+        """Sums each directory's own file counts/bytes over its subtree, bottom-up, in one pass.
+
+        A truncated directory (see TRUNCATED) also marks every ancestor whose totals it is part of.
+        """
+        cols = self.columns
+        if "total_bytes" not in cols:
+            return
+        files, nbytes, alloc = cols["files"], cols["bytes"], cols["alloc"]
+        t_files, t_bytes, t_alloc = cols["total_files"], cols["total_bytes"], cols["total_alloc"]
+        l_size, l_dir, l_name = cols["largest_size"], cols["largest_dir"], cols["largest_name"]
+        for idx in self.postorder():
+            # Children were visited first and have already added themselves into t_* of idx
+            t_files[idx] += files[idx]
+            t_bytes[idx] += nbytes[idx]
+            t_alloc[idx] += alloc[idx]
+            if cols["max_name"][idx] >= 0 and cols["max_size"][idx] >= l_size[idx]:
+                l_size[idx] = cols["max_size"][idx]
+                l_dir[idx] = idx
+                l_name[idx] = cols["max_name"][idx]
+            if idx:
+                p = self.parent[idx]
+                self.flags[p] |= self.flags[idx] & TRUNCATED
+                t_files[p] += t_files[idx]
+                t_bytes[p] += t_bytes[idx]
+                t_alloc[p] += t_alloc[idx]
+                if l_dir[idx] >= 0 and l_size[idx] > l_size[p]:
+                    l_size[p] = l_size[idx]
+                    l_dir[p] = l_dir[idx]
+                    l_name[p] = l_name[idx]
+
+    def children(self, idx: int) -> Iterator[int]:
+        child = self.first_child[idx]
+        while child >= 0:
+            yield child
+            child = self.next_sibling[child]
+
+    @classmethod
+    def from_view(cls, view: TreeView) -> "TreeStore":
+        """Copies any TreeView (e.g. a Snapshot) into a mutable store, keeping shared columns."""
+        view_columns = getattr(view, "columns", {})
+        store = cls(view.root_path, sizes="total_bytes" in view_columns)
+        store.mounts = dict(getattr(view, "mounts", {}))
+        columns = [(name, store.columns[name], view_columns[name]) for name in store.columns if name in view_columns]
+        mapping = {0: 0}
+        stack = [(0, 0)]
+        while stack:
+            idx, src = stack.pop()
+            if view.has_children(src):
+                store.mark_has_children(idx)
+            store.flags[idx] |= view.flags[src] & TRUNCATED
+            for name, dst_col, src_col in columns:
+                value = src_col[src]
+                if name in NAME_COLUMNS and value >= 0:
+                    value = store._intern(view.name_by_id(value))
+                dst_col[idx] = value
+            for child in view.children(src):
+                new = store.add(idx, view.name(child))
+                mapping[child] = new
+                stack.append((new, child))
+        for name, dst_col, _ in columns:
+            if name in INDEX_COLUMNS:
+                for idx in range(len(store)):
+                    if dst_col[idx] >= 0:
+                        dst_col[idx] = mapping.get(dst_col[idx], -1)
+        return store
+
+    @classmethod
+    def from_filenode(cls, node: "FileNode") -> "TreeStore":
+        store = cls(node.path)
+        stack = [(0, node)]
+        while stack:
+            idx, n = stack.pop()
+            if n.has_children:
+                store.mark_has_children(idx)
+            for child in n.children or []:
+                stack.append((store.add(idx, child.name), child))
+        return store
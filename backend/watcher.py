@@ -0,0 +1,309 @@
+import os
+import time
+import errno
+import ctypes
+import struct
+import logging
+import asyncio
+import threading
+from typing import Dict, List, Optional, Set
+from treestore import TreeStore
+from scanner import exclude_matcher
+
+logger = logging.getLogger("nuxview.watcher")
+
+# inotify(7) constants
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW
+_EVENT = struct.Struct("iIII")
+
+BATCH_INTERVAL = 0.5 # Seconds between pushed delta batches
+POLL_INTERVAL = 30.0 # Seconds between mtime sweeps over directories without an inotify watch
+MAX_WATCHES = int(os.environ.get("NUXVIEW_MAX_WATCHES", 0)) or 65536
+SUBSCRIBER_BACKLOG = 256 # Batches a slow SSE client may fall behind before it is told to resync
+
+class _Inotify:
+    """Minimal ctypes binding; raises OSError where inotify is unavailable."""
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str) -> int:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    def read(self) -> List[tuple]:
+        """(wd, mask, cookie, name) for every queued event; [] when none are pending."""
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, cookie, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+class Watcher:
+    """Keeps a TreeStore in sync with the filesystem and fans batched deltas out to subscribers.
+
+    inotify watches are placed on every directory (up to MAX_WATCHES); directories that could not
+    be watched, or all of them when inotify is unavailable, are swept for mtime changes instead.
+    """
+
+    def __init__(self, store: TreeStore, max_depth: int = 50, excludes: Optional[List[str]] = None):
+        self.store = store
+        self.max_depth = max_depth
+        self._is_excluded = exclude_matcher(excludes, store.root_path).excluded
+        self.lock = threading.RLock() # Held while the tree is mutated; readers take it too
+        self.mode = "inotify"
+        self.version = 0
+        self._inotify: Optional[_Inotify] = None
+        self._wd_to_idx: Dict[int, int] = {}
+        self._idx_to_wd: Dict[int, int] = {}
+        self._polled: Set[int] = set()
+        self._watch_limit_hit = False
+        self._pending: List[dict] = []
+        self._subscribers: List[tuple] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # Lifecycle
+
+    def start(self):
+        try:
+            self._inotify = _Inotify()
+        except OSError as e:
+            logger.warning(f"inotify unavailable ({e}); falling back to mtime polling")
+            self.mode = "polling"
+        with self.lock:
+            for idx in self._live_nodes(0):
+                self._watch(idx)
+        self._thread = threading.Thread(target=self._run, name="nuxview-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Watching {self.store.root_path}: {len(self._wd_to_idx)} inotify watches, {len(self._polled)} polled dirs")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._inotify:
+            self._inotify.close()
+        for loop, queue in list(self._subscribers):
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    def status(self) -> dict:
+        return {
+            "root": self.store.root_path,
+            "mode": self.mode,
+            "watches": len(self._wd_to_idx),
+            "polled": len(self._polled),
+            "version": self.version,
+            "subscribers": len(self._subscribers),
+        }
+
+    # Subscribers (SSE clients); deltas are handed over on the subscriber's event loop
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_BACKLOG)
+        self._subscribers.append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers = [(loop, q) for loop, q in self._subscribers if q is not queue]
+
+    def _publish(self, batch: dict):
+        for loop, queue in list(self._subscribers):
+            loop.call_soon_threadsafe(self._offer, queue, batch)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, batch: dict):
+        if queue.full():
+            # Client is too far behind for deltas to be useful: tell it to re-fetch instead
+            while not queue.empty():
+                queue.get_nowait()
+            batch = {"version": batch["version"], "resync": True, "deltas": []}
+        queue.put_nowait(batch)
+
+    # Tree bookkeeping
+
+    def _depth(self, idx: int) -> int:
+        depth = 0
+        while idx > 0:
+            idx = self.store.parent[idx]
+            depth += 1
+        return depth
+
+    def _live_nodes(self, idx: int):
+        stack = [idx]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(self.store.children(node))
+
+    def _watch(self, idx: int):
+        if self._inotify and not self._watch_limit_hit and len(self._wd_to_idx) < MAX_WATCHES:
+            try:
+                wd = self._inotify.add_watch(self.store.path(idx))
+                self._wd_to_idx[wd] = idx
+                self._idx_to_wd[idx] = wd
+                return
+            except OSError as e:
+                if e.errno == errno.ENOSPC:
+                    logger.warning("inotify watch limit reached; remaining directories are polled")
+                    self._watch_limit_hit = True
+                elif e.errno in (errno.ENOENT, errno.EACCES, errno.ENOTDIR):
+                    return
+        self._polled.add(idx)
+
+    def _forget(self, idx: int):
+        for node in self._live_nodes(idx):
+            wd = self._idx_to_wd.pop(node, None)
+            if wd is not None:
+                self._wd_to_idx.pop(wd, None)
+            self._polled.discard(node)
+
+    def _add_dir(self, parent: int, name: str):
+        """Adds a new directory plus whatever was created inside it before its watch existed."""
+        if self.store.child_by_name(parent, name) >= 0:
+            return
+        if self._depth(parent) >= self.max_depth:
+            self.store.mark_has_children(parent) # Beyond the scanned depth: only flag it
+            return
+        path = os.path.join(self.store.path(parent), name)
+        if self._is_excluded(path):
+            return
+        idx = self.store.add_children(parent, [name])[0]
+        self.store.columns["mtime"][parent] = -1 # Listing changed: force a re-list on incremental rescans
+        self._pending.append({"op": "add", "path": path})
+        if self._depth(idx) < self.max_depth:
+            self._watch(idx)
+            self._sync_children(idx, path)
+
+    def _remove_dir(self, idx: int):
+        path = self.store.path(idx)
+        self._forget(idx)
+        self.store.columns["mtime"][self.store.parent[idx]] = -1
+        self.store.remove(idx)
+        self._pending.append({"op": "remove", "path": path})
+
+    def _sync_children(self, idx: int, path: str):
+        """Re-lists one directory and reconciles its children with the tree."""
+        try:
+            with os.scandir(path) as it:
+                names = {e.name for e in it if e.is_dir(follow_symlinks=False)}
+        except OSError:
+            return
+        current = {self.store.name(c): c for c in self.store.children(idx)}
+        for name in names - current.keys():
+            self._add_dir(idx, name)
+        for name in current.keys() - names:
+            self._remove_dir(current[name])
+
+    # Event loop
+
+    def _run(self):
+        last_flush = time.monotonic()
+        last_poll = time.monotonic()
+        while not self._stop.is_set():
+            if self._inotify:
+                events = self._inotify.read()
+                if events:
+                    with self.lock:
+                        self._apply(events)
+                else:
+                    self._stop.wait(0.05)
+            else:
+                self._stop.wait(0.5)
+
+            now = time.monotonic()
+            if self._polled and now - last_poll >= POLL_INTERVAL:
+                with self.lock:
+                    self._poll()
+                last_poll = now
+            if self._pending and now - last_flush >= BATCH_INTERVAL:
+                self._flush()
+                last_flush = now
+
+    def _flush(self):
+        with self.lock:
+            deltas, self._pending = self._pending, []
+            self.version += 1
+            batch = {"version": self.version, "resync": False, "deltas": deltas}
+        self._publish(batch)
+
+    def _apply(self, events: List[tuple]):
+        moved_from: Dict[int, int] = {} # cookie -> idx of a directory moved away
+        for wd, mask, cookie, name in events:
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost: re-list everything we know about
+                logger.warning("inotify queue overflow; resyncing watched directories")
+                for idx in list(self._idx_to_wd):
+                    self._sync_children(idx, self.store.path(idx))
+                continue
+            parent = self._wd_to_idx.get(wd)
+            if parent is None or mask & IN_IGNORED or not mask & IN_ISDIR:
+                continue
+            if mask & IN_CREATE:
+                self._add_dir(parent, name)
+            elif mask & IN_DELETE:
+                child = self.store.child_by_name(parent, name)
+                if child >= 0:
+                    self._remove_dir(child)
+            elif mask & IN_MOVED_FROM:
+                child = self.store.child_by_name(parent, name)
+                if child >= 0:
+                    moved_from[cookie] = child
+            elif mask & IN_MOVED_TO:
+                child = moved_from.pop(cookie, -1)
+                if child >= 0:
+                    # Rename inside the tree: the subtree and its watches move with the node
+                    old_path = self.store.path(child)
+                    self.store.move(child, parent, name)
+                    self.store.columns["mtime"][parent] = -1
+                    self._pending.append({"op": "move", "from": old_path, "path": self.store.path(child)})
+                else:
+                    self._add_dir(parent, name)
+        # Moved out of the watched tree (no matching MOVED_TO in this batch)
+        for child in moved_from.values():
+            self._remove_dir(child)
+
+    def _poll(self):
+        for idx in list(self._polled):
+            if idx not in self._polled:
+                continue # Removed while sweeping
+            path = self.store.path(idx)
+            try:
+                mtime = os.lstat(path).st_mtime_ns
+            except OSError:
+                if idx:
+                    self._remove_dir(idx)
+                continue
+            if mtime != self.store.columns["mtime"][idx]:
+                self._sync_children(idx, path)
+                self.store.columns["mtime"][idx] = mtime
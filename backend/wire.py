@@ -0,0 +1,54 @@
+import os
+import hashlib
+from typing import Any, Dict, Optional
+
+# Compact tree encoding (compact=true on the tree endpoints). Every node of the regular encoding
+# repeats its absolute path, which is most of the payload on deep trees. Here only the top node
+# keeps "path"; a child's path is its parent's path joined with its name. Fields that are null
+# or at their default are left out:
+#   type            always "directory"
+#   children        omitted when empty (has_children still says whether more can be loaded)
+#   has_children    omitted when false
+#   largest_file    relative to the node's own path
+def compact(node) -> Dict[str, Any]:
+    """The compact form of a tree given as a to_dict() dict or a FileNode."""
+    if hasattr(node, "model_dump"):
+        node = node.model_dump(exclude_none=True)
+    top = _strip(node, node.get("path", ""))
+    top["path"] = node.get("path")
+    stack = [(node, top)]
+    while stack:
+        source, target = stack.pop()
+        kids = []
+        for child in source.get("children") or []:
+            slim = _strip(child, child.get("path", ""))
+            kids.append(slim)
+            stack.append((child, slim))
+        if kids:
+            target["children"] = kids
+    return top
+
+def _strip(node: Dict[str, Any], path: str) -> Dict[str, Any]:
+    slim = {k: v for k, v in node.items()
+            if v is not None and k not in ("path", "children", "type") and not (k == "has_children" and not v)}
+    largest = slim.get("largest_file")
+    if largest and path and largest.startswith(path.rstrip(os.sep) + os.sep):
+        slim["largest_file"] = largest[len(path.rstrip(os.sep)) + 1:]
+    return slim
+
+# Conditional requests. Tree responses are a function of the tree version (snapshot file identity,
+# plus the watcher's delta version while watching) and the request parameters, so the ETag is
+# derived from those without building the response; If-None-Match hits answer 304 straight away.
+# Weak validators: the compression middleware may re-encode the bytes.
+def etag(*parts) -> str:
+    return 'W/"' + hashlib.blake2b(repr(parts).encode(), digest_size=10).hexdigest() + '"'
+
+def not_modified(tag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match:
+        return False
+    wanted = tag[2:] if tag.startswith("W/") else tag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or (candidate[2:] if candidate.startswith("W/") else candidate) == wanted:
+            return True
+    return False
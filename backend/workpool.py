@@ -0,0 +1,83 @@
+import os
+import time
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from metrics import serialize_time
+
+logger = logging.getLogger("nuxview.workpool")
+
+class PoolBusy(Exception):
+    """Raised instead of queueing when a pool already has max_pending calls waiting (HTTP 429)."""
+
+    def __init__(self, pool: "WorkPool"):
+        super().__init__(f"{pool.name} pool is busy ({pool.in_flight} requests in flight); retry shortly")
+        self.pool = pool
+
+class WorkPool:
+    """Bounded executor for the blocking part of async handlers.
+
+    Filesystem walks, stats and tree serialization run here instead of on the event loop (or
+    Starlette's shared threadpool), so they cannot starve light endpoints. At most
+    `workers` calls run at once and `max_pending` more may wait; beyond that run() raises
+    PoolBusy right away. The counters are only touched from the event loop thread.
+    """
+
+    def __init__(self, name: str, workers: int, max_pending: int):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self.in_flight = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"nuxview-{name}")
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        if self.in_flight >= self.workers + self.max_pending:
+            self.rejected += 1
+            raise PoolBusy(self)
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            self.in_flight -= 1
+
+    async def respond(self, fn: Callable, *args, **kwargs) -> Response:
+        """Runs fn on this pool and JSON-encodes its result there too.
+
+        Encoding a deep tree costs as much as building it; done on the event loop it would
+        stall every other request.
+        """
+        def call():
+            result = fn(*args, **kwargs)
+            if isinstance(result, Response):
+                return result
+            started = time.perf_counter()
+            response = JSONResponse(jsonable_encoder(result))
+            serialize_time.observe(time.perf_counter() - started, handler=getattr(fn, "__name__", "call"))
+            return response
+        return await self.run(call)
+
+    def offload(self, fn: Callable) -> Callable:
+        """Decorator turning a blocking handler into an async one that runs (and encodes) on this pool.
+
+        functools.wraps keeps fn's signature visible to FastAPI for parameter parsing.
+        """
+        @functools.wraps(fn)
+        async def handler(*args, **kwargs):
+            return await self.respond(fn, *args, **kwargs)
+        return handler
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": self.workers, "max_pending": self.max_pending, "in_flight": self.in_flight, "rejected": self.rejected}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+# Live walks (/api/scan, lazy node scans, loading a tree to watch)
+scan_pool = WorkPool("scan", int(os.environ.get("NUXVIEW_SCAN_POOL", 0)) or 4, 16)
+# Short blocking calls: stats, snapshot lookups, search/top-n, tree serialization
+io_pool = WorkPool("io", int(os.environ.get("NUXVIEW_IO_POOL", 0)) or 16, 256)
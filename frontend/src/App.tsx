@@ -28,6 +28,7 @@ function App() {
   });
 
   const pollTimer = useRef<number | null>(null);
+  const scanJob = useRef<string | null>(null); // Job id of the scan this tab started
 
   const loadCache = useCallback(async () => {
     try {
@@ -42,7 +43,7 @@ function App() {
 
   const checkScanningStatus = useCallback(async () => {
     try {
-      const status = await getScanStatus();
+      const status = await getScanStatus(scanJob.current ?? undefined);
       setIsScanning(status.is_scanning);
       setScanProgress(status.progress);
 
@@ -109,7 +110,8 @@ function App() {
   const handleFullScan = async () => {
     try {
       setError(null);
-      await startFullScan(inputPath);
+      const { job_id } = await startFullScan(inputPath);
+      scanJob.current = job_id;
       setIsScanning(true);
       setScanProgress(0);
       pollTimer.current = window.setInterval(checkScanningStatus, 2000);
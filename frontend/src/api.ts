@@ -18,6 +18,17 @@ export interface FileNode {
   type: string;
   children?: FileNode[];
   has_children?: boolean;
+  // Present when the scan gathered sizes (subtree totals)
+  size?: number;
+  allocated?: number;
+  file_count?: number;
+  largest_file?: string;
+  largest_file_size?: number;
+  // Present on the scan root and on mount points, where the filesystem changes
+  device?: string;
+  fstype?: string;
+  mount_point?: string;
+  remote?: boolean;
 }
 
 export interface NodeDetails {
@@ -38,26 +49,218 @@ export const getNodeDetails = async (path: string) => {
   return res.data.details;
 };
 
+// One lstat per path; times are epoch seconds and a row is null when its path could not be read
+export interface NodeDetailsRow {
+  path: string;
+  name: string;
+  size: number;
+  mode: number;
+  permissions: string;
+  uid: number;
+  gid: number;
+  owner: string;
+  group: string;
+  modified: number;
+  accessed: number;
+  changed: number;
+  is_dir: boolean;
+  is_link: boolean;
+}
+
+export const getNodeDetailsBatch = async (paths: string[]) => {
+  const res = await api.post<{ fields: (keyof NodeDetailsRow)[]; rows: (unknown[] | null)[]; errors: Record<string, string> }>(
+    '/api/node/details/batch',
+    { paths }
+  );
+  const { fields, rows, errors } = res.data;
+  const details = rows.map((row) =>
+    row ? (Object.fromEntries(fields.map((field, i) => [field, row[i]])) as unknown as NodeDetailsRow) : null
+  );
+  return { details, errors };
+};
+
 export const scanPath = async (path: string, maxDepth: number = 1, excludes: string[] = []) => {
   const res = await api.post<{ tree: FileNode }>('/api/scan', { path, max_depth: maxDepth, excludes });
   return res.data.tree;
 };
 
-export const scanNode = async (path: string, excludes: string[] = []) => {
-  const res = await api.post<{ node: FileNode }>('/api/scan/node', { path, excludes });
+// NDJSON tree streams (see backend/stream.py): one record per line, a parent before its children
+export type TreeRecord =
+  | ({ kind: 'node'; parent: string | null; depth: number } & Omit<FileNode, 'children'>)
+  | { kind: 'sizes'; path: string; size?: number; allocated?: number; file_count?: number; largest_file?: string; largest_file_size?: number }
+  | { kind: 'start'; path: string; order: string; timestamp?: string; version?: number }
+  | { kind: 'end'; nodes: number; stop_reason: string | null }
+  | { kind: 'error'; detail: string };
+
+// Reads an NDJSON response and hands over the records of every received chunk as one batch
+const readTreeStream = async (res: Response, onRecords: (records: TreeRecord[]) => void, signal?: AbortSignal) => {
+  if (!res.ok || !res.body) {
+    throw new Error(`Stream failed: HTTP ${res.status}`);
+  }
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = '';
+  while (!signal?.aborted) {
+    const { done, value } = await reader.read();
+    buffered += decoder.decode(value, { stream: !done });
+    const lines = buffered.split('\n');
+    buffered = done ? '' : lines.pop() ?? '';
+    const records = lines.filter((line) => line).map((line) => JSON.parse(line) as TreeRecord);
+    if (records.length) onRecords(records);
+    if (done) break;
+  }
+};
+
+// Live scan streamed while it runs; abort the signal to stop the scan server-side
+export const streamScan = async (
+  path: string,
+  onRecords: (records: TreeRecord[]) => void,
+  options: { maxDepth?: number; excludes?: string[]; sizes?: boolean; signal?: AbortSignal } = {}
+) => {
+  const { maxDepth = 3, excludes = [], sizes = false, signal } = options;
+  const res = await fetch(`${API_BASE}/api/scan`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ path, max_depth: maxDepth, excludes, sizes, stream: true }),
+    signal,
+  });
+  await readTreeStream(res, onRecords, signal);
+};
+
+// The last full scan (or a subtree of it), depth-first or level by level
+export const streamTree = async (
+  onRecords: (records: TreeRecord[]) => void,
+  options: { path?: string; maxDepth?: number; order?: 'dfs' | 'bfs'; signal?: AbortSignal } = {}
+) => {
+  const { path, maxDepth, order = 'dfs', signal } = options;
+  const params = new URLSearchParams({ order });
+  if (path) params.set('path', path);
+  if (maxDepth !== undefined) params.set('max_depth', String(maxDepth));
+  const res = await fetch(`${API_BASE}/api/tree/stream?${params}`, { signal });
+  await readTreeStream(res, onRecords, signal);
+};
+
+// 'auto' answers from the last full scan unless the directory changed since, then scans live
+export const scanNode = async (path: string, excludes: string[] = [], source: 'live' | 'cache' | 'auto' = 'auto') => {
+  const res = await api.post<{ node: FileNode }>('/api/scan/node', { path, excludes, source });
   return res.data.node;
 };
 
-export const startFullScan = async (path: string, maxDepth: number = 50, excludes: string[] = []) => {
-  const res = await api.post<{ status: string }>('/api/scan/full', { path, max_depth: maxDepth, excludes });
+// Compact wire form (compact: true, see backend/wire.py): only the top node carries its path,
+// type is implied and null or default fields are left out; largest_file is relative to the node
+export interface CompactNode extends Omit<FileNode, 'path' | 'type' | 'children'> {
+  path?: string;
+  children?: CompactNode[];
+}
+
+const joinPath = (parent: string, name: string) => (parent.endsWith('/') ? parent + name : `${parent}/${name}`);
+
+export const expandCompact = (node: CompactNode, path: string = node.path ?? ''): FileNode => {
+  const { children, ...fields } = node;
+  return {
+    ...fields,
+    path,
+    type: 'directory',
+    has_children: node.has_children ?? false,
+    largest_file: node.largest_file && !node.largest_file.startsWith('/') ? joinPath(path, node.largest_file) : node.largest_file,
+    children: children?.map((child) => expandCompact(child, joinPath(path, child.name))) ?? [],
+  };
+};
+
+// POST responses are not kept by the browser cache, so tree nodes are revalidated by hand:
+// the server answers 304 while the tree is unchanged and the cached copy is reused
+type CachedNode = { node: FileNode; stale: boolean; timestamp: string };
+const nodeCache = new Map<string, { etag: string; data: CachedNode }>();
+
+export const getCachedNode = async (path: string, maxDepth: number = 1) => {
+  const key = `${maxDepth}:${path}`;
+  const cached = nodeCache.get(key);
+  const res = await api.post<{ node: CompactNode; stale: boolean; timestamp: string }>(
+    '/api/tree/node',
+    { path, max_depth: maxDepth, compact: true },
+    {
+      headers: cached ? { 'If-None-Match': cached.etag } : {},
+      validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+    }
+  );
+  if (res.status === 304 && cached) {
+    return cached.data;
+  }
+  const data = { ...res.data, node: expandCompact(res.data.node) };
+  const etag = res.headers['etag'];
+  if (etag) {
+    if (nodeCache.size >= 500) nodeCache.delete(nodeCache.keys().next().value!);
+    nodeCache.set(key, { etag, data });
+  }
+  return data;
+};
+
+export type JobState = 'queued' | 'running' | 'done' | 'failed' | 'cancelled';
+
+// oneFilesystem: stay on the filesystem of `path` (mount points below it are listed, not entered)
+// analytics: also count files by extension, size and age per subtree (see getAnalytics); implies sizes
+export const startFullScan = async (
+  path: string,
+  maxDepth: number = 50,
+  excludes: string[] = [],
+  sizes: boolean = false,
+  oneFilesystem: boolean = false,
+  analytics: boolean = false
+) => {
+  const res = await api.post<{ status: string; job_id: string; state: JobState }>('/api/scan/full', {
+    path,
+    max_depth: maxDepth,
+    excludes,
+    sizes,
+    one_filesystem: oneFilesystem,
+    analytics,
+  });
+  return res.data;
+};
+
+export const getScanStatus = async (jobId?: string) => {
+  const res = await api.get<{ is_scanning: boolean; progress: number; scanned: number; total: number; error: string | null; job_id?: string; state?: JobState }>('/api/scan/status', { params: { job_id: jobId } });
   return res.data;
 };
 
-export const getScanStatus = async () => {
-  const res = await api.get<{ is_scanning: boolean; progress: number; scanned: number; total: number; error: string | null }>('/api/scan/status');
+export interface ScanMetrics {
+  engine: 'parallel' | 'find';
+  phases: Record<string, number>; // Seconds per phase: walk, parse, build, save, history
+  dirs_per_sec: number | null;
+  syscalls: Record<string, number>;
+  errors: Record<string, number>; // By errno name (EACCES, ELOOP, ...)
+  peak_rss_bytes: number | null;
+}
+
+export interface ScanJob {
+  id: string;
+  state: JobState;
+  params: { path: string; max_depth: number; excludes: string[]; sizes: boolean };
+  created: number;
+  started: number | null;
+  finished: number | null;
+  progress: number;
+  scanned: number;
+  total: number;
+  error: string | null;
+  metrics: ScanMetrics;
+  profile: { mode: 'cprofile' | 'sample'; saved: boolean; samples: number | null } | null;
+}
+
+// Download link of a profiled job's pstats file or collapsed stacks (start it with profile set)
+export const jobProfileUrl = (jobId: string) => `${API_BASE}/api/jobs/${jobId}/profile`;
+
+export const listJobs = async () => {
+  const res = await api.get<{ max_concurrent: number; jobs: ScanJob[] }>('/api/jobs');
+  return res.data.jobs;
+};
+
+export const cancelJob = async (jobId: string) => {
+  const res = await api.post<ScanJob>(`/api/jobs/${jobId}/cancel`);
   return res.data;
 };
 
+// The browser revalidates this GET through its ETag (Cache-Control: no-cache) and reuses the body on 304
 export const getTree = async () => {
   const res = await api.get<{ root: FileNode; timestamp: string; path: string }>('/api/tree');
   return res.data;
@@ -71,3 +274,139 @@ export const checkHealth = async () => {
     return false;
   }
 }
+
+export interface TreeDelta {
+  op: 'add' | 'remove' | 'move';
+  path: string;
+  from?: string;
+}
+
+export const startWatch = async () => {
+  const res = await api.post<{ status: string; mode: string }>('/api/watch/start');
+  return res.data;
+};
+
+// Batched live updates; `resync` means deltas were dropped and the tree should be re-fetched
+export const subscribeTreeEvents = (onBatch: (batch: { version: number; resync: boolean; deltas: TreeDelta[] }) => void) => {
+  const source = new EventSource(`${API_BASE}/api/watch/events`);
+  source.addEventListener('delta', (e) => onBatch(JSON.parse((e as MessageEvent).data)));
+  return () => source.close();
+};
+
+export interface TopEntry {
+  path: string;
+  name: string;
+  modified: number | null;
+  size?: number;
+  allocated?: number;
+  file_count?: number;
+}
+
+export const getTopDirectories = async (path: string | null, by: 'size' | 'allocated' | 'files' | 'age' = 'size', n: number = 50) => {
+  const res = await api.get<{ results: TopEntry[]; elapsed_ms: number }>('/api/query/top', { params: { path: path ?? undefined, by, n } });
+  return res.data.results;
+};
+
+export interface SearchResult {
+  path: string;
+  name: string;
+  size?: number;
+  allocated?: number;
+  file_count?: number;
+}
+
+export const searchDirectories = async (
+  q: string,
+  options: { mode?: 'auto' | 'prefix' | 'substring' | 'glob'; path?: string; offset?: number; limit?: number; caseSensitive?: boolean } = {}
+) => {
+  const { mode = 'auto', path, offset = 0, limit = 100, caseSensitive = false } = options;
+  const res = await api.get<{ results: SearchResult[]; total: number; elapsed_ms: number }>('/api/search', {
+    params: { q, mode, path, offset, limit, case_sensitive: caseSensitive },
+  });
+  return res.data;
+};
+
+export interface HistogramBucket {
+  bucket: string;
+  files: number;
+  bytes: number;
+}
+
+// Files below a directory; extension "" means none, "(other)" collects untracked extensions
+export interface FileHistogram {
+  files: number;
+  bytes: number;
+  extensions: { extension: string; files: number; bytes: number }[];
+  sizes: HistogramBucket[]; // 0, 1B-4K, 4K-64K, 64K-1M, 1M-16M, 16M-256M, 256M-1G, 1G+
+  ages: HistogramBucket[]; // By mtime at scan time: <1d, 1-7d, 7-30d, 30-90d, 90d-1y, 1y+
+}
+
+export const getAnalytics = async (path: string | null, children: boolean = false, by: 'files' | 'bytes' = 'files', n: number = 50) => {
+  const res = await api.get<
+    { path: string; timestamp: string; tracked_extensions: string[]; children?: ({ name: string; path: string } & FileHistogram)[] } & FileHistogram
+  >('/api/query/analytics', { params: { path: path ?? undefined, children, by, n } });
+  return res.data;
+};
+
+export interface HistorySnapshot {
+  id: number;
+  root_path: string;
+  created: number;
+  timestamp: string | null;
+  objects: number;
+}
+
+export const listHistory = async (path?: string) => {
+  const res = await api.get<{ keep: number; snapshots: HistorySnapshot[] }>('/api/history', { params: { path } });
+  return res.data.snapshots;
+};
+
+export interface HistoryTotals {
+  size: number;
+  file_count: number;
+  dirs: number;
+}
+
+// Baseline: fromId, else the newest scan at least sinceDays older than toId, else the previous scan
+export const diffHistory = async (
+  options: { toId?: number; fromId?: number; sinceDays?: number; root?: string; path?: string; limit?: number } = {}
+) => {
+  const { toId, fromId, sinceDays, root, path, limit = 100 } = options;
+  const res = await api.get<{
+    growth_unit: 'bytes' | 'dirs';
+    counts: { added: number; removed: number; grown: number; compared: number };
+    added: ({ path: string } & HistoryTotals)[];
+    removed: ({ path: string } & HistoryTotals)[];
+    grown: { path: string; growth: number; before: HistoryTotals; after: HistoryTotals }[];
+  }>('/api/history/diff', { params: { to_id: toId, from_id: fromId, since_days: sinceDays, root, path, limit } });
+  return res.data;
+};
+
+export interface CollectorHost {
+  host: string;
+  root_path: string;
+  timestamp: string | null;
+  received: number;
+  nodes: number;
+  sizes: boolean;
+  version: number | null;
+  deltas_applied: number;
+}
+
+export const listCollectorHosts = async () => {
+  const res = await api.get<{ hosts: CollectorHost[] }>('/api/collector/hosts');
+  return res.data.hosts;
+};
+
+// Combined tree of every host; paths are "host:/abs/path", the default root has one child per host
+export const getCollectorTree = async (path?: string, maxDepth: number = 1) => {
+  const res = await api.get<{ tree: FileNode }>('/api/collector/tree', { params: { path, max_depth: maxDepth } });
+  return res.data.tree;
+};
+
+export const getCollectorTop = async (by: 'size' | 'allocated' | 'files' | 'age' = 'size', n: number = 50, hosts?: string[]) => {
+  const res = await api.get<{ results: (TopEntry & { host: string })[] }>('/api/collector/top', {
+    params: { by, n, hosts: hosts?.join(',') },
+  });
+  return res.data.results;
+};